@@ -0,0 +1,62 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Measure the per-call overhead of swappable handles
+
+Run with ``python benchmarks/bench_handles.py``.
+
+"""
+from __future__ import print_function
+from epoxy.component import Component, Dependency
+from epoxy.core import ComponentManager
+import timeit
+
+CALLS = 1000000
+
+
+class Model(Component):
+
+    def predict(self, value):
+        return value
+
+
+class Client(Component):
+
+    model = Dependency()
+
+
+def launch(**options):
+    mgr = ComponentManager()
+    mgr.launch_configuration({'components': {
+        'model': dict(options, **{'class': '__main__:Model'}),
+        'client': {'class': '__main__:Client',
+                   'dependencies': {'model': 'model'}},
+    }})
+    return mgr.components['client'].model
+
+
+def measure(model):
+    predict = model.predict
+    return min(timeit.repeat(lambda: predict(1), number=CALLS, repeat=3))
+
+
+def main():
+    direct = measure(launch())
+    handle = measure(launch(swappable=True))
+    instrumented = measure(launch(instrument=True))
+    print("%d calls" % CALLS)
+    print("direct:       %.3f s (%.0f ns per call)"
+          % (direct, direct / CALLS * 1e9))
+    print("handle:       %.3f s (%.0f ns per call, +%.0f ns)"
+          % (handle, handle / CALLS * 1e9, (handle - direct) / CALLS * 1e9))
+    print("instrumented: %.3f s (%.0f ns per call, +%.0f ns)"
+          % (instrumented, instrumented / CALLS * 1e9,
+             (instrumented - direct) / CALLS * 1e9))
+
+
+if __name__ == '__main__':
+    main()
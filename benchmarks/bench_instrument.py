@@ -0,0 +1,40 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Measure the per-call overhead of instrumented dependencies
+
+Run with ``python benchmarks/bench_instrument.py``.
+
+"""
+from __future__ import print_function
+from epoxy.proxies import CallStatistics, InstrumentedProxy
+import timeit
+
+CALLS = 1000000
+
+
+class Target(object):
+
+    def method(self, value):
+        return value
+
+
+def main():
+    target = Target()
+    proxy = InstrumentedProxy(target, CallStatistics("a", "b", "c"))
+    direct = min(timeit.repeat(lambda: target.method(1),
+                               number=CALLS, repeat=5))
+    instrumented = min(timeit.repeat(lambda: proxy.method(1),
+                                     number=CALLS, repeat=5))
+    print("direct call:       %.0f ns" % (direct / CALLS * 1e9))
+    print("instrumented call: %.0f ns" % (instrumented / CALLS * 1e9))
+    print("overhead per call: %.0f ns" % ((instrumented - direct)
+                                          / CALLS * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Compare building per-tenant managers from a template and from scratch
+
+Run with ``python benchmarks/bench_templates.py``.
+
+"""
+from __future__ import print_function
+from epoxy.component import Component, Dependency
+from epoxy.core import ComponentManager, GraphTemplate
+from epoxy.settings import StringSetting
+import time
+
+TENANTS = 1000
+COMPONENTS = 50
+
+
+class TenantComponent(Component):
+
+    previous = Dependency(required=False)
+    shared = Dependency(required=False)
+
+    schema = StringSetting(default="public")
+
+
+def make_config():
+    path = '__main__:TenantComponent'
+    components = {'pool': {'class': path, 'share': 'singleton'}}
+    for i in range(COMPONENTS):
+        dependencies = {'shared': 'pool'}
+        if i:
+            dependencies['previous'] = 'c%d' % (i - 1)
+        components['c%d' % i] = {
+            'class': path,
+            'dependencies': dependencies,
+            'settings': {'schema': 'default'},
+        }
+    return {'components': components}
+
+
+def main():
+    t0 = time.time()
+    for i in range(TENANTS):
+        config = make_config()
+        config['components']['c0']['settings']['schema'] = 'tenant%d' % i
+        ComponentManager().launch_configuration(config)
+    from_scratch = time.time() - t0
+
+    t0 = time.time()
+    template = GraphTemplate.compile(make_config())
+    compile_time = time.time() - t0
+    shared = template.launch()
+    t0 = time.time()
+    for i in range(TENANTS):
+        template.launch(settings={'c0': {'schema': 'tenant%d' % i}},
+                        parent=shared)
+    from_template = time.time() - t0
+
+    print("%d tenants of %d components" % (TENANTS, COMPONENTS + 1))
+    print("launch_configuration: %.3f s (%.0f us per tenant)"
+          % (from_scratch, from_scratch / TENANTS * 1e6))
+    print("template compile:     %.3f s" % compile_time)
+    print("template launch:      %.3f s (%.0f us per tenant)"
+          % (from_template, from_template / TENANTS * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""An HTTP endpoint serving the live state of a component manager as json
+
+The server is started with :meth:`~epoxy.core.ComponentManager.start_admin`
+(or the ``admin`` key of the configuration) and listens either on a
+localhost port or on a unix socket::
+
+    mgr = ComponentManager()
+    admin = mgr.start_admin(port=8181)
+    mgr.launch_configuration(config)
+
+    $ curl localhost:8181/components
+
+The following are served:
+
+``GET /components``
+  Each component with its class, lifecycle ``state`` (``instantiated``,
+  ``starting``, ``started``, ``stopped``, ``failed``...), the duration of
+  each step it has been through and, if the manager has a launch profile,
+  the memory it used while launching.
+``GET /edges``
+  The dependencies between the components, while the manager has a graph
+  (see :meth:`~epoxy.core.ComponentManager.compact`).
+``GET /statistics``
+  The call statistics of instrumented dependencies, the statistics of
+  dependency caches and the state of dependency circuit breakers.
+``GET /profile``
+  The report of the manager's launch profile, if it has one.
+``POST /profile/snapshot``
+  Take a snapshot of the memory allocated by Python, returning the source
+  lines which allocated the most (``?limit=N``) and what changed since the
+  previous snapshot.  The first snapshot starts :mod:`tracemalloc`, which
+  slows the process down until ``POST /profile/stop``.
+
+The server runs in a background thread and only observes the lifecycle of
+components (see :mod:`epoxy.events`); calls between components are not
+affected by it.
+
+"""
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qs, urlparse
+import json
+import os
+import socket
+import stat
+import threading
+
+_STATES = {
+    ('import', False): 'importing',
+    ('import', True): 'imported',
+    ('instantiate', False): 'instantiating',
+    ('instantiate', True): 'instantiated',
+    ('start', False): 'starting',
+    ('start', True): 'started',
+    ('stop', False): 'stopping',
+    ('stop', True): 'stopped',
+    ('reload', False): 'reloading',
+    ('reload', True): 'started',
+}
+
+
+class _HTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _UnixHTTPServer(_HTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # HTTPServer.server_bind expects a (host, port) address
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        query = dict((key, values[-1])
+                     for key, values in parse_qs(url.query).items())
+        route = self.server.admin.routes.get((method, url.path.rstrip('/')))
+        if route is None:
+            self._respond(404, {'error': "No such resource: %s %s"
+                                         % (method, url.path)})
+            return
+        try:
+            status, body = route(query)
+        except Exception as e:
+            status, body = 500, {'error': "%s: %s" % (type(e).__name__, e)}
+        self._respond(status, body)
+
+    def _respond(self, status, body):
+        data = json.dumps(body, indent=1, sort_keys=True,
+                          default=repr).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'local'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AdminServer(object):
+    """Serve the state of a :class:`~epoxy.core.ComponentManager` as json
+
+    Listens on ``host`` and ``port`` (0 picks a free port), or on the unix
+    socket at ``path`` if it is given (replacing any socket already there;
+    ValueError is raised if something else is).  :meth:`start` must be
+    called before the components are launched for their timings to be
+    recorded.
+
+    """
+
+    # the kinds of lifecycle event to receive
+    KINDS = ('import', 'instantiate', 'start', 'stop', 'reload')
+
+    def __init__(self, manager, host='127.0.0.1', port=0, path=None):
+        self.manager = manager
+        self.path = path
+        if path is not None:
+            try:
+                mode = os.lstat(path).st_mode
+            except OSError:
+                pass  # nothing there
+            else:
+                # a socket left by a previous server is replaced, but
+                # anything else at the path is not ours to remove
+                if not stat.S_ISSOCK(mode):
+                    raise ValueError("Refusing to replace '%s' with the "
+                                     "admin socket as it is not a socket"
+                                     % path)
+                os.unlink(path)
+            self._server = _UnixHTTPServer(path, _Handler)
+        else:
+            self._server = _HTTPServer((host, port), _Handler)
+        self._server.admin = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self._states = {}  # name -> (state, error)
+        self._timings = {}  # name -> {kind: seconds}
+        self._snapshot = None
+        self._started_tracing = False
+        self.routes = {
+            ('GET', ''): self.get_index,
+            ('GET', '/components'): self.get_components,
+            ('GET', '/edges'): self.get_edges,
+            ('GET', '/statistics'): self.get_statistics,
+            ('GET', '/profile'): self.get_profile,
+            ('POST', '/profile/snapshot'): self.take_snapshot,
+            ('POST', '/profile/stop'): self.stop_tracing,
+        }
+
+    @property
+    def address(self):
+        """The (host, port) or unix socket path being listened on"""
+        return self._server.server_address
+
+    def __call__(self, event):
+        state = _STATES[event.kind, event.after]
+        with self._lock:
+            if event.error is not None:
+                self._states[event.component] = ('failed', repr(event.error))
+            else:
+                self._states[event.component] = (state, None)
+            if event.after:
+                timings = self._timings.setdefault(event.component, {})
+                timings[event.kind] = \
+                    timings.get(event.kind, 0) + event.duration
+
+    def start(self):
+        """Start serving requests in a background thread"""
+        self.manager.add_hook(self, self.KINDS)
+        # the poll interval bounds how long stop() waits
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.1},
+                                        name="epoxy admin")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving requests"""
+        self.manager.remove_hook(self)
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.stop_tracing()
+
+    def get_index(self, query):
+        return 200, sorted("%s %s" % (method, path or '/')
+                           for method, path in self.routes)
+
+    def get_components(self, query):
+        manager = self.manager
+        graph = manager.graph
+        with manager._components_lock:
+            components = dict(manager.components)
+            started = set(name for name, _ in manager._started_components)
+        names = set(components)
+        if graph is not None:
+            names.update(graph.nodes)
+        sizes = {}
+        if manager.launch_profile is not None:
+            sizes = dict((entry['component'], entry.get('size'))
+                         for entry in manager.launch_profile.report())
+        with self._lock:
+            states = dict(self._states)
+            timings = dict((name, dict(x))
+                           for name, x in self._timings.items())
+
+        results = []
+        for name in sorted(names):
+            component = components.get(name)
+            if component is not None:
+                class_path = '%s:%s' % (type(component).__module__,
+                                        type(component).__name__)
+            else:
+                class_path = graph.nodes[name].class_path
+            state, error = states.get(name, (None, None))
+            if state is None:
+                if name in started:
+                    state = 'started'
+                elif component is not None:
+                    state = 'instantiated'
+                else:
+                    state = 'pending'
+            results.append({
+                'component': name,
+                'class': class_path,
+                'state': state,
+                'error': error,
+                'timings': timings.get(name, {}),
+                'size': sizes.get(name),
+            })
+        return 200, results
+
+    def get_edges(self, query):
+        graph = self.manager.graph
+        if graph is None:
+            return 200, []
+        return 200, [{'component': reference.name, 'dependency': key,
+                      'target': target}
+                     for reference in graph.references
+                     for key, target in sorted(reference.dependencies.items())]
+
+    def get_statistics(self, query):
+        return 200, {'calls': self.manager.get_call_statistics(),
+                     'caches': self.manager.get_cache_statistics(),
+                     'breakers': self.manager.get_breaker_states()}
+
+    def get_profile(self, query):
+        profile = self.manager.launch_profile
+        if profile is None:
+            return 404, {'error': "The manager has no launch profile"}
+        return 200, profile.as_dict()
+
+    def take_snapshot(self, query):
+        try:
+            import tracemalloc
+        except ImportError:
+            return 501, {'error': "tracemalloc is not available on this "
+                                  "version of Python"}
+        limit = int(query.get('limit', 10))
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+                self._snapshot = None
+            ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+            snapshot = tracemalloc.take_snapshot().filter_traces(ignored)
+            previous, self._snapshot = self._snapshot, snapshot
+
+        def sites(statistics):
+            return [{'site': '%s:%d' % (x.traceback[0].filename,
+                                        x.traceback[0].lineno),
+                     'size': x.size, 'count': x.count}
+                    for x in statistics[:limit]]
+        result = {
+            'traced': tracemalloc.get_traced_memory()[0],
+            'top': sites(snapshot.statistics('lineno')),
+            'changes': None,
+        }
+        if previous is not None:
+            result['changes'] = [
+                {'site': '%s:%d' % (x.traceback[0].filename,
+                                    x.traceback[0].lineno),
+                 'size': x.size_diff, 'count': x.count_diff}
+                for x in snapshot.compare_to(previous, 'lineno')[:limit]]
+        return 200, result
+
+    def stop_tracing(self, query=None):
+        with self._lock:
+            self._snapshot = None
+            if self._started_tracing:
+                import tracemalloc
+                tracemalloc.stop()
+                self._started_tracing = False
+        return 200, {'tracing': False}
@@ -0,0 +1,166 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Coalesce individual calls to a dependency into batch calls
+
+A :class:`CallBatcher` sits between a component and one of its
+dependencies.  Calls made to one method of the dependency (``method``) are
+queued and then passed on in batches to another method which accepts a
+list of items (``batch_method``).  For example, a driver with ``send`` and
+``send_many`` methods could be configured like this::
+
+    components:
+      sms_driver_batcher:
+        class: epoxy.batching:CallBatcher
+        dependencies:
+          target: sms_driver
+        settings:
+          method: send
+          batch_method: send_many
+          max_batch_size: 50
+          max_delay: 0.01
+
+The same thing may be configured directly on a dependency::
+
+    dependencies:
+      sms_driver:
+        component: sms_driver
+        batch:
+          method: send
+          batch_method: send_many
+
+The batched method must take a single argument.  Each call returns a
+:class:`concurrent.futures.Future` for its own result: ``batch_method`` may
+return a list of results (one for each item, in order) or ``None``.  If the
+batch call raises, or returns anything else, an exception is set on every
+future in the batch.
+
+A batch is sent when ``max_batch_size`` items are queued or when the oldest
+queued item has waited ``max_delay`` seconds.  Anything still queued is
+sent when the batcher is stopped.  All other attributes are passed through
+to the target unchanged.
+
+"""
+from epoxy.component import Component, Dependency
+from epoxy.settings import FloatSetting, IntegerSetting, StringSetting
+import threading
+import time
+
+
+class CallBatcher(Component):
+    """Collect calls to ``method`` of ``target`` into ``batch_method`` calls"""
+
+    target = Dependency()
+
+    method = StringSetting(required=True,
+                           help="Name of the method whose calls are batched")
+    batch_method = StringSetting(required=True,
+                                 help="Name of the method taking a list of "
+                                      "items which is called for each batch")
+    max_batch_size = IntegerSetting(default=100,
+                                    help="The largest number of items sent "
+                                         "in one batch")
+    max_delay = FloatSetting(default=0.01,
+                             help="The longest time (in seconds) that an "
+                                  "item waits for a batch to fill up")
+
+    def __init__(self):
+        self._pending = []  # (item, future, time queued)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def __getattr__(self, name):
+        # only called for attributes not found on the batcher itself
+        if name.startswith('_') or 'target' not in self.__dict__:
+            raise AttributeError(name)
+        if name == self.method:
+            return self.call
+        return getattr(self.target, name)
+
+    def call(self, item):
+        """Queue a call with ``item``, returning a future for its result"""
+        from concurrent.futures import Future
+        future = Future()
+        with self._condition:
+            if self._stopping or self._thread is None:
+                raise RuntimeError("CallBatcher for '%s' is not running"
+                                   % self.method)
+            self._pending.append((item, future, time.time()))
+            if len(self._pending) in (1, self.max_batch_size):
+                self._condition.notify()
+        return future
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._pending:
+                if self._stopping:
+                    return None
+                self._condition.wait()
+            while len(self._pending) < self.max_batch_size and \
+                    not self._stopping:
+                remaining = \
+                    self._pending[0][2] + self.max_delay - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _send(self, batch):
+        batch = [(item, future) for item, future, _ in batch
+                 if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            results = getattr(self.target, self.batch_method)(items)
+            if results is None:
+                results = [None] * len(futures)
+            elif not isinstance(results, (list, tuple)) or \
+                    len(results) != len(futures):
+                raise TypeError(
+                    "%s returned %r for a batch of %d items; it should "
+                    "return None or a list with one result for each item"
+                    % (self.batch_method, results, len(futures)))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._send(batch)
+            except BaseException as e:
+                # never leave callers waiting on futures nobody will resolve
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                if not isinstance(e, Exception):
+                    raise
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="CallBatcher(%s)" % self.batch_method)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop accepting calls and send everything still queued"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
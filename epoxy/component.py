@@ -5,8 +5,10 @@
 # Copyright (c) 2014 Etherios, Inc. All rights reserved.
 # Etherios, Inc. is a Division of Digi International.
 
-from epoxy.settings import BaseSetting, ListSetting
+from epoxy.settings import BaseSetting, ListSetting, StringSetting
+import copy
 import six
+import threading
 
 
 class BaseDependency(object):
@@ -142,8 +144,12 @@ class Component(object):
                 dep_inst = dependency.bound_instance(match)
             dependencies_settings_lookup[key] = dep_inst
 
-        # validate and set settings
+        # validate and set settings.  Each instance gets its own copy of
+        # the setting so that the value is never shared through the class
+        # (which would not be safe when instances of the same class are
+        # constructed concurrently).
         for key, setting in six.iteritems(cls._settings):
+            setting = copy.copy(setting)
             if key not in settings_matches:
                 if setting.required:
                     raise ValueError("'%s' is a required setting but was "
@@ -160,14 +166,32 @@ class Component(object):
                 obj = obj.get_value()
             setattr(instance, attr, obj)
         instance._launched = False
+        instance._launch_lock = threading.RLock()
         instance.__init__()
         return instance
 
     def launch(self):
-        """Start this component (but only do this once)"""
-        if not self._launched:
-            self._launched = True
-            self.start()
+        """Start this component (but only do this once)
+
+        If several threads launch the component at the same time, only one
+        of them will call :meth:`start`; the others wait for it to finish.
+
+        """
+        with self._launch_lock:
+            if not self._launched:
+                self._launched = True
+                self.start()
+
+    def __getstate__(self):
+        # the launch lock cannot be pickled (components are pickled when
+        # their methods are offloaded to a process pool)
+        state = self.__dict__.copy()
+        state.pop('_launch_lock', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._launch_lock = threading.RLock()
 
     def start(self):
         """Start this component (top-level start does nothing)"""
@@ -215,6 +239,120 @@ class ComponentList(Component):
     def get_list(self):
         return list(self)
 
+    # Fan-out
+
+    def broadcast(self, method, *args, **kwargs):
+        """Call ``method`` on every member concurrently
+
+        The positional and keyword arguments are passed on to each call.
+        The results are returned as a list in member order.  The following
+        keyword arguments are used by ``broadcast`` itself rather than being
+        passed on:
+
+        ``executor``
+          An executor (anything with a ``submit`` method, such as a
+          :class:`~epoxy.executors.ThreadPoolComponent`) used to make the
+          calls.  By default, a pool of threads is created for the call.
+        ``max_workers``
+          The size of the pool created when no ``executor`` is given
+          (defaults to one thread per member).
+        ``timeout``
+          Seconds to wait for all the calls to finish.
+        ``return_exceptions``
+          If false (the default), the first exception raised by a member is
+          raised as soon as it happens and calls which have not yet begun
+          are cancelled.  If true, every call is waited for and exceptions
+          take the place of results in the returned list (calls which did
+          not finish within ``timeout`` get a
+          :class:`concurrent.futures.TimeoutError`).
+
+        """
+        from concurrent import futures
+        executor = kwargs.pop('executor', None)
+        max_workers = kwargs.pop('max_workers', None)
+        timeout = kwargs.pop('timeout', None)
+        return_exceptions = kwargs.pop('return_exceptions', False)
+
+        calls = [getattr(component, method) for component in self]
+        if not calls:
+            return []
+        pool = None
+        if executor is None:
+            pool = executor = futures.ThreadPoolExecutor(
+                max_workers=min(max_workers or len(calls), len(calls)))
+        try:
+            pending = [executor.submit(call, *args, **kwargs)
+                       for call in calls]
+            done, not_done = futures.wait(
+                pending, timeout,
+                futures.ALL_COMPLETED if return_exceptions
+                else futures.FIRST_EXCEPTION)
+            if not return_exceptions:
+                for future in pending:
+                    if future in done and future.exception() is not None:
+                        for other in not_done:
+                            other.cancel()
+                        raise future.exception()
+                if not_done:
+                    for other in not_done:
+                        other.cancel()
+                    raise futures.TimeoutError(
+                        "%d of %d calls to '%s' did not finish within %s "
+                        "seconds" % (len(not_done), len(pending), method,
+                                     timeout))
+                return [future.result() for future in pending]
+
+            results = []
+            for future in pending:
+                if future in not_done:
+                    future.cancel()
+                    results.append(futures.TimeoutError(
+                        "call to '%s' did not finish within %s seconds"
+                        % (method, timeout)))
+                elif future.exception() is not None:
+                    results.append(future.exception())
+                else:
+                    results.append(future.result())
+            return results
+        finally:
+            if pool is not None:
+                # don't wait for calls which timed out
+                pool.shutdown(wait=False)
+
+    def broadcast_async(self, method, *args, **kwargs):
+        """Call ``method`` on every member from an asyncio event loop
+
+        This returns an awaitable for the list of results (in member order).
+        Members whose ``method`` is a coroutine function are awaited
+        directly; other methods are run in the loop's default executor so
+        that they don't block the loop.  ``timeout`` and
+        ``return_exceptions`` behave as for :meth:`broadcast`, except that
+        :class:`asyncio.TimeoutError` is raised if the calls take too long.
+
+        This should be called with the event loop running the calls as the
+        current loop (typically from a coroutine).  It is only available on
+        Python 3.
+
+        """
+        import asyncio
+        import functools
+        timeout = kwargs.pop('timeout', None)
+        return_exceptions = kwargs.pop('return_exceptions', False)
+
+        loop = asyncio.get_event_loop()
+        calls = []
+        for component in self:
+            call = getattr(component, method)
+            if asyncio.iscoroutinefunction(call):
+                calls.append(call(*args, **kwargs))
+            else:
+                calls.append(loop.run_in_executor(
+                    None, functools.partial(call, *args, **kwargs)))
+        gathered = asyncio.gather(*calls, return_exceptions=return_exceptions)
+        if timeout is not None:
+            return asyncio.wait_for(gathered, timeout)
+        return gathered
+
     @classmethod
     def from_dependencies(cls, **kwargs):
         kwargs = dict(kwargs)
@@ -230,5 +368,74 @@ class ComponentList(Component):
                              ' ComponentList' % ', '.join(kwargs.keys()))
         instance = cls(component_list)
         instance._launched = False
+        instance._launch_lock = threading.RLock()
         return instance
 
+
+class LazyComponentList(ComponentList):
+    """A list of components which are built when first accessed
+
+    This is used in place of :class:`ComponentList` for dependency lists
+    configured with ``lazy: true``.  Each member is instantiated and
+    started (along with any of its dependencies which have not been) by
+    the component manager the first time it is accessed, by index or by
+    iterating over the list.
+
+    """
+    component_manager = Dependency()
+    dependency_list = ListSetting()
+    list_name = StringSetting()
+
+    def __init__(self):
+        self._components = [None] * len(self.dependency_list)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dependencies(cls, **kwargs):
+        return super(ComponentList, cls).from_dependencies(**kwargs)
+
+    def _get(self, index):
+        component = self._components[index]
+        if component is None:
+            # launched without holding the lock, as the member (or its
+            # dependencies) may use this list while starting
+            manager = self.component_manager
+            name = self.dependency_list[index]
+            instance = manager.launch_component(name)
+            with self._lock:
+                component = self._components[index]
+                if component is None:
+                    component = manager.adapt_dependency(self.list_name,
+                                                         name, instance)
+                    self._components[index] = component
+        return component
+
+    def is_materialized(self, index):
+        """Return True if the member at ``index`` has been built"""
+        return self._components[index] is not None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+        return self._get(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._get(index)
+
+    def __reversed__(self):
+        for index in reversed(range(len(self))):
+            yield self._get(index)
+
+    def index(self, value):
+        for index, component in enumerate(self):
+            if component == value:
+                return index
+        raise ValueError("%r is not in list" % (value,))
+
+    def count(self, value):
+        return sum(1 for component in self if component == value)
@@ -12,28 +12,63 @@ of a few very basic types.  Classes in this module provide some different
 methods for loading such a configuration from different resources.
 
 """
+import glob
+import json
+import marshal
 import os
 import six
+import sys
 from epoxy.utils import load_module
 
+# header for compiled configuration files; marshal is not stable across
+# Python versions so the version is part of the header
+MARSHAL_HEADER = ("EPOXY%d%d\n" % sys.version_info[:2]).encode('ascii')
 
-class YamlConfigurationLoader(object):
-    """Load configuration from a yaml file"""
+# keys of a layer which are resolved while loading rather than merged
+_DIRECTIVES = ('extends', 'include')
 
-    def __init__(self, base_file):
-        import yaml
-        self.yaml = yaml
+
+class FileConfigurationLoader(object):
+    """Base class for loaders that read configuration layers from files
+
+    Each file is a layer which may list other files (relative to itself) in
+    an ``extends`` directive.  Those parent layers are loaded first and
+    merged in order; components defined in a layer replace components of
+    the same name defined by the layers it extends, as do any other
+    top-level keys.
+
+    A layer may also list glob patterns (relative to itself, ``**`` matches
+    any number of directories) in an ``include`` directive.  The matched
+    files are fragments which only contribute ``components``; they are
+    parsed concurrently using ``include_workers`` threads (or processes,
+    if ``include_executor`` is ``"process"``) and merged in sorted path
+    order after the extended layers but before the including layer's own
+    components.  Two fragments defining the same component is an error.
+
+    Threads only overlap reading the fragments; parsing holds the GIL, so
+    with PyYAML (which parses in pure Python) thread mode gives no speedup
+    and ``include_executor="process"`` should be used for large numbers of
+    fragments.  Threads are the default as starting processes costs more
+    than parsing a few small fragments.
+
+    Subclasses only need to implement ``_load_from_filename``.
+
+    """
+
+    def __init__(self, base_file, include_workers=None,
+                 include_executor="thread"):
+        if include_executor not in ("thread", "process"):
+            raise ValueError("include_executor must be 'thread' or "
+                             "'process', not %r" % (include_executor,))
         self.base_file = base_file
+        self.include_workers = include_workers
+        self.include_executor = include_executor
 
     def _load_from_filename(self, filename):
-        f = open(filename, "rb")
-        try:
-            res = self.yaml.load(f)
-        finally:
-            f.close()
-        return res
+        raise NotImplementedError("_load_from_filename is abstract and "
+                                  "should be overriden")
 
-    def _merge_yaml(self, config1, config2):
+    def _merge(self, config1, config2):
         config1_components = config1.get('components', {})
         config2_components = config2.get('components', {})
         for key, value in six.iteritems(config2_components):
@@ -44,22 +79,213 @@ class YamlConfigurationLoader(object):
         config1['components'] = config1_components
         return config1
 
-    def _load_from_yaml_helper(self, root_yaml):
-        yaml_this_layer = self._load_from_filename(root_yaml)
-        root_yaml_directory = os.path.dirname(root_yaml)
+    def _load_layers(self, root_file):
+        layer = self._load_from_filename(root_file)
+        root_directory = os.path.dirname(root_file)
         unified_config = {}
-        for extension_file in yaml_this_layer.get('extends', []):
-            extension_path = os.path.join(root_yaml_directory, extension_file)
-            parent_layer = self._load_from_yaml_helper(extension_path)
-            self._merge_yaml(unified_config, parent_layer)
-        self._merge_yaml(unified_config, yaml_this_layer)
+        for extension_file in layer.get('extends', []):
+            extension_path = os.path.join(root_directory, extension_file)
+            parent_layer = self._load_layers(extension_path)
+            self._merge(unified_config, parent_layer)
+        patterns = layer.get('include', [])
+        if patterns:
+            self._merge(unified_config,
+                        self._load_includes(root_directory, patterns))
+        self._merge(unified_config, dict(
+            (key, value) for key, value in layer.items()
+            if key not in _DIRECTIVES))
         return unified_config
 
+    def _find_includes(self, root_directory, patterns):
+        filenames = []
+        seen = set()
+        for pattern in patterns:
+            pattern = os.path.join(root_directory, pattern)
+            try:
+                matches = glob.glob(pattern, recursive=True)
+            except TypeError:  # no recursive globbing before Python 3.5
+                matches = glob.glob(pattern)
+            for filename in sorted(matches):
+                if filename not in seen:
+                    seen.add(filename)
+                    filenames.append(filename)
+        return filenames
+
+    def _load_includes(self, root_directory, patterns):
+        filenames = self._find_includes(root_directory, patterns)
+        if len(filenames) > 1:
+            from concurrent import futures
+            if self.include_executor == "process":
+                executor_class = futures.ProcessPoolExecutor
+            else:
+                executor_class = futures.ThreadPoolExecutor
+            max_workers = self.include_workers or min(32, len(filenames))
+            executor = executor_class(max_workers=max_workers)
+            try:
+                fragments = list(executor.map(self._load_from_filename,
+                                              filenames))
+            finally:
+                executor.shutdown()
+        else:
+            fragments = [self._load_from_filename(f) for f in filenames]
+
+        components = {}
+        sources = {}
+        for filename, fragment in zip(filenames, fragments):
+            fragment_components = (fragment or {}).get('components') or {}
+            for key, value in six.iteritems(fragment_components):
+                if key in components:
+                    raise ValueError(
+                        "Component '%s' is defined in both '%s' and '%s'"
+                        % (key, sources[key], filename))
+                components[key] = value
+                sources[key] = filename
+        return {'components': components}
+
     def load_configuration(self):
-        data = self._load_from_yaml_helper(self.base_file)
+        data = self._load_layers(self.base_file)
         return data
 
 
+_yaml_loader = None
+
+
+def _get_yaml_loader(yaml):
+    # A yaml Loader which understands the !file tag:
+    #
+    #   routes: !file tables/routes.json
+    #   table: !file {file: tables/table.bin, format: array, typecode: d}
+    #
+    # Either form becomes a {file: <path>, ...} dictionary, with the path
+    # made relative to the yaml file, for use with FileSetting.
+    global _yaml_loader
+    if _yaml_loader is None:
+        class EpoxyYamlLoader(yaml.Loader):
+            pass
+
+        def construct_file(loader, node):
+            if isinstance(node, yaml.MappingNode):
+                value = loader.construct_mapping(node)
+            else:
+                value = {'file': loader.construct_scalar(node)}
+            if os.path.isfile(loader.name):
+                value['file'] = os.path.join(os.path.dirname(loader.name),
+                                             value['file'])
+            return value
+        EpoxyYamlLoader.add_constructor('!file', construct_file)
+        _yaml_loader = EpoxyYamlLoader
+    return _yaml_loader
+
+
+class YamlConfigurationLoader(FileConfigurationLoader):
+    """Load configuration from a yaml file
+
+    Settings may refer to other files with the ``!file`` tag, which is
+    loaded as a ``{file: <path>}`` dictionary (with the path relative to
+    the yaml file) for use with :class:`~epoxy.settings.FileSetting`.
+
+    """
+
+    def __init__(self, base_file, **kwargs):
+        import yaml
+        FileConfigurationLoader.__init__(self, base_file, **kwargs)
+        self.yaml = yaml
+
+    def __getstate__(self):
+        # modules cannot be pickled (needed for process based includes)
+        state = self.__dict__.copy()
+        del state['yaml']
+        return state
+
+    def __setstate__(self, state):
+        import yaml
+        self.__dict__.update(state)
+        self.yaml = yaml
+
+    def _load_from_filename(self, filename):
+        f = open(filename, "rb")
+        try:
+            res = self.yaml.load(f, Loader=_get_yaml_loader(self.yaml))
+        finally:
+            f.close()
+        return res
+
+
+class JsonConfigurationLoader(FileConfigurationLoader):
+    """Load configuration from a json file"""
+
+    def _load_from_filename(self, filename):
+        f = open(filename, "r")
+        try:
+            res = json.load(f)
+        finally:
+            f.close()
+        return res
+
+
+class MarshalConfigurationLoader(FileConfigurationLoader):
+    """Load configuration from a compact binary (marshal) file
+
+    The format is the one written by :func:`compile_configuration`; it is
+    much faster to load than yaml but is specific to the version of Python
+    that wrote it.  Files written by another version are rejected with a
+    ValueError and should be recompiled.
+
+    """
+
+    def _load_from_filename(self, filename):
+        f = open(filename, "rb")
+        try:
+            header = f.read(len(MARSHAL_HEADER))
+            if header != MARSHAL_HEADER:
+                raise ValueError("'%s' is not a compiled epoxy configuration "
+                                 "for this version of Python" % filename)
+            res = marshal.load(f)
+        finally:
+            f.close()
+        return res
+
+
+def load_configuration_file(path):
+    """Load the configuration in ``path``, choosing a loader by extension
+
+    ``.json`` files are loaded as json, ``.epoxyc`` files as compiled
+    configuration and anything else as yaml.
+
+    """
+    extension = os.path.splitext(path)[1]
+    if extension == '.json':
+        loader = JsonConfigurationLoader(path)
+    elif extension == '.epoxyc':
+        loader = MarshalConfigurationLoader(path)
+    else:
+        loader = YamlConfigurationLoader(path)
+    return loader.load_configuration()
+
+
+def compile_configuration(loader, destination):
+    """Write the configuration from ``loader`` to a binary file
+
+    All layers are merged before writing, so the resulting file stands on
+    its own and can be loaded with :class:`MarshalConfigurationLoader`.
+    This allows configuration to be edited as yaml while a prebuilt
+    artifact is used in production.  Only basic types (dicts, lists,
+    strings, numbers, booleans and None) may be present in the
+    configuration.
+
+    """
+    data = loader.load_configuration()
+    for key in _DIRECTIVES:
+        data.pop(key, None)
+    f = open(destination, "wb")
+    try:
+        f.write(MARSHAL_HEADER)
+        marshal.dump(data, f)
+    finally:
+        f.close()
+    return data
+
+
 class PythonLoader(object):
     """Given a path in the form <path.to.module:variable_name> load config"""
 
@@ -71,3 +297,20 @@ class PythonLoader(object):
     def load_configuration(self):
         module = load_module(self.module_path)
         return getattr(module, self.variable_name)
+
+
+def main(argv=None):
+    """Compile a yaml configuration: ``python -m epoxy.configuration``"""
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Compile a yaml epoxy configuration (and any files it "
+                    "extends) into a single binary file")
+    parser.add_argument("source", help="yaml configuration file")
+    parser.add_argument("destination", help="compiled file to write")
+    args = parser.parse_args(argv)
+    compile_configuration(YamlConfigurationLoader(args.source),
+                          args.destination)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,10 +15,33 @@ you wish to override this behavior, you could by setting
 `epoxy.core.log = my_logging_function`.
 
 """
+from array import array
 from collections import OrderedDict
 from epoxy.component import Component
-from epoxy.utils import load_module
+from epoxy.events import LifecycleEvent
+from epoxy.proxies import CachingProxy, CallStatistics, CircuitBreaker, \
+    GuardedProxy, InstrumentedProxy, MemoizationCache, SwappableHandle
+from epoxy.registry import resolve_class_path
+from epoxy.scheduling import LaunchHistory, launch_scheduled
+from epoxy.snapshots import SnapshotStore, snapshot_key, supports_snapshots
+from epoxy.utils import load_module, timer
+import copy
+import errno
+import heapq
+import os
+import signal
 import six
+import sys
+import threading
+import time
+
+# how often launch_forked checks for exited workers and termination
+_SUPERVISE_INTERVAL = 0.05
+
+# delays before respawning a worker which exited abnormally soon after it
+# was forked, doubling for each consecutive failure
+_RESPAWN_DELAY_MIN = 0.1
+_RESPAWN_DELAY_MAX = 30.0
 
 
 def _default_log(text, *args):
@@ -30,66 +53,302 @@ def _default_log(text, *args):
 log = _default_log
 
 
+def _map_concurrently(function, items):
+    """Call ``function`` on each item in its own thread, returning results"""
+    if len(items) < 2:
+        return [function(item) for item in items]
+    from concurrent import futures
+    executor = futures.ThreadPoolExecutor(max_workers=len(items))
+    try:
+        return list(executor.map(function, items))
+    finally:
+        executor.shutdown()
+
+
+def _replica_settings(settings, index):
+    """Copy ``settings``, substituting ``{index}`` in any strings"""
+    if isinstance(settings, six.string_types):
+        return settings.replace('{index}', str(index))
+    elif isinstance(settings, dict):
+        return dict((key, _replica_settings(value, index))
+                    for key, value in six.iteritems(settings))
+    elif isinstance(settings, list):
+        return [_replica_settings(value, index) for value in settings]
+    return copy.deepcopy(settings)
+
+
 class ComponentReference(object):
     """Represent data and operations about a reference to a component.
 
     This is an intermediate step, used internally, from the conversion
     of data *about* a `Component` into a fully instantiated `Component`
-    instance.
+    instance.  Graphs may contain a large number of references, so
+    instances use ``__slots__`` rather than a per-instance ``__dict__``.
 
     """
 
+    __slots__ = ('name', 'class_path', 'dependencies', 'settings',
+                 'priority', 'options', 'edge_options', 'index', 'replica_set',
+                 '_instance', '_lock')
+
+    # keys of the configuration data which are not stored in ``options``
+    config_keys = frozenset(['class', 'dependencies', 'settings', 'priority',
+                             'replicas'])
+
     @classmethod
     def from_config_data(cls, name, config_data):
         class_path = config_data['class']
-        dependencies = config_data.get('dependencies', {})
+        # copied, as graph building rewrites some dependency values
+        dependencies = dict(config_data.get('dependencies', {}))
         settings = config_data.get('settings', {})
         priority = config_data.get('priority', 10)
-        return cls(name, class_path, dependencies, settings, priority)
+        options = dict((key, value)
+                       for key, value in six.iteritems(config_data)
+                       if key not in cls.config_keys)
+        return cls(name, class_path, dependencies, settings, priority,
+                   options or None)
 
-    def __init__(self, name, class_path, dependencies, settings, priority):
+    def __init__(self, name, class_path, dependencies, settings, priority,
+                 options=None):
         self.name = name
         self.class_path = class_path
         self.dependencies = dependencies
         self.settings = settings
         self.priority = priority
+        self.options = options  # any other keys from the configuration
+        self.edge_options = None  # dependency key -> options for that edge
+        self.index = None  # position within the owning ComponentGraph
+        self.replica_set = None  # all replicas, if this is one of them
         self._instance = None
+        self._lock = threading.RLock()
 
     def get_instance(self, graph):
-        """Instantiate into a `Component` instance."""
-        if self._instance is None:
+        """Instantiate into a `Component` instance.
 
-            construction_kwargs = {}
-            for dep_key, dep_val in six.iteritems(self.dependencies):
-                construction_kwargs[dep_key] = \
-                    graph.nodes[dep_val].get_instance(graph)
-            construction_kwargs.update(self.settings)
-            module_path, class_name = self.class_path.split(':', 1)
-            module = load_module(module_path)
-            try:
-                class_ref = getattr(module, class_name)
-            except AttributeError:
-                log("Class path '%s' is invalid, check your epoxy config" % self.class_path)
-                raise
-            self._instance = class_ref.from_dependencies(**construction_kwargs)
+        This is safe to call from several threads at once; the component
+        will only ever be instantiated once.  Each reference has its own
+        lock, so threads building unrelated components do not wait on
+        each other.
 
+        """
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._build_instance(graph)
         return self._instance
 
+    def _build_instance(self, graph):
+        construction_kwargs = {}
+        adapter = graph.dependency_adapter
+        for dep_key, dep_val in six.iteritems(self.dependencies):
+            target = graph.nodes[dep_val]
+            dep_instance = target.get_instance(graph)
+            if adapter is not None:
+                dep_instance = adapter(self, dep_key, target, dep_instance)
+            construction_kwargs[dep_key] = dep_instance
+        construction_kwargs.update(self.settings)
+        class_ref = self.load_class()
+        return class_ref.from_dependencies(**construction_kwargs)
+
+    def load_class(self):
+        """Import the module containing the component's class, returning it
+
+        A class path without a ``:`` is a short name registered by an
+        installed package (see :mod:`epoxy.registry`).
+
+        """
+        class_path = self.class_path
+        if ':' not in class_path:
+            try:
+                class_path = resolve_class_path(class_path)
+            except KeyError:
+                raise ValueError(
+                    ("Configuration error detected with component %s. "
+                     "No component is registered as '%s'")
+                    % (self.name, class_path))
+        module_path, class_name = class_path.split(':', 1)
+        module = load_module(module_path)
+        try:
+            return getattr(module, class_name)
+        except AttributeError:
+            log("Class path '%s' is invalid, check your epoxy config" % self.class_path)
+            raise
+
 
 class ComponentGraph(object):
-    """Encapsulate information/operations on a graph of Components"""
+    """Encapsulate information/operations on a graph of Components
+
+    Nodes are kept in insertion order and are addressed by integer index
+    internally.  The edges of the graph are stored as a compressed adjacency
+    structure: for the node at index ``i``, the indices of the nodes it
+    depends on are ``_edge_targets[_edge_offsets[i]:_edge_offsets[i + 1]]``.
+    This is considerably more compact than a set of reference tuples for
+    large graphs.
+
+    """
+
+    @classmethod
+    def _add_replicas(cls, component_nodes, component_key, component_value):
+        # A component with ``replicas: N`` becomes N nodes named
+        # ``<name>[<i>]`` plus a list-like node with the original name which
+        # dependents will receive.  Each replica gets its own copy of the
+        # settings with ``{index}`` substituted in any strings.
+        replicas = int(component_value['replicas'])
+        if replicas < 1:
+            raise ValueError("Configuration error detected with component "
+                             "%s.  replicas must be at least 1"
+                             % component_key)
+        replica_names = []
+        replica_set = []
+        for index in range(replicas):
+            replica_name = '%s[%d]' % (component_key, index)
+            replica_config = dict(component_value)
+            replica_config['dependencies'] = \
+                dict(component_value.get('dependencies', {}))
+            replica_config['settings'] = \
+                _replica_settings(component_value.get('settings', {}), index)
+            replica = ComponentReference.from_config_data(replica_name,
+                                                          replica_config)
+            replica.replica_set = replica_set
+            component_nodes[replica_name] = replica
+            replica_names.append(replica_name)
+            replica_set.append(replica)
+
+        component_nodes[component_key] = ComponentReference(
+            name=component_key,
+            class_path='epoxy.component:ComponentList',
+            dependencies=OrderedDict([(X, X) for X in replica_names]),
+            settings={'dependency_list': replica_names},
+            priority=component_value.get('priority', 10),
+            # only the replicas themselves are snapshotted
+            options=dict((key, value) for key, value
+                         in (replica_set[0].options or {}).items()
+                         if key != 'snapshot'))
+
+    @classmethod
+    def _add_remote(cls, component_nodes, component_key, component_value,
+                    components_data):
+        # A component with ``remote`` is replaced by a RemoteComponent
+        # which builds it (and its dependencies) in a child process from a
+        # copy of the configuration in which it is not remote.
+        if 'replicas' in component_value:
+            raise ValueError("Configuration error detected with component "
+                             "%s.  remote cannot be used with replicas"
+                             % component_key)
+        remote_options = component_value['remote']
+        if not isinstance(remote_options, dict):
+            remote_options = {}
+        local_value = dict((key, value)
+                           for key, value in six.iteritems(component_value)
+                           if key != 'remote')
+        components = dict((key, value)
+                          for key, value in six.iteritems(components_data)
+                          if key != 'component_manager')
+        components[component_key] = local_value
+        settings = dict(remote_options)
+        settings.update(component=component_key,
+                        configuration={'components': components})
+        local_reference = ComponentReference.from_config_data(component_key,
+                                                              local_value)
+        component_nodes[component_key] = ComponentReference(
+            name=component_key,
+            class_path='epoxy.remote:RemoteComponent',
+            dependencies={},
+            settings=settings,
+            priority=local_reference.priority,
+            options=local_reference.options)
+
+    @classmethod
+    def _add_adapter(cls, component_nodes, component_key, dep_name,
+                     dep_value, kind, class_path, dependencies, settings):
+        # Some dependency options are implemented by a component which is
+        # inserted between the component and its dependency.  The node for
+        # that component is named after the edge, and its name is returned
+        # to be used as the dependency instead.
+        for target in dependencies.values():
+            if not isinstance(target, six.string_types) or \
+                    target not in component_nodes:
+                raise ValueError(
+                  ("Configuration error detected with component %s. "
+                   "Dependency '%s' references '%s' which does not "
+                   "seem to exist or cannot be used with '%s'")
+                  % (component_key, dep_name, target, kind))
+        adapter_name = '__%s__%s__%s' % (kind, component_key, dep_name)
+        component_nodes[adapter_name] = ComponentReference(
+            name=adapter_name,
+            class_path=class_path,
+            dependencies=dependencies,
+            settings=dict(settings),
+            priority=10)
+        return adapter_name
+
+    @classmethod
+    def _add_edge_adapters(cls, component_nodes, component_key, dep_name,
+                           dep_value, edge_options):
+        # insert the adapters requested by the options of an edge,
+        # returning the name of the component to depend on instead
+        batch_options = edge_options.pop('batch', None)
+        if batch_options:
+            dep_value = cls._add_adapter(
+                component_nodes, component_key, dep_name,
+                dep_value, 'batch', 'epoxy.batching:CallBatcher',
+                {'target': dep_value}, batch_options)
+        offload_options = edge_options.pop('offload', None)
+        if offload_options:
+            if 'executor' not in offload_options:
+                raise ValueError(
+                  ("Configuration error detected with component "
+                   "%s. Dependency '%s' must name the executor "
+                   "to offload to") % (component_key, dep_name))
+            offload_settings = {}
+            if 'methods' in offload_options:
+                offload_settings['methods'] = offload_options['methods']
+            dep_value = cls._add_adapter(
+                component_nodes, component_key, dep_name,
+                dep_value, 'offload', 'epoxy.executors:OffloadAdapter',
+                {'target': dep_value,
+                 'executor': offload_options['executor']},
+                offload_settings)
+        return dep_value
 
     @classmethod
     def from_component_data(cls, components_data):
-        component_nodes = {}
+        component_nodes = OrderedDict()
         for component_key, component_value in six.iteritems(components_data):
+            if component_value.get('remote'):
+                cls._add_remote(component_nodes, component_key,
+                                component_value, components_data)
+                continue
+            if 'replicas' in component_value:
+                cls._add_replicas(component_nodes, component_key,
+                                  component_value)
+                continue
             component_nodes[component_key] = \
                 ComponentReference.from_config_data(component_key,
                                                     component_value)
 
-        component_edges = set({})
-        for component_key, component_node in list(dict(component_nodes).items()):
+        for component_key, component_node in list(component_nodes.items()):
             for dep_name, dep_value in list(component_node.dependencies.items()):
+                edge_options = {}
+                if isinstance(dep_value, dict):
+                    # The dependency is given in the long form, with
+                    # options for this edge of the graph:
+                    #   {component: <name or list>, <option>: <value>, ...}
+                    edge_options = dict(dep_value)
+                    if 'component' not in edge_options:
+                        raise ValueError(
+                          ("Configuration error detected with component %s. "
+                           "Dependency '%s' does not specify a component")
+                          % (component_key, dep_name))
+                    dep_value = edge_options.pop('component')
+                    dep_value = cls._add_edge_adapters(
+                        component_nodes, component_key, dep_name, dep_value,
+                        edge_options)
+                    component_node.dependencies[dep_name] = dep_value
+                    if component_node.edge_options is None:
+                        component_node.edge_options = {}
+                    component_node.edge_options[dep_name] = edge_options
+
                 if isinstance(dep_value, list):
                     # Value is a list here.  We want to create a simple
                     # list-like Component to provide access to these
@@ -97,21 +356,35 @@ class ComponentGraph(object):
                     dep_list = dep_value
                     dep_value = '__component_list__%s__%s' \
                         % (component_key, dep_name)
-                    # dependencies may not be instantiated yet;
-                    # we have to pass a list with the order of prereqs,
-                    # and a dict with the prereqs themselves.
-                    comp_ref = ComponentReference(
-                                name=dep_value,
-                                class_path='epoxy.component:ComponentList',
-                                dependencies=OrderedDict([(X, X)
-                                                          for X in dep_list]),
-                                settings={'dependency_list':dep_list},
-                                priority=10)
+                    if edge_options.pop('lazy', False):
+                        # members are built when first accessed, through
+                        # the component manager, so there are no edges
+                        # to them in the graph
+                        comp_ref = ComponentReference(
+                                    name=dep_value,
+                                    class_path='epoxy.component:'
+                                               'LazyComponentList',
+                                    dependencies={'component_manager':
+                                                  'component_manager'},
+                                    settings={'dependency_list': dep_list,
+                                              'list_name': dep_value},
+                                    priority=10)
+                    else:
+                        # dependencies may not be instantiated yet;
+                        # we have to pass a list with the order of prereqs,
+                        # and a dict with the prereqs themselves.
+                        comp_ref = ComponentReference(
+                                    name=dep_value,
+                                    class_path='epoxy.component:ComponentList',
+                                    dependencies=OrderedDict(
+                                        [(X, X) for X in dep_list]),
+                                    settings={'dependency_list':dep_list},
+                                    priority=10)
                     component_node.dependencies[dep_name] = dep_value
                     component_nodes[dep_value] = comp_ref
 
                     # Finally make sure everything in the dependency list
-                    # exists, and add an edge for it.
+                    # exists.
                     for dep_item in dep_list:
                         if dep_item not in component_nodes:
                             raise ValueError(
@@ -121,84 +394,205 @@ class ComponentGraph(object):
                                " which does not "
                                "seem to exist")
                                % (component_key, dep_name, dep_item))
-                        targeted_dep = component_nodes[dep_item]
-                        component_edges.add((comp_ref, targeted_dep))
 
                 elif dep_value not in component_nodes:
                     raise ValueError(
                       ("Configuration error detected with component %s. "
                        "Dependency '%s' references '%s' which does not "
                        "seem to exist") % (component_key, dep_name, dep_value))
-                targeted_dep = component_nodes[dep_value]
-                component_edges.add((component_node, targeted_dep))
 
-        return cls(component_nodes, component_edges)
+        return cls(component_nodes)
 
-    def __init__(self, nodes, edges):
+    def __init__(self, nodes, edges=None):
         self.nodes = nodes
-        self.edges = edges
+        self.references = list(nodes.values())
+        # optional callable(reference, dependency_key, target_reference,
+        # instance) returning the object to inject for that dependency
+        self.dependency_adapter = None
+        for index, reference in enumerate(self.references):
+            reference.index = index
+
+        if edges is None:
+            adjacency = [[self.nodes[dep_value].index
+                          for dep_value in reference.dependencies.values()]
+                         for reference in self.references]
+        else:
+            adjacency = [[] for _ in self.references]
+            for edge_st, edge_end in edges:
+                adjacency[edge_st.index].append(edge_end.index)
+
+        self._edge_offsets = array('l', [0])
+        self._edge_targets = array('l')
+        for targets in adjacency:
+            seen = set()
+            for target in targets:
+                if target not in seen:
+                    seen.add(target)
+                    self._edge_targets.append(target)
+            self._edge_offsets.append(len(self._edge_targets))
+
+    @property
+    def edges(self):
+        """The set of ``(depender, dependency)`` reference pairs"""
+        references = self.references
+        return set((reference, references[target])
+                   for reference in references
+                   for target in self._dependency_indices(reference.index))
+
+    def _dependency_indices(self, index):
+        return self._edge_targets[self._edge_offsets[index]:
+                                  self._edge_offsets[index + 1]]
 
     def _get_full_ordering(self):
-        component_nodes = self.nodes.copy()
-        component_edges = self.edges.copy()
+        # Kahn's algorithm; among the nodes that are ready, the one with
+        # the lowest (priority, declaration order) is always taken next.
+        references = self.references
+        unresolved = array('l', [0] * len(references))
+        dependers = [[] for _ in references]
+        for reference in references:
+            for target in self._dependency_indices(reference.index):
+                unresolved[reference.index] += 1
+                dependers[target].append(reference.index)
+
+        ready = [(reference.priority, reference.index)
+                 for reference in references
+                 if unresolved[reference.index] == 0]
+        heapq.heapify(ready)
 
         instantiation_ordering = []
-        remaining_nodes = sorted(component_nodes.values(),
-                                 key=lambda x: x.priority)
-        previous_remaining_nodes = -1
-        while True:
-            if len(remaining_nodes) == 0:
-                break  # we are done
-            elif previous_remaining_nodes == len(remaining_nodes):
-                raise ValueError(
-                    ("Graph processing not making any additional "
-                     "progress (likely due to a cycle in the graph).  The edges "
-                     "remaining in the graph are as follows: %s" %
-                     " ".join(["%s -> %s" % (a.name, b.name)
-                               for a, b in component_edges])))
-            else:
-                previous_remaining_nodes = len(remaining_nodes)
-
-            # find a node that has no unresolved dependencies
-            dependers = set(x[0] for x in component_edges)
-            for node in list(remaining_nodes):
-                if node not in dependers:
-                    instantiation_ordering.append(node)
-                    remaining_nodes.remove(node)
-                    for edge_st, edge_end in component_edges.copy():
-                        if edge_end == node:
-                            component_edges.remove((edge_st, edge_end))
-                    break
+        while ready:
+            _, index = heapq.heappop(ready)
+            instantiation_ordering.append(references[index])
+            for depender in dependers[index]:
+                unresolved[depender] -= 1
+                if unresolved[depender] == 0:
+                    heapq.heappush(ready, (references[depender].priority,
+                                           depender))
+
+        if len(instantiation_ordering) != len(references):
+            emitted = set(x.index for x in instantiation_ordering)
+            raise ValueError(
+                ("Graph processing not making any additional "
+                 "progress (likely due to a cycle in the graph).  The edges "
+                 "remaining in the graph are as follows: %s" %
+                 " ".join(["%s -> %s" % (reference.name,
+                                         references[target].name)
+                           for reference in references
+                           for target in self._dependency_indices(
+                               reference.index)
+                           if target not in emitted])))
 
         return instantiation_ordering
 
-    def _get_targetted_ordering(self, target_component, ancestors=()):
+    def _get_targetted_ordering(self, target_component):
         # Get an order of dependencies ending at the specified target
         #
-        # This is basically a tree traversal problem where we do a preorder
-        # traversal of the dependencies from our target adding nodes on
-        # the peripheral to the instantiation ordering.  As such,
-        # this method does use recursion
+        # This is a depth first traversal of the dependencies from our
+        # target, adding nodes to the instantiation ordering once all of
+        # their own dependencies have been added.  Nodes which are still
+        # being visited when they are reached again indicate a cycle.
+        references = self.references
+        visiting, visited = 1, 2
+        state = bytearray(len(references))
         instantiation_ordering = []
-        target_component_ref = self.nodes[target_component]
-        for dependency in target_component_ref.dependencies.values():
-            # check for cycles (makes runtime quadratic)
-            if dependency in ancestors:
-                raise ValueError(
-                    "A cycle was detected in the subgraph selected "
-                    "for building a component ordering.")
-
-            # recurse on all dependencies but do a filter to ensure that
-            # we do not add the same node twice
-            subgraph = self._get_targetted_ordering(dependency,
-                                list(ancestors) + [target_component])
-            for el in subgraph:
-                if el not in instantiation_ordering:
-                    instantiation_ordering.append(el)
-
-        instantiation_ordering.append(target_component_ref)
+
+        def visit(index):
+            state[index] = visiting
+            for dependency in self._dependency_indices(index):
+                if state[dependency] == visiting:
+                    raise ValueError(
+                        "A cycle was detected in the subgraph selected "
+                        "for building a component ordering.")
+                elif state[dependency] != visited:
+                    visit(dependency)
+            state[index] = visited
+            instantiation_ordering.append(references[index])
+
+        visit(self.nodes[target_component].index)
         return instantiation_ordering
 
+    @staticmethod
+    def _remote_dependencies(reference):
+        # the names of the components which a remote component depends on
+        # in its child process
+        settings = reference.settings
+        local_value = \
+            settings['configuration']['components'][settings['component']]
+        names = []
+        for dep_value in local_value.get('dependencies', {}).values():
+            if isinstance(dep_value, dict):
+                dep_value = dep_value.get('component')
+            if isinstance(dep_value, list):
+                names.extend(dep_value)
+            elif dep_value is not None:
+                names.append(dep_value)
+        return names
+
+    def get_deferred(self, pruned=()):
+        """Get the set of names of components only needed by lazy lists
+
+        Members of lazy dependency lists are built on first access rather
+        than when the graph is launched, unless something else needs them
+        (or they have no dependers at all).  The same applies to any
+        components which are only needed by deferred components, or only
+        by remote components (which build their own copies in their child
+        processes).  The names of components which will not be launched at
+        all may be given as ``pruned``; they do not count as needing
+        anything.
+
+        """
+        references = self.references
+        lazily_referenced = set()
+        dependers = [[] for _ in references]
+        for reference in references:
+            if reference.name in pruned:
+                continue
+            if reference.class_path == 'epoxy.component:LazyComponentList':
+                for name in reference.settings['dependency_list']:
+                    lazily_referenced.add(self.nodes[name].index)
+            elif reference.class_path == 'epoxy.remote:RemoteComponent':
+                for name in self._remote_dependencies(reference):
+                    if name in self.nodes:
+                        lazily_referenced.add(self.nodes[name].index)
+            for target in self._dependency_indices(reference.index):
+                dependers[target].append(reference.index)
+        if not lazily_referenced:
+            return set()
+
+        # dependers come after their dependencies in the full ordering, so
+        # going backwards they are always decided first
+        deferred = set()
+        for reference in reversed(self._get_full_ordering()):
+            index = reference.index
+            if (index in lazily_referenced or dependers[index]) and \
+                    all(x in deferred for x in dependers[index]):
+                deferred.add(index)
+        return set(references[index].name for index in deferred)
+
+    def get_reachable(self, roots):
+        """Get the set of names of components needed by any of ``roots``
+
+        This includes the ``roots`` themselves, everything they depend on
+        (directly or not), and the members of any lazy dependency lists
+        among those, which may be built later.
+
+        """
+        references = self.references
+        reachable = bytearray(len(references))
+        stack = [self.nodes[name].index for name in roots]
+        while stack:
+            index = stack.pop()
+            if reachable[index]:
+                continue
+            reachable[index] = 1
+            reference = references[index]
+            stack.extend(self._dependency_indices(index))
+            if reference.class_path == 'epoxy.component:LazyComponentList':
+                stack.extend(self.nodes[name].index
+                             for name in reference.settings['dependency_list'])
+        return set(reference.name for reference in references
+                   if reachable[reference.index])
+
     def get_ordering(self, target_component=None):
         """Get an ordering of nodes in dependency-order (all should be met)
 
@@ -214,23 +608,593 @@ class ComponentGraph(object):
             return self._get_full_ordering()
 
 
+class GraphTemplate(object):
+    """A compiled configuration from which many managers can be built
+
+    Building a :class:`ComponentManager` from configuration data means
+    building and validating the component graph, ordering it and importing
+    every component's class.  When many near-identical managers are needed
+    (one for each tenant of a service, for instance) all of that can be
+    done once::
+
+        template = GraphTemplate.compile(config)
+        shared = template.launch()
+        tenant = template.launch(settings={'db': {'schema': 'tenant42'}},
+                                 parent=shared)
+
+    after which each :meth:`launch` (or :meth:`instantiate`) only
+    constructs (and starts) the components.  ``settings`` overlays the
+    settings of the named components for that manager only.  Components
+    configured with ``share: singleton`` are taken from the ``parent``
+    manager, if one is given, rather than being built again, as are any
+    components only needed by them; they are left to the parent to stop.
+
+    The template is not modified by instantiating it.  Setting values from
+    the configuration are shared between all the managers built from it
+    (as they are between replicas) and so must not be modified.  Lazy
+    dependency lists are not supported.
+
+    """
+
+    def __init__(self, graph):
+        references = graph.references
+        for reference in references:
+            if reference.class_path == 'epoxy.component:LazyComponentList':
+                raise ValueError("Lazy dependency lists cannot be used in a "
+                                 "GraphTemplate (used by component %s)"
+                                 % reference.name.split('__')[2])
+        ordering = graph.get_ordering()
+        self.names = tuple(reference.name for reference in references)
+        self._references = tuple(references)
+        self._manager_index = graph.nodes['component_manager'].index
+        # the class, dependencies (key, target index, whether the edge has
+        # options needing ComponentManager._adapt_dependency) and settings
+        # of each node
+        def needs_adapter(reference, dep_key, target):
+            options = dict(target.options or {})
+            options.update((reference.edge_options or {}).get(dep_key) or {})
+            return any(options.get(x)
+                       for x in ('cache', 'guard', 'instrument', 'swappable'))
+        self._classes = tuple(None if reference.index == self._manager_index
+                              else reference.load_class()
+                              for reference in references)
+        self._dependencies = tuple(
+            tuple((dep_key, graph.nodes[dep_value].index,
+                   needs_adapter(reference, dep_key, graph.nodes[dep_value]))
+                  for dep_key, dep_value in six.iteritems(
+                      reference.dependencies))
+            for reference in references)
+        self._settings = tuple(reference.settings for reference in references)
+
+        # components shared from a parent, and those only they depend on
+        singletons = set(reference.index for reference in references
+                         if (reference.options or {}).get('share') ==
+                         'singleton')
+        dependers = [[] for _ in references]
+        for reference in references:
+            for target in graph._dependency_indices(reference.index):
+                dependers[target].append(reference.index)
+        shared = set()
+        for reference in reversed(ordering):
+            index = reference.index
+            if index in singletons or (
+                    dependers[index] and
+                    all(x in shared for x in dependers[index])):
+                shared.add(index)
+        shared.discard(self._manager_index)
+        self._singletons = frozenset(singletons)
+        self._ordering = tuple(reference.index for reference in ordering)
+        self._tenant_ordering = tuple(
+            index for index in self._ordering
+            if index not in shared or index in singletons)
+
+    @classmethod
+    def compile(cls, data):
+        """Compile a template from configuration data"""
+        components = dict(data.get('components', {}))
+        components['component_manager'] = {
+            "class": "epoxy.core:ComponentManager"
+        }
+        return cls(ComponentGraph.from_component_data(components))
+
+    def instantiate(self, settings=None, parent=None):
+        """Build a new manager with all components constructed
+
+        The components are not started (see :meth:`launch`).
+
+        """
+        manager = ComponentManager()
+        self._instantiate_into(manager, settings or {}, parent)
+        return manager
+
+    def launch(self, settings=None, parent=None):
+        """Build a new manager, constructing and starting all components
+
+        Components taken from ``parent`` are not started again (or stopped
+        when the new manager is shut down).
+
+        """
+        manager = ComponentManager()
+        manager._start(self._instantiate_into(manager, settings or {},
+                                              parent))
+        return manager
+
+    def _instantiate_into(self, manager, settings, parent):
+        # construct the components for manager, returning (reference,
+        # component) pairs for those which it should start
+        for name in settings:
+            if name not in self.names:
+                raise ValueError("Settings given for unknown component '%s'"
+                                 % name)
+        references = self._references
+        instances = [None] * len(references)
+        instances[self._manager_index] = manager
+        ordering = self._ordering if parent is None else self._tenant_ordering
+        for index in ordering:
+            reference = references[index]
+            if index == self._manager_index:
+                continue
+            elif parent is not None and index in self._singletons:
+                instances[index] = parent.components[reference.name]
+                continue
+            kwargs = {}
+            for dep_key, target, adapt in self._dependencies[index]:
+                dependency = instances[target]
+                if adapt:
+                    dependency = manager._adapt_dependency(
+                        reference, dep_key, references[target], dependency)
+                kwargs[dep_key] = dependency
+            kwargs.update(self._settings[index])
+            overlay = settings.get(reference.name)
+            if overlay:
+                kwargs.update(overlay)
+            try:
+                instances[index] = \
+                    self._classes[index].from_dependencies(**kwargs)
+            except:
+                log("Error: Instantiating component %r", reference.name)
+                raise
+
+        for index in ordering:
+            manager.components[references[index].name] = instances[index]
+            manager.ordered_components.append(instances[index])
+        return [(references[index], instances[index]) for index in ordering
+                if parent is None or index not in self._singletons]
+
+
 class ComponentManager(Component):
     """Object responsible for object instantiation"""
 
-    def __init__(self):
+    def __init__(self, snapshot_directory=None):
         Component.__init__(self)
+        # where components configured with ``snapshot`` save their state
+        # (see epoxy.snapshots); None for the default location
+        self.snapshot_directory = snapshot_directory
+        # an epoxy.profiling.LaunchProfile, to measure launches
+        self._launch_profile = None
         self.components = {}
         self.ordered_components = []
         self.graph = None
         self._launched = False
+        self._launch_lock = threading.RLock()
+        self._graph_lock = threading.Lock()
+        self._components_lock = threading.Lock()
+        self._started_components = []  # (name, component) in start order
+        self._hooks = ()  # (hook, kinds) pairs; see add_hook()
+        self._workers = []
+        self._worker_statuses = {}
+        self._stopping_workers = False
+        self._call_statistics = []
+        self._caches = []
+        self._breakers = []
+        self._handles = {}  # name -> SwappableHandle, for swappable targets
         self._dependencies_settings_lookup = {}
+        # what was left out of the last pruned launch; see _prune()
+        self.prune_report = None
+        self.admin = None  # an epoxy.admin.AdminServer; see start_admin()
+        # durations recorded across launches, for scheduling them
+        self.launch_history = None
 
     def _load_graph(self, data, debug=0):
-        if not self.graph:
-            self.graph_built = True
-            if debug > 1:
-                log("Building graph of components...")
-            self.graph = self.build_component_graph(data)
+        graph = self.graph
+        if not graph:
+            with self._graph_lock:
+                graph = self.graph
+                if not graph:
+                    self.graph_built = True
+                    if debug > 1:
+                        log("Building graph of components...")
+                    graph = self._run_step('graph', None,
+                                           self.build_component_graph, data)
+                    # if the manager was compacted after an earlier launch,
+                    # make sure that the components which already exist
+                    # are reused
+                    with self._components_lock:
+                        for name, component in six.iteritems(self.components):
+                            if name in graph.nodes:
+                                graph.nodes[name]._instance = component
+                    self.graph = graph
+        return graph
+
+    def compact(self):
+        """Release the structures only needed while launching components
+
+        Once an application has been launched, the component graph (and
+        with it the raw configuration data referenced by each node) is no
+        longer required.  Calling this method drops the graph so that this
+        memory may be reclaimed; the runtime lookups (``components`` and
+        ``ordered_components``) are kept.
+
+        The graph is still needed, and so is kept, if it has lazy
+        dependency lists (whose members are launched from it on first
+        access) or swappable components (which :meth:`swap` rebuilds from
+        it).  Returns whether the graph was dropped.
+
+        If another subgraph or configuration is launched afterwards the
+        graph will be rebuilt from the provided data, reusing the
+        components that have already been instantiated.
+
+        """
+        graph = self.graph
+        if graph is not None and any(
+                reference.class_path == 'epoxy.component:LazyComponentList' or
+                (reference.options or {}).get('swappable')
+                for reference in graph.references):
+            return False
+        self.graph = None
+        return True
+
+    def _instantiate(self, graph, component_ordering, debug=0):
+        # Instantiate components in order, returning a list of
+        # (reference, component) pairs.  When the first replica of a
+        # replicated component is reached, all of its replicas are
+        # instantiated concurrently (they all have the same dependencies).
+        names = set(reference.name for reference in component_ordering)
+        instantiated = []
+        done = set()
+
+        def get_instance(reference):
+            try:
+                if not self._hooks or reference._instance is not None:
+                    return reference.get_instance(graph)
+                self._run_step('import', reference.name, reference.load_class)
+                return self._run_step('instantiate', reference.name,
+                                      reference.get_instance, graph)
+            except:
+                log("Error: Instantiating component %r", reference.name)
+                raise
+
+        for component_reference in component_ordering:
+            if component_reference.name in done:
+                continue
+            group = [component_reference]
+            if component_reference.replica_set:
+                group = [reference
+                         for reference in component_reference.replica_set
+                         if reference.name in names]
+            for reference, component in zip(
+                    group, self._map_group(get_instance, group)):
+                done.add(reference.name)
+                instantiated.append((reference, component))
+                if debug > 1:
+                    log("  Instantiated %s", reference.name)
+        return instantiated
+
+    def _start(self, instantiated, debug=0):
+        # Launch components in order; replicas are started concurrently
+        components = dict((reference.name, component)
+                          for reference, component in instantiated)
+        done = set()
+
+        def launch(reference):
+            component = components[reference.name]
+            if self._hooks and not component._launched and \
+                    component is not self:
+                self._run_step('start', reference.name, self._launch_instance,
+                               reference, component, debug)
+            else:
+                self._launch_instance(reference, component, debug)
+
+        for component_reference, component in instantiated:
+            if component_reference.name in done:
+                continue
+            group = [component_reference]
+            if component_reference.replica_set:
+                group = [reference
+                         for reference in component_reference.replica_set
+                         if reference.name in components]
+            self._map_group(launch, group)
+            for reference in group:
+                done.add(reference.name)
+                component = components[reference.name]
+                started = (reference.name, component)
+                with self._components_lock:
+                    if started not in self._started_components:
+                        self._started_components.append(started)
+                if debug > 2:
+                    log("  Started %r", component)
+
+    def add_hook(self, hook, kinds=None):
+        """Call ``hook`` with a LifecycleEvent before and after each step
+
+        ``kinds`` may list the kinds of event the hook is interested in (by
+        default, it is called for all of them).  See :mod:`epoxy.events`
+        for the kinds of event and what they carry.
+
+        """
+        kinds = frozenset(kinds) if kinds is not None else None
+        with self._components_lock:
+            self._hooks = self._hooks + ((hook, kinds),)
+
+    def remove_hook(self, hook):
+        """Stop calling a hook added with :meth:`add_hook`"""
+        with self._components_lock:
+            self._hooks = tuple(x for x in self._hooks if x[0] != hook)
+
+    def _dispatch(self, hooks, event):
+        for hook, kinds in hooks:
+            if kinds is None or event.kind in kinds:
+                try:
+                    hook(event)
+                except Exception as e:
+                    log("Error: Calling hook %r for %r: %s", hook, event, e)
+
+    def _run_step(self, kind, name, function, *args):
+        # Call function(*args), sending events to any hooks before and
+        # after.  This is on the launch path of every component, so it
+        # does as little as possible when there are no hooks.
+        hooks = self._hooks
+        if not hooks:
+            return function(*args)
+        self._dispatch(hooks, LifecycleEvent(kind, name))
+        start = timer()
+        try:
+            result = function(*args)
+        except Exception as e:
+            self._dispatch(hooks, LifecycleEvent(kind, name, True,
+                                                 timer() - start, e))
+            raise
+        self._dispatch(hooks, LifecycleEvent(kind, name, True,
+                                             timer() - start))
+        return result
+
+    def reload_component(self, name, debug=0):
+        """Reload a started component in place
+
+        The component's ``reload()`` method is called if it has one (to
+        re-read its data, for instance); otherwise it is stopped and then
+        started again.  Components depending on it keep the same instance.
+
+        """
+        with self._components_lock:
+            component = self.components[name]
+
+        def reload():
+            with component._launch_lock:
+                if hasattr(component, 'reload'):
+                    component.reload()
+                else:
+                    component.stop()
+                    component.start()
+        self._run_step('reload', name, reload)
+        if debug > 2:
+            log("  Reloaded %r", component)
+
+    def swap(self, name, settings=None, drain_timeout=30.0, debug=0):
+        """Replace a started component with a new instance
+
+        A new instance of the component is built (with its settings
+        updated from ``settings``) and started, while the current instance
+        carries on serving calls.  Components which depend on it receive
+        the new instance in place of the old one, as a component must be
+        configured with ``swappable: true`` to be swapped and its
+        dependents then hold a handle rather than the instance itself.  The
+        new instance is started like any other (from a snapshot, if the
+        component has the ``snapshot`` option).  The old instance is
+        stopped once the calls in progress on it have finished, or after
+        ``drain_timeout`` seconds.  The call statistics, caches and circuit
+        breakers of the old instance's dependencies are replaced by those of
+        the new instance.
+
+        If the new instance fails to build or start, the exception is
+        raised and the old instance is left in place.  Returns the new
+        instance.
+
+        """
+        graph = self.graph
+        if graph is None:
+            raise RuntimeError("Cannot swap component '%s' as no "
+                               "configuration is loaded" % name)
+        current = graph.nodes[name]
+        if not (current.options or {}).get('swappable'):
+            # dependents hold the instance itself, which would be stopped
+            # while they still use it
+            raise ValueError(
+                ("Configuration error detected with component %s. "
+                 "Only components configured with swappable: true can be "
+                 "swapped") % name)
+        new_settings = dict(current.settings)
+        new_settings.update(settings or {})
+        reference = ComponentReference(name, current.class_path,
+                                       current.dependencies, new_settings,
+                                       current.priority, current.options)
+        reference.edge_options = current.edge_options
+
+        def swap():
+            with self._launch_lock:
+                with self._components_lock:
+                    old = self.components[name]
+                old_state = self._get_edge_state(name)
+                try:
+                    instance = self._run_step('instantiate', name,
+                                              reference.get_instance, graph)
+                    self._run_step('start', name, self._launch_instance,
+                                   reference, instance, debug)
+                except Exception:
+                    # forget the proxies made for the new instance
+                    new_state = [
+                        [x for x in entries if x not in old_entries]
+                        for entries, old_entries
+                        in zip(self._get_edge_state(name), old_state)]
+                    for executor in self._discard_edge_state(new_state):
+                        executor.shutdown(wait=False)
+                    raise
+                # the new instance's proxies replace those of the old one,
+                # whose breakers' executors are shut down once it is stopped
+                executors = self._discard_edge_state(old_state)
+                with self._components_lock:
+                    handle = self._handles.get(name)
+                    self.components[name] = instance
+                    current._instance = instance
+                    self.ordered_components = [
+                        instance if x is old else x
+                        for x in self.ordered_components]
+                    self._started_components = [
+                        (x, instance if y is old else y)
+                        for x, y in self._started_components]
+                if handle is not None:
+                    _, drained = handle.swap(instance, drain_timeout)
+                    if not drained:
+                        log("Warning: Calls to component '%s' were still in "
+                            "progress after %s seconds; stopping it anyway",
+                            name, drain_timeout)
+                try:
+                    self._run_step('stop', name, old.stop)
+                finally:
+                    for executor in executors:
+                        # calls which have timed out may still be running
+                        executor.shutdown(wait=False)
+                return instance
+        instance = self._run_step('reload', name, swap)
+        if debug > 2:
+            log("  Swapped %r", instance)
+        return instance
+
+    @property
+    def launch_profile(self):
+        """An epoxy.profiling.LaunchProfile measuring launches, or None"""
+        return self._launch_profile
+
+    @launch_profile.setter
+    def launch_profile(self, profile):
+        if self._launch_profile is not None:
+            self.remove_hook(self._launch_profile)
+        self._launch_profile = profile
+        if profile is not None:
+            self.add_hook(profile, profile.KINDS)
+
+    def _map_group(self, function, group):
+        # replicas are handled concurrently, except while profiling (so
+        # that memory is attributed to the right replica)
+        if self.launch_profile is not None:
+            return [function(reference) for reference in group]
+        return _map_concurrently(function, group)
+
+    def _launch_instance(self, reference, component, debug=0):
+        # start a component (once), from a snapshot if it is configured so
+        if reference.options and reference.options.get('snapshot'):
+            self._launch_with_snapshot(reference, component, debug=debug)
+        else:
+            component.launch()
+
+    def _launch_with_snapshot(self, reference, component, debug=0):
+        # Restore the component's state from a snapshot in place of
+        # starting it or, if there is no snapshot, start it and save one.
+        if not supports_snapshots(component):
+            raise ValueError(
+                ("Configuration error detected with component %s. "
+                 "snapshot is set but %s does not implement "
+                 "__epoxy_snapshot__ and __epoxy_restore__")
+                % (reference.name, reference.class_path))
+        options = reference.options['snapshot']
+        if not isinstance(options, dict):
+            options = {}
+        store = SnapshotStore(options.get('directory',
+                                          self.snapshot_directory))
+        key = snapshot_key(reference.class_path, reference.settings,
+                           options.get('inputs', ()), options.get('version'))
+        with component._launch_lock:
+            if component._launched:
+                return
+            try:
+                found, state = store.load(reference.name, key)
+            except ValueError as e:
+                log("Error: %s; starting component %r without a snapshot",
+                    e, reference.name)
+                component.launch()
+                return
+            if found:
+                try:
+                    component.__epoxy_restore__(state)
+                    component._launched = True
+                    if debug > 1:
+                        log("  Restored %s from snapshot", reference.name)
+                    return
+                except Exception as e:
+                    log("Error: Restoring component %r from snapshot, "
+                        "starting it instead: %s", reference.name, e)
+            component.launch()
+            try:
+                store.save(reference.name, key, component.__epoxy_snapshot__())
+            except Exception as e:
+                log("Error: Saving snapshot of component %r: %s",
+                    reference.name, e)
+            else:
+                if debug > 1:
+                    log("  Saved snapshot of %s", reference.name)
+
+    def shutdown(self, debug=0):
+        """Stop all started components in the reverse of the start order
+
+        Components started from different subgraphs are stopped in the
+        reverse of the order in which they were started overall.  Errors
+        raised by a component's ``stop()`` are logged and do not prevent
+        the remaining components from being stopped.
+
+        """
+        with self._components_lock:
+            started = self._started_components
+            self._started_components = []
+        for name, component in reversed(started):
+            if component is self:
+                continue
+            try:
+                self._run_step('stop', name, component.stop)
+            except Exception as e:
+                log("Error: Stopping component %r: %s", component, e)
+            if debug > 2:
+                log("  Stopped %r", component)
+        with self._components_lock:
+            executors = [x[4] for x in self._breakers if x[4] is not None]
+        for executor in executors:
+            # calls which have timed out may still be running
+            executor.shutdown(wait=False)
+        admin, self.admin = self.admin, None
+        if admin is not None:
+            admin.stop()
+
+    def start_admin(self, host='127.0.0.1', port=0, path=None):
+        """Serve the state of the components as json over HTTP
+
+        The server listens on ``host`` and ``port`` (0 picks a free port),
+        or on the unix socket at ``path``, from a background thread; see
+        :mod:`epoxy.admin` for what it serves.  It should be started before
+        launching so that the timings of each component are recorded, and
+        is stopped by :meth:`shutdown`.  This may also be done with the
+        ``admin`` key of the configuration::
+
+            admin:
+              port: 8181
+
+        """
+        from epoxy.admin import AdminServer
+        if self.admin is not None:
+            raise RuntimeError("The admin server is already running at %r"
+                               % (self.admin.address,))
+        admin = AdminServer(self, host=host, port=port, path=path)
+        admin.start()
+        self.admin = admin
+        return admin
 
     def launch_subgraph(self, data, entry_point, debug=0, **kwargs):
         """Launch and run a part of the entire component graph
@@ -251,29 +1215,27 @@ class ComponentManager(Component):
         configuration is launched, components that have already been
         initiated and started will not be reinitiated.
 
+        Several subgraphs may be launched from different threads at the
+        same time.  Components shared between the subgraphs are only
+        instantiated and started once; a thread that needs a component
+        which another thread is still starting waits for that start to
+        complete.
+
         """
         entry_component, entry_method = entry_point.split(':', 1)
-        self._load_graph(data, debug=debug)
-        component_ordering = self.graph.get_ordering(entry_component)
+        graph = self._load_graph(data, debug=debug)
+        component_ordering = graph.get_ordering(entry_component)
 
         # instantation all component and build ordered instance list
-        components = {}
-        ordered_components = []
-        for component_reference in component_ordering:
-            try:
-                component = component_reference.get_instance(self.graph)
-            except:
-                log("Error: Instantiating component %r",
-                    component_reference.name)
-                raise
-            components[component_reference.name] = component
-            ordered_components.append(component)
-
-        for component in ordered_components:
-            component.launch()
+        instantiated = self._instantiate(graph, component_ordering,
+                                         debug=debug)
+        self._start(instantiated, debug=debug)
 
+        components = dict((reference.name, component)
+                          for reference, component in instantiated)
         entry_component = components[entry_component]
-        self.components.update(components)
+        with self._components_lock:
+            self.components.update(components)
         try:
             return getattr(entry_component, entry_method)(**kwargs)
         except AttributeError:
@@ -290,36 +1252,66 @@ class ComponentManager(Component):
         2) Validate the graph (no dependency cycles) and build an ordering
            which ensure that before any object, X, is instatiated that all
            the object on which it depends have alreadby been instantiated.
+           If the configuration sets ``prune``, components which neither
+           the entry-point nor any component with ``root: true`` needs are
+           left out (see ``prune_report``).
         3) Instantiate all components in the graph in computed order
         4) In the same, order, call start() on each component
+           (with ``workers``, steps 3 and 4 are instead done for each
+           component in turn, on that many threads; see epoxy.scheduling)
         5) If an entry-point is specified, call the entry-point method that
            has been specified.  Otherwise, the call will return.
 
         """
-        self._load_graph(data, debug=debug)
+        admin = data.get('admin')
+        if admin and self.admin is None:
+            self.start_admin(**(admin if isinstance(admin, dict) else {}))
+        history_path = data.get('history')
+        if history_path and self.launch_history is None:
+            self.launch_history = LaunchHistory(history_path)
+            self.add_hook(self.launch_history, LaunchHistory.KINDS)
+        graph = self._load_graph(data, debug=debug)
 
         # 2) Build the ordering and check for cycles
-        component_ordering = self.graph.get_ordering()
+        component_ordering = self._get_launch_ordering(graph, data,
+                                                       debug=debug)
 
-        # 3) Instantiate all components and build ordered instance list
-        if debug:
-            log("Instantiating Components...")
-        for component_reference in component_ordering:
-            component = component_reference.get_instance(self.graph)
-            self.components[component_reference.name] = component
-            self.ordered_components.append(component)
-            if debug > 1:
-                log("  Instantiated %s", component_reference.name)
+        workers = int(data.get('workers') or 1)
+        if workers > 1:
+            # 3, 4) Instantiate and start components on several threads
+            if debug:
+                log("Launching Components with %d workers...", workers)
+            durations = {}
+            if self.launch_history is not None:
+                durations = self.launch_history.durations()
+            launch_scheduled(
+                graph, component_ordering,
+                lambda reference: self._launch_references(
+                    graph, [reference], debug=debug),
+                workers, durations)
+        else:
+            # 3) Instantiate all components and build ordered instance list
+            if debug:
+                log("Instantiating Components...")
+            instantiated = self._instantiate(graph, component_ordering,
+                                             debug=debug)
+            with self._components_lock:
+                for component_reference, component in instantiated:
+                    self.components[component_reference.name] = component
+                    self.ordered_components.append(component)
 
-        # 4) Call start() on each component in order
-        if debug:
-            log("Starting Components...")
-        for component in self.ordered_components:
-            component.launch()
-            if debug > 2:
-                log("  Started %r", component)
+            # 4) Call start() on each component in order
+            if debug:
+                log("Starting Components...")
+            self._start(instantiated, debug=debug)
+
+        if self.launch_history is not None and self.launch_history.path:
+            self.launch_history.save()
 
         # 5) Execute entry-point if it has been specified
+        self._call_entry_point(data)
+
+    def _call_entry_point(self, data):
         entry_point = data.get('entry-point', None)
         if entry_point is not None:
             entry_component_name, entry_method = entry_point.split(':', 1)
@@ -331,7 +1323,314 @@ class ComponentManager(Component):
                 raise
 
             # call the entry point method with no arguments
-            entry_point_method()
+            return entry_point_method()
+
+    def launch_forked(self, data, workers=2, debug=0, respawn=False,
+                      stop_timeout=10.0):
+        """Launch a configuration in several pre-forked worker processes
+
+        Components configured with ``share: prefork`` (along with everything
+        they depend on) are instantiated and started once, in this process.
+        The garbage collector is then frozen (where supported) so that the
+        memory of these shared components stays shared copy-on-write with
+        the ``workers`` child processes which are then forked.  Each child
+        instantiates and starts all the remaining components and then calls
+        the entry-point, if one is specified, or waits to be terminated.
+
+        This process supervises the children until all of them exit.  If
+        ``respawn`` is set, children which exit abnormally are replaced;
+        while children keep failing soon after being forked (for example
+        because a component fails to start) each replacement is delayed
+        twice as long as the last, up to 30 seconds.
+
+        When this process receives SIGTERM or SIGINT (or when
+        :meth:`terminate_workers` is called) the children are terminated
+        one at a time in the reverse of the order in which they were forked,
+        each being given ``stop_timeout`` seconds to stop its components
+        before it is killed.  Finally, the shared components are stopped.
+
+        Returns a dictionary mapping the pid of each child to its exit
+        status (as returned by ``os.waitpid``).
+
+        """
+        import gc
+
+        graph = self._load_graph(data, debug=debug)
+        component_ordering = self._get_launch_ordering(graph, data,
+                                                       debug=debug)
+
+        # shared components, and everything they depend on, are built here
+        shared = set()
+        for component_reference in reversed(component_ordering):
+            options = component_reference.options or {}
+            if (options.get('share') == 'prefork' or
+                    component_reference.index in shared):
+                shared.add(component_reference.index)
+                shared.update(graph._dependency_indices(
+                    component_reference.index))
+        shared_ordering = [x for x in component_ordering if x.index in shared]
+        worker_ordering = [x for x in component_ordering
+                           if x.index not in shared]
+
+        if debug:
+            log("Starting shared components...")
+        self._launch_references(graph, shared_ordering, debug=debug)
+
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+        self._workers = []
+        self._worker_statuses = {}
+        self._stopping_workers = False
+        terminate_requested = []
+        forked_times = {}  # pid -> time forked
+        respawn_times = []  # heap of when to fork pending replacements
+        respawn_delay = 0.0
+
+        def fork_worker():
+            pid = os.fork()
+            if pid == 0:
+                self._run_forked_worker(data, graph, worker_ordering, debug)
+            if debug:
+                log("Forked worker %d", pid)
+            forked_times[pid] = time.time()
+            self._workers.append(pid)
+
+        def handle_signal(signum, frame):
+            # terminating takes locks which the interrupted code may hold,
+            # so that is left to the supervising loop
+            terminate_requested.append(signum)
+
+        previous_handlers = {}
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                previous_handlers[signum] = signal.signal(signum,
+                                                          handle_signal)
+            except ValueError:
+                pass  # not the main thread; use terminate_workers()
+
+        try:
+            for _ in range(workers):
+                fork_worker()
+            while self._workers or (respawn_times and
+                                    not self._stopping_workers):
+                if terminate_requested and not self._stopping_workers:
+                    self.terminate_workers(stop_timeout)
+                    continue
+                now = time.time()
+                while respawn_times and respawn_times[0] <= now and \
+                        not self._stopping_workers:
+                    heapq.heappop(respawn_times)
+                    fork_worker()
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except OSError as e:
+                    if e.errno == errno.EINTR:
+                        continue
+                    elif e.errno != errno.ECHILD:
+                        raise
+                    elif not respawn_times:
+                        break
+                    pid = 0  # all exited; waiting to respawn
+                if not pid:
+                    time.sleep(_SUPERVISE_INTERVAL)
+                    continue
+                if not self._reap_worker(pid, status):
+                    continue
+                if debug:
+                    log("Worker %d exited with status %d", pid, status)
+                lifetime = now - forked_times.pop(pid, now)
+                if respawn and status != 0 and not self._stopping_workers:
+                    if lifetime > _RESPAWN_DELAY_MAX:
+                        respawn_delay = 0.0
+                    else:
+                        respawn_delay = min(max(respawn_delay * 2,
+                                                _RESPAWN_DELAY_MIN),
+                                            _RESPAWN_DELAY_MAX)
+                        if debug:
+                            log("Respawning worker in %.1f seconds",
+                                respawn_delay)
+                    heapq.heappush(respawn_times, now + respawn_delay)
+        finally:
+            for signum, handler in six.iteritems(previous_handlers):
+                signal.signal(signum, handler)
+            if hasattr(gc, 'unfreeze'):
+                gc.unfreeze()
+            self.shutdown(debug=debug)
+        return self._worker_statuses
+
+    def _reap_worker(self, pid, status):
+        with self._components_lock:
+            if pid not in self._workers:
+                return False
+            self._workers.remove(pid)
+            self._worker_statuses[pid] = status
+            return True
+
+    def terminate_workers(self, timeout=10.0):
+        """Terminate workers started by :meth:`launch_forked`, newest first"""
+        self._stopping_workers = True
+        for pid in reversed(list(self._workers)):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                continue
+            deadline = time.time() + timeout
+            while pid in self._workers:
+                try:
+                    reaped_pid, status = os.waitpid(pid, os.WNOHANG)
+                except OSError:
+                    break  # already reaped by launch_forked
+                if reaped_pid:
+                    self._reap_worker(pid, status)
+                elif time.time() > deadline:
+                    os.kill(pid, signal.SIGKILL)
+                    deadline = float('inf')
+                else:
+                    time.sleep(0.01)
+
+    def _run_forked_worker(self, data, graph, worker_ordering, debug):
+        # runs in the child process; never returns
+        import traceback
+
+        class WorkerTerminated(Exception):
+            pass
+
+        def handle_signal(signum, frame):
+            raise WorkerTerminated()
+
+        status = 0
+        try:
+            self._workers = []
+            self._started_components = []
+            # the admin server belongs to the parent; its thread does not
+            # exist here, and its socket must be left for the parent
+            admin, self.admin = self.admin, None
+            if admin is not None:
+                self.remove_hook(admin)
+                admin._server.server_close()
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, handle_signal)
+            try:
+                self._launch_references(graph, worker_ordering, debug=debug)
+                if data.get('entry-point', None) is not None:
+                    self._call_entry_point(data)
+                else:
+                    while True:
+                        time.sleep(3600)
+            except WorkerTerminated:
+                pass
+            finally:
+                signal.signal(signal.SIGTERM, signal.SIG_IGN)
+                self.shutdown(debug=debug)
+        except:
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _launch_references(self, graph, component_ordering, debug=0):
+        # instantiate and start the given references, in order
+        instantiated = self._instantiate(graph, component_ordering,
+                                         debug=debug)
+        with self._components_lock:
+            for component_reference, component in instantiated:
+                if component_reference.name not in self.components:
+                    self.components[component_reference.name] = component
+                    self.ordered_components.append(component)
+        self._start(instantiated, debug=debug)
+
+    def _get_launch_ordering(self, graph, data=None, debug=0):
+        # the full ordering, less anything only needed by lazy lists or
+        # remote components and, if the configuration asks for it,
+        # anything pruned
+        ordering = graph.get_ordering()
+        pruned = set()
+        prune = (data or {}).get('prune')
+        if prune:
+            pruned.update(self._prune(graph, data, prune, debug=debug))
+        excluded = graph.get_deferred(pruned) | pruned
+        return [x for x in ordering if x.name not in excluded]
+
+    def _prune(self, graph, data, options, debug=0):
+        # Get the names of the components which neither the entry-point
+        # nor any component marked ``root: true`` needs, recording them
+        # (and, given a saved launch profile, what building them would
+        # have cost) in ``prune_report``.
+        roots = set(reference.name for reference in graph.references
+                    if reference.options and reference.options.get('root'))
+        entry_point = data.get('entry-point')
+        if entry_point is not None:
+            entry_component = entry_point.split(':', 1)[0]
+            if entry_component not in graph.nodes:
+                raise ValueError("Configuration error detected with entry "
+                                 "point %s.  Component '%s' does not seem "
+                                 "to exist" % (entry_point, entry_component))
+            roots.add(entry_component)
+        if not roots:
+            raise ValueError("Configuration error: prune requires an "
+                             "entry-point or a component with root: true")
+        roots.add('component_manager')
+        reachable = graph.get_reachable(roots)
+        pruned = sorted(reference.name for reference in graph.references
+                        if reference.name not in reachable)
+
+        report = {'components': pruned, 'time': None, 'size': None}
+        profile_path = options.get('profile') \
+            if isinstance(options, dict) else None
+        if profile_path is not None:
+            from epoxy.profiling import LaunchProfile
+            profiled = dict(
+                (entry['component'], entry)
+                for entry in LaunchProfile.load(profile_path).report())
+            measured = [profiled[name] for name in pruned if name in profiled]
+            report['time'] = sum(x['time'] for x in measured)
+            if any('size' in x for x in measured):
+                report['size'] = sum(x.get('size', 0) for x in measured)
+        self.prune_report = report
+        if debug:
+            log("Pruned %d components not needed by %s: %s",
+                len(pruned), ", ".join(sorted(roots - set(
+                    ['component_manager']))), ", ".join(pruned) or "none")
+            if report['time'] is not None:
+                log("  Estimated saving: %.1f ms%s", report['time'] * 1000,
+                    "" if report['size'] is None else
+                    ", %.1f KiB" % (report['size'] / 1024.0))
+        return pruned
+
+    def launch_component(self, name, debug=0):
+        """Instantiate and start a component from the loaded configuration
+
+        The component's dependencies are instantiated and started first,
+        if that has not already happened.  This is used by lazy dependency
+        lists to build their members on first access (which is why
+        :meth:`compact` keeps the graph of a configuration using them).
+
+        """
+        graph = self.graph
+        if graph is None:
+            raise RuntimeError("Cannot launch component '%s' as no "
+                               "configuration is loaded" % name)
+        self._launch_references(graph, graph.get_ordering(name), debug=debug)
+        return self.components[name]
+
+    def adapt_dependency(self, dependent, name, instance):
+        """Get ``instance`` of component ``name`` as ``dependent`` receives it
+
+        The options of the dependency (``instrument``, ``cache``, ``guard``
+        and ``swappable``) are applied as they are when components are
+        built.  This is used by lazy dependency lists for their members.
+
+        """
+        graph = self.graph
+        if graph is None:
+            raise RuntimeError("Cannot adapt component '%s' as no "
+                               "configuration is loaded" % name)
+        return self._adapt_dependency(graph.nodes[dependent], name,
+                                      graph.nodes[name], instance)
 
     def build_component_graph(self, data):
         """Build a component graph from a collection of configuration data
@@ -352,4 +1651,187 @@ class ComponentManager(Component):
         }
         graph = ComponentGraph.from_component_data(components)
         graph.nodes["component_manager"]._instance = self
+        graph.dependency_adapter = self._adapt_dependency
         return graph
+
+    def _adapt_dependency(self, reference, dep_key, target, instance):
+        # Called for each dependency as it is injected; returns the object
+        # to inject in its place, based on the options for the edge (or
+        # for the targeted component).
+        edge_options = (reference.edge_options or {}).get(dep_key) or {}
+        target_options = target.options or {}
+
+        def option(name, default=None):
+            return edge_options.get(name, target_options.get(name, default))
+
+        if target_options.get('swappable'):
+            # all dependents share one handle, so that swap() affects them
+            # all at once
+            with self._components_lock:
+                handle = self._handles.get(target.name)
+                if handle is None:
+                    handle = self._handles[target.name] = \
+                        SwappableHandle(instance)
+            instance = handle
+
+        guard_options = option('guard')
+        if guard_options:
+            if not isinstance(guard_options, dict):
+                guard_options = {}
+            timeout = guard_options.get('timeout')
+            breaker = CircuitBreaker(
+                failure_threshold=int(guard_options.get('failure_threshold',
+                                                        5)),
+                reset_timeout=float(guard_options.get('reset_timeout', 30.0)),
+                timeout=float(timeout) if timeout is not None else None)
+            executor = None
+            if timeout is not None:
+                from concurrent.futures import ThreadPoolExecutor
+                executor = ThreadPoolExecutor(
+                    max_workers=int(guard_options.get('workers', 4)))
+            with self._components_lock:
+                self._breakers.append((reference.name, dep_key, target.name,
+                                       breaker, executor))
+            kwargs = {}
+            if 'fallback' in guard_options:
+                kwargs['fallback'] = guard_options['fallback']
+            instance = GuardedProxy(instance, breaker, executor, **kwargs)
+
+        cache_options = option('cache')
+        if cache_options:
+            if not isinstance(cache_options, dict):
+                cache_options = {}
+            methods = cache_options.get('methods')
+            if not methods:
+                raise ValueError(
+                    ("Configuration error detected with component %s. "
+                     "The cache for dependency '%s' must list the methods "
+                     "to cache") % (reference.name, dep_key))
+            cache = MemoizationCache(
+                max_size=int(cache_options.get('max_size', 128)),
+                ttl=cache_options.get('ttl'))
+            with self._components_lock:
+                self._caches.append((reference.name, dep_key, target.name,
+                                     cache))
+            instance = CachingProxy(instance, cache, methods)
+
+        if option('instrument'):
+            statistics = CallStatistics(reference.name, dep_key, target.name)
+            with self._components_lock:
+                self._call_statistics.append(statistics)
+            instance = InstrumentedProxy(instance, statistics)
+        return instance
+
+    def _get_edge_state(self, name):
+        # the call statistics, caches and breakers of the proxies made for
+        # the dependencies of component ``name``
+        with self._components_lock:
+            return ([x for x in self._call_statistics if x.component == name],
+                    [x for x in self._caches if x[0] == name],
+                    [x for x in self._breakers if x[0] == name])
+
+    def _discard_edge_state(self, state):
+        # forget the proxy state given (as from _get_edge_state), returning
+        # the executors of its breakers to be shut down by the caller
+        statistics, caches, breakers = state
+        with self._components_lock:
+            self._call_statistics = [x for x in self._call_statistics
+                                     if x not in statistics]
+            self._caches = [x for x in self._caches if x not in caches]
+            self._breakers = [x for x in self._breakers if x not in breakers]
+        return [x[4] for x in breakers if x[4] is not None]
+
+    def get_call_statistics(self):
+        """Get statistics for calls through instrumented dependencies
+
+        Dependencies are instrumented by setting ``instrument: true`` either
+        on a component (which instruments every dependency on it) or on a
+        single dependency using the long form::
+
+            dependencies:
+              driver:
+                component: sms_driver
+                instrument: true
+
+        A list is returned with one dictionary for each instrumented
+        dependency, giving the ``component``, the ``dependency`` and the
+        ``target`` component along with call counts, total/mean/max
+        durations and a latency histogram for each method called.
+
+        """
+        with self._components_lock:
+            statistics = list(self._call_statistics)
+        return [x.as_dict() for x in statistics]
+
+    def get_cache_statistics(self):
+        """Get the size, hits and misses of each dependency cache
+
+        Caches are configured on a dependency (or on a component, which
+        caches every dependency on it) with the ``cache`` option::
+
+            dependencies:
+              geo:
+                component: geo_lookup
+                cache:
+                  methods: [lookup]
+                  max_size: 1000
+                  ttl: 60
+
+        """
+        with self._components_lock:
+            caches = list(self._caches)
+        results = []
+        for component, dependency, target, cache in caches:
+            result = cache.as_dict()
+            result.update(component=component, dependency=dependency,
+                          target=target)
+            results.append(result)
+        return results
+
+    def get_breaker_states(self):
+        """Get the state and counters of each dependency circuit breaker
+
+        Breakers are configured on a dependency (or on a component, which
+        guards every dependency on it) with the ``guard`` option::
+
+            dependencies:
+              device:
+                component: modem_driver
+                guard:
+                  timeout: 2.0
+                  failure_threshold: 5
+                  reset_timeout: 30.0
+
+        """
+        with self._components_lock:
+            breakers = list(self._breakers)
+        results = []
+        for component, dependency, target, breaker, _ in breakers:
+            result = breaker.as_dict()
+            result.update(component=component, dependency=dependency,
+                          target=target)
+            results.append(result)
+        return results
+
+    def reset_breakers(self, target=None):
+        """Close the circuit breakers of all dependencies, or only those on
+        the component named ``target``"""
+        with self._components_lock:
+            breakers = list(self._breakers)
+        for _, _, breaker_target, breaker, _ in breakers:
+            if target is None or breaker_target == target:
+                breaker.reset()
+
+    def invalidate_cache(self, target=None, method=None):
+        """Invalidate cached results of calls through dependencies
+
+        If ``target`` is given only the caches in front of that component
+        are invalidated and, if ``method`` is given, only the results of
+        calls to that method.
+
+        """
+        with self._components_lock:
+            caches = list(self._caches)
+        for _, _, cache_target, cache in caches:
+            if target is None or target == cache_target:
+                cache.invalidate(method)
@@ -0,0 +1,75 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Events describing the lifecycle of components
+
+Hooks registered with :meth:`~epoxy.core.ComponentManager.add_hook` are
+called with a :class:`LifecycleEvent` before and after each step the
+manager takes::
+
+    def print_slow_starts(event):
+        if event.after and event.duration > 1.0:
+            print("%s took %.1fs to start" % (event.component,
+                                              event.duration))
+
+    mgr.add_hook(print_slow_starts, kinds=['start'])
+
+The kinds of event are:
+
+``graph``
+  Building the component graph from the configuration (``component`` is
+  None).
+``import``
+  Importing the module containing a component's class.
+``instantiate``
+  Constructing a component (``from_dependencies``).
+``start``
+  Starting a component.
+``stop``
+  Stopping a component.
+``reload``
+  Reloading a component with
+  :meth:`~epoxy.core.ComponentManager.reload_component`.
+
+Hooks are called synchronously by the thread doing the work, so they
+should be quick (and thread safe, as components may be launched from
+several threads).  Exceptions raised by hooks are logged and otherwise
+ignored.  When no hooks are registered no events are created at all.
+
+"""
+import time
+
+KINDS = ('graph', 'import', 'instantiate', 'start', 'stop', 'reload')
+
+
+class LifecycleEvent(object):
+    """Something that happened (or is about to happen) to a component
+
+    ``duration`` (in seconds) and ``error`` (the exception raised, if the
+    step failed) are only set on events sent after the step.
+
+    """
+
+    __slots__ = ('kind', 'component', 'after', 'duration', 'error', 'time')
+
+    def __init__(self, kind, component, after=False, duration=None,
+                 error=None):
+        self.kind = kind
+        self.component = component
+        self.after = after
+        self.duration = duration
+        self.error = error
+        self.time = time.time()
+
+    @property
+    def before(self):
+        return not self.after
+
+    def __repr__(self):
+        return "<LifecycleEvent %s %s %s%s>" % (
+            "after" if self.after else "before", self.kind, self.component,
+            " (%.6fs)" % self.duration if self.after else "")
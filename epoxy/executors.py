@@ -0,0 +1,147 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Thread and process pools managed as components
+
+Rather than each component creating (and hopefully shutting down) its own
+pool, pools may be declared once in the configuration and injected like
+any other dependency::
+
+    components:
+      io_pool:
+        class: epoxy.executors:ThreadPoolComponent
+        settings:
+          max_workers: 8
+
+      uploader:
+        class: my.module:Uploader
+        dependencies:
+          executor: io_pool
+
+The pool is created when the component is started and shut down (waiting
+for pending work) when it is stopped.  Pools provide the ``submit`` and
+``map`` methods of :class:`concurrent.futures.Executor`.
+
+The blocking methods of a dependency may also be run on a pool with the
+``offload`` option, in which case calling them returns a future::
+
+    dependencies:
+      storage:
+        component: storage
+        offload:
+          executor: io_pool
+          methods: [read, write]
+
+If ``methods`` is not given, all public methods are offloaded.  When
+offloading to a process pool, each call runs on a pickled copy of the
+dependency, so it (and anything it depends on) must be picklable and
+changes the call makes to its state are not seen by the original.
+
+"""
+from epoxy.component import Component, Dependency
+from epoxy.settings import IntegerSetting, ListSetting, StringSetting
+
+
+class ExecutorComponent(Component):
+    """Base class for components wrapping a concurrent.futures executor"""
+
+    max_workers = IntegerSetting(help="Maximum number of workers in the "
+                                      "pool (defaults to the executor's "
+                                      "own default)")
+
+    def __init__(self):
+        self._executor = None
+
+    def _create_executor(self):
+        raise NotImplementedError("_create_executor is abstract and should "
+                                  "be overriden")
+
+    def _get_executor(self):
+        if self._executor is None:
+            raise RuntimeError("%s has not been started"
+                               % type(self).__name__)
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule ``fn(*args, **kwargs)``, returning a future"""
+        return self._get_executor().submit(fn, *args, **kwargs)
+
+    def map(self, fn, *iterables, **kwargs):
+        """Like the builtin ``map``, but calls are made by the pool"""
+        return self._get_executor().map(fn, *iterables, **kwargs)
+
+    def start(self):
+        self._executor = self._create_executor()
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+class ThreadPoolComponent(ExecutorComponent):
+    """A pool of threads"""
+
+    thread_name_prefix = StringSetting(default="",
+                                       help="Prefix for the names of the "
+                                            "pool's threads")
+
+    def _create_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        kwargs = {}
+        if self.thread_name_prefix:
+            kwargs['thread_name_prefix'] = self.thread_name_prefix
+        return ThreadPoolExecutor(max_workers=self.max_workers, **kwargs)
+
+
+class ProcessPoolComponent(ExecutorComponent):
+    """A pool of processes"""
+
+    start_method = StringSetting(help="multiprocessing start method for "
+                                      "the workers (fork, spawn or "
+                                      "forkserver)")
+
+    def _create_executor(self):
+        from concurrent.futures import ProcessPoolExecutor
+        kwargs = {}
+        if self.start_method:
+            import multiprocessing
+            kwargs['mp_context'] = \
+                multiprocessing.get_context(self.start_method)
+        return ProcessPoolExecutor(max_workers=self.max_workers, **kwargs)
+
+
+class OffloadAdapter(Component):
+    """Run methods of ``target`` on ``executor``, returning futures
+
+    This is inserted between a component and its dependency by the
+    ``offload`` option.  Attributes other than the offloaded methods are
+    passed through to the target unchanged.
+
+    """
+
+    target = Dependency()
+    executor = Dependency()
+
+    methods = ListSetting(help="Names of the methods to offload (all "
+                               "public methods if not given)")
+
+    def __getattr__(self, name):
+        # only called for attributes not found on the adapter itself
+        if name.startswith('_') or 'target' not in self.__dict__:
+            raise AttributeError(name)
+        attr = getattr(self.target, name)
+        if not callable(attr) or (self.methods is not None and
+                                  name not in self.methods):
+            return attr
+        executor = self.executor
+
+        def offloaded(*args, **kwargs):
+            return executor.submit(attr, *args, **kwargs)
+        offloaded.__name__ = name
+        offloaded.__doc__ = getattr(attr, '__doc__', None)
+        return offloaded
@@ -0,0 +1,283 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Validate configuration without importing component modules
+
+Checking that a configuration is valid (that every required setting is
+given, that there are no unknown settings or dependencies, that setting
+values can be decoded) normally requires importing every component class.
+Instead, the declarations of the classes can be extracted once into a
+manifest, against which configuration can be checked quickly::
+
+    python -m epoxy.manifest build myapp.yml -o manifest.json
+    python -m epoxy.manifest check myapp.yml -m manifest.json
+
+``build`` imports the classes used by the configuration (and any classes
+or modules given with ``--class``/``--module``).  With ``--update``, the
+entries of an existing manifest whose source file has not changed since
+are reused without importing them.  ``check`` imports nothing but
+:mod:`epoxy` itself; it reports each problem found and exits with status 1
+if there were any.
+
+"""
+from __future__ import print_function
+from epoxy.component import Component
+from epoxy.registry import resolve_class_path
+from epoxy.utils import load_module
+import inspect
+import json
+import os
+import six
+import sys
+
+MANIFEST_VERSION = 1
+
+# classes whose dependencies are determined by the configuration
+_UNCHECKED_CLASSES = frozenset(['epoxy.component:ComponentList',
+                                'epoxy.component:LazyComponentList',
+                                'epoxy.core:ComponentManager'])
+
+
+def _class_path(cls):
+    return '%s:%s' % (cls.__module__, cls.__name__)
+
+
+def _json_value(value):
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def describe_class(cls):
+    """Get the manifest entry describing a component class"""
+    source = None
+    try:
+        source = inspect.getsourcefile(cls)
+    except TypeError:
+        pass
+    return {
+        'source': source,
+        'mtime': os.stat(source).st_mtime if source else None,
+        'dependencies': dict(
+            (name, {'required': dependency.required})
+            for name, dependency in six.iteritems(cls._dependencies)),
+        'settings': dict(
+            (name, {'type': _class_path(type(setting)),
+                    'required': setting.required,
+                    'default': _json_value(setting.default),
+                    'help': setting.help})
+            for name, setting in six.iteritems(cls._settings)),
+    }
+
+
+def _is_fresh(entry):
+    source = entry.get('source')
+    if not source:
+        return False
+    try:
+        return os.stat(source).st_mtime == entry.get('mtime')
+    except OSError:
+        return False
+
+
+def build_manifest(class_paths=(), modules=(), previous=None):
+    """Build a manifest of the given classes and the classes in ``modules``
+
+    If a ``previous`` manifest is given, its entries for classes whose
+    source file is unchanged are reused rather than importing the class.
+
+    """
+    classes = {}
+    previous_classes = (previous or {}).get('classes', {})
+    for class_path in class_paths:
+        entry = previous_classes.get(class_path)
+        if entry is not None and _is_fresh(entry):
+            classes[class_path] = entry
+            continue
+        module_path, class_name = class_path.split(':', 1)
+        cls = getattr(load_module(module_path), class_name)
+        classes[class_path] = describe_class(cls)
+    for module_path in modules:
+        module = load_module(module_path)
+        for value in vars(module).values():
+            if inspect.isclass(value) and issubclass(value, Component) and \
+                    value.__module__ == module.__name__:
+                classes[_class_path(value)] = describe_class(value)
+    return {'version': MANIFEST_VERSION, 'classes': classes}
+
+
+def save_manifest(manifest, path):
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def load_manifest(path):
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError("'%s' is not a version %d epoxy manifest"
+                         % (path, MANIFEST_VERSION))
+    return manifest
+
+
+def configured_class_paths(data):
+    """Get the class paths used by the components of a configuration
+
+    Short names (see :mod:`epoxy.registry`) are resolved; those which are
+    not registered are left out.
+
+    """
+    class_paths = set()
+    for value in data.get('components', {}).values():
+        if isinstance(value, dict) and 'class' in value:
+            try:
+                class_paths.add(resolve_class_path(value['class']))
+            except KeyError:
+                pass
+    return sorted(class_paths)
+
+
+def _decode_setting(type_path, value):
+    # Only the setting types provided by epoxy itself can be checked
+    # without importing anything else.
+    module_path, class_name = type_path.split(':', 1)
+    if module_path != 'epoxy.settings':
+        return
+    setting_class = getattr(sys.modules[module_path], class_name, None)
+    if setting_class is not None:
+        setting = setting_class()
+        setting.name = class_name
+        setting.decode(value)
+
+
+def validate_configuration(data, manifest):
+    """Check a configuration against a manifest, returning a list of errors
+
+    Besides checking each component's settings and dependencies against
+    the declarations of its class, the component graph is built (which
+    does not import anything) to find dangling references and cycles.
+
+    """
+    from epoxy.core import ComponentGraph
+    import epoxy.settings  # noqa (used by _decode_setting)
+    errors = []
+    classes = manifest.get('classes', {})
+    components = data.get('components', {})
+    for name in sorted(components):
+        value = components[name]
+        if not isinstance(value, dict) or 'class' not in value:
+            errors.append("%s: no class given" % name)
+            continue
+        try:
+            class_path = resolve_class_path(value['class'])
+        except KeyError:
+            errors.append("%s: no component is registered as '%s'"
+                          % (name, value['class']))
+            continue
+        if class_path in _UNCHECKED_CLASSES:
+            continue
+        entry = classes.get(class_path)
+        if entry is None:
+            errors.append("%s: class '%s' is not in the manifest"
+                          % (name, class_path))
+            continue
+        dependencies = value.get('dependencies') or {}
+        for key in sorted(dependencies):
+            if key not in entry['dependencies']:
+                errors.append("%s: '%s' is not a dependency of '%s'"
+                              % (name, key, class_path))
+        for key, dependency in sorted(entry['dependencies'].items()):
+            if dependency['required'] and key not in dependencies:
+                errors.append("%s: required dependency '%s' is missing"
+                              % (name, key))
+        settings = value.get('settings') or {}
+        for key in sorted(settings):
+            setting = entry['settings'].get(key)
+            if setting is None:
+                errors.append("%s: '%s' is not a setting of '%s'"
+                              % (name, key, class_path))
+                continue
+            try:
+                _decode_setting(setting['type'], settings[key])
+            except Exception as e:
+                errors.append("%s: setting '%s' has an invalid value %r (%s)"
+                              % (name, key, settings[key], e))
+        for key, setting in sorted(entry['settings'].items()):
+            if setting['required'] and key not in settings:
+                errors.append("%s: required setting '%s' is missing"
+                              % (name, key))
+
+    graph_components = dict(components)
+    graph_components['component_manager'] = {
+        'class': 'epoxy.core:ComponentManager'}
+    try:
+        ComponentGraph.from_component_data(graph_components).get_ordering()
+    except ValueError as e:
+        errors.append(str(e))
+    return errors
+
+
+def main(argv=None):
+    """Build manifests and check configuration: ``python -m epoxy.manifest``"""
+    import argparse
+    from epoxy.configuration import load_configuration_file
+    parser = argparse.ArgumentParser(
+        description="Build a manifest of epoxy component classes, or check "
+                    "configuration against one without importing them")
+    subparsers = parser.add_subparsers(dest="command")
+    build_parser = subparsers.add_parser(
+        "build", help="write a manifest of the classes used by "
+                      "configuration files")
+    build_parser.add_argument("configuration", nargs="*",
+                              help="configuration files")
+    build_parser.add_argument("-o", "--output", required=True,
+                              help="manifest file to write")
+    build_parser.add_argument("--class", dest="classes", action="append",
+                              default=[], help="also include this class "
+                                               "(module.path:Class)")
+    build_parser.add_argument("--module", dest="modules", action="append",
+                              default=[], help="also include every component "
+                                               "class in this module")
+    build_parser.add_argument("--update", action="store_true",
+                              help="reuse unchanged entries of an existing "
+                                   "manifest")
+    check_parser = subparsers.add_parser(
+        "check", help="check configuration files against a manifest")
+    check_parser.add_argument("configuration", nargs="+",
+                              help="configuration files")
+    check_parser.add_argument("-m", "--manifest", required=True,
+                              help="manifest file")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        class_paths = set(args.classes)
+        for path in args.configuration:
+            class_paths.update(
+                configured_class_paths(load_configuration_file(path)))
+        previous = None
+        if args.update and os.path.exists(args.output):
+            previous = load_manifest(args.output)
+        save_manifest(build_manifest(sorted(class_paths), args.modules,
+                                     previous), args.output)
+        return 0
+    elif args.command == "check":
+        manifest = load_manifest(args.manifest)
+        failed = False
+        for path in args.configuration:
+            for error in validate_configuration(load_configuration_file(path),
+                                                manifest):
+                print("%s: %s" % (path, error))
+                failed = True
+        return 1 if failed else 0
+    parser.print_usage()
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
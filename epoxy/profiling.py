@@ -0,0 +1,215 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Time and memory used by each component while it is launched
+
+A :class:`LaunchProfile` is given to a
+:class:`~epoxy.core.ComponentManager` before launching::
+
+    mgr = ComponentManager()
+    mgr.launch_profile = LaunchProfile(memory='tracemalloc')
+    mgr.launch_configuration(config)
+    print(mgr.launch_profile.format_report())
+    mgr.launch_profile.save('launch-profile.json')
+
+The profile is a hook (see :mod:`epoxy.events`) which measures three
+phases for each component: ``import`` (loading the module containing its
+class), ``instantiate`` (``from_dependencies``, including ``__init__``) and
+``start``.  The duration of each phase is
+always recorded.  Memory is measured according to ``memory``:
+
+``'tracemalloc'``
+  The change in memory traced by :mod:`tracemalloc`, along with the
+  ``top_sites`` source lines which allocated the most (if ``top_sites`` is
+  not 0).  Tracing is started when the first phase is measured, if it is
+  not already running, and stopped by :meth:`LaunchProfile.stop`.  This is
+  precise but slows the launch down considerably, especially with
+  allocation sites.  It is only available on Python 3.
+``'rss'``
+  The change in the resident set size of the process.  This has very
+  little overhead but is coarse, and is only accurate on Linux (elsewhere
+  the peak RSS is used).
+``None``
+  Only durations are recorded.
+
+While profiling, the manager launches replicas one at a time so that
+memory is attributed to the right component.  Phases which overlap in time
+(when subgraphs are launched from several threads at once, or when a
+component launches others from its ``start()``) are each charged with
+everything allocated while they ran.
+
+"""
+import json
+import os
+import sys
+import threading
+
+PHASES = ('import', 'instantiate', 'start')
+
+
+def _current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class LaunchProfile(object):
+    """Durations and memory usage of the phases of launching components"""
+
+    MEMORY_MODES = ('tracemalloc', 'rss', None)
+
+    # the kinds of lifecycle event to receive
+    KINDS = PHASES
+
+    def __init__(self, memory='rss', top_sites=5, frames=1):
+        if memory not in self.MEMORY_MODES:
+            raise ValueError("memory should be one of %s, not %r"
+                             % (", ".join(repr(x) for x in self.MEMORY_MODES),
+                                memory))
+        if memory == 'tracemalloc':
+            try:
+                import tracemalloc
+            except ImportError:
+                raise ValueError("tracemalloc is not available on this "
+                                 "version of Python; use memory='rss'")
+            self._tracemalloc = tracemalloc
+        self.memory = memory
+        self.top_sites = top_sites
+        self.frames = frames
+        self.components = {}  # name -> {phase: {time, size, sites}}
+        self._started_tracing = False
+        self._before = {}  # (thread, name, phase) -> memory before phase
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        if event.kind not in PHASES:
+            return
+        key = (threading.current_thread().ident, event.component,
+               event.kind)
+        if not event.after:
+            before = self._memory_snapshot()
+            with self._lock:
+                self._before[key] = before
+        else:
+            with self._lock:
+                before = self._before.pop(key, None)
+            if before is not None:
+                self._record(event.component, event.kind, event.duration,
+                             before)
+
+    def stop(self):
+        """Stop tracing memory allocations if this profile started it"""
+        if self._started_tracing:
+            self._tracemalloc.stop()
+            self._started_tracing = False
+
+    def _memory_snapshot(self):
+        if self.memory == 'rss':
+            return _current_rss(), None
+        elif self.memory == 'tracemalloc':
+            tracemalloc = self._tracemalloc
+            with self._lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(self.frames)
+                    self._started_tracing = True
+            snapshot = None
+            if self.top_sites:
+                snapshot = tracemalloc.take_snapshot()
+            return tracemalloc.get_traced_memory()[0], snapshot
+        return None, None
+
+    def _record(self, name, phase, elapsed, before):
+        size_before, snapshot_before = before
+        size_after, snapshot_after = self._memory_snapshot()
+        result = {'time': elapsed}
+        if size_before is not None:
+            result['size'] = size_after - size_before
+        if snapshot_before is not None and snapshot_after is not None:
+            tracemalloc = self._tracemalloc
+            ignored = [tracemalloc.Filter(False, tracemalloc.__file__),
+                       tracemalloc.Filter(False, __file__)]
+            differences = snapshot_after.filter_traces(ignored).compare_to(
+                snapshot_before.filter_traces(ignored), 'lineno')
+            result['sites'] = [
+                {'site': '%s:%d' % (x.traceback[0].filename,
+                                    x.traceback[0].lineno),
+                 'size': x.size_diff,
+                 'count': x.count_diff}
+                for x in differences[:self.top_sites] if x.size_diff > 0]
+        with self._lock:
+            phases = self.components.setdefault(name, {})
+            if phase in phases:
+                # measured more than once (restarted, for instance); add up
+                previous = phases[phase]
+                result['time'] += previous['time']
+                if 'size' in result:
+                    result['size'] += previous.get('size', 0)
+            phases[phase] = result
+
+    def report(self):
+        """Get the results for each component, largest first
+
+        Each entry has the ``component`` name, its total ``time`` and
+        ``size`` (if memory is measured) and the results for each of its
+        ``phases``.  Sizes are in bytes and may be negative if memory was
+        released.
+
+        """
+        with self._lock:
+            components = [(name, dict(phases))
+                          for name, phases in self.components.items()]
+        results = []
+        for name, phases in components:
+            entry = {
+                'component': name,
+                'time': sum(x['time'] for x in phases.values()),
+                'phases': phases,
+            }
+            if self.memory is not None:
+                entry['size'] = sum(x.get('size', 0) for x in phases.values())
+            results.append(entry)
+        results.sort(key=lambda x: (-x.get('size', 0), -x['time'],
+                                    x['component']))
+        return results
+
+    @classmethod
+    def load(cls, path):
+        """Read a profile written by :meth:`save`"""
+        with open(path) as f:
+            data = json.load(f)
+        profile = cls(memory=None)
+        profile.memory = data.get('memory')
+        profile.components = dict((entry['component'], entry['phases'])
+                                  for entry in data.get('components', []))
+        return profile
+
+    def as_dict(self):
+        return {'memory': self.memory, 'components': self.report()}
+
+    def save(self, path):
+        """Write the report to ``path`` as json"""
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2, sort_keys=True)
+
+    def format_report(self, limit=None):
+        """Get the report as a table of text, largest first"""
+        lines = ["%-40s %12s %10s" % ("component", "size (KiB)", "time (ms)")]
+        for entry in self.report()[:limit]:
+            size = entry.get('size')
+            lines.append("%-40s %12s %10.1f" % (
+                entry['component'],
+                "%.1f" % (size / 1024.0) if size is not None else "-",
+                entry['time'] * 1000))
+            for phase in PHASES:
+                for site in entry['phases'].get(phase, {}).get('sites', []):
+                    lines.append("    %-9s %-51s %.1f KiB" % (
+                        phase, site['site'][-51:], site['size'] / 1024.0))
+        return "\n".join(lines)
@@ -0,0 +1,502 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Proxies which may be injected in place of a dependency
+
+When a dependency edge is configured with options such as ``instrument`` or
+``cache``, the :class:`~epoxy.core.ComponentManager` injects one of these
+proxies in place of the component itself.  The proxies forward attribute
+access (and the basic container protocol, so that they also work for
+dependency lists) to the wrapped object; method calls may be intercepted.
+
+Proxies are only created for edges that ask for them, so there is no cost
+for dependencies which are not configured this way.
+
+An edge configured with ``guard`` is wrapped in a :class:`GuardedProxy`
+which bounds the time callers wait for the dependency and stops calling
+it for a while when it keeps failing (a circuit breaker)::
+
+    dependencies:
+      device:
+        component: modem_driver
+        guard:
+          timeout: 2.0           # seconds to wait for each call
+          failure_threshold: 5   # consecutive failures which open it
+          reset_timeout: 30.0    # seconds before a probe call is let through
+          fallback: null         # returned instead of raising, if given
+
+"""
+from collections import OrderedDict
+from epoxy.utils import clock, timer
+import six
+import threading
+import time
+
+
+class DependencyProxy(object):
+    """Base class for proxies forwarding to a wrapped dependency
+
+    Subclasses override :meth:`_wrap_method` in order to intercept calls to
+    the methods of the wrapped object.  Wrapped methods are cached on the
+    proxy the first time they are looked up.
+
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def _wrap_method(self, name, method):
+        return method
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if callable(attr) and not name.startswith('_'):
+            attr = self._wrap_method(name, attr)
+            self.__dict__[name] = attr
+        return attr
+
+    def __len__(self):
+        return len(self._target)
+
+    def __iter__(self):
+        return iter(self._target)
+
+    def __getitem__(self, index):
+        return self._target[index]
+
+    def __contains__(self, value):
+        return value in self._target
+
+    def __repr__(self):
+        return "<%s for %r>" % (type(self).__name__, self._target)
+
+
+class MethodStatistics(object):
+    """Call count, errors and latency histogram for a single method
+
+    Latencies are counted in buckets by powers of two of microseconds;
+    bucket ``i`` counts calls which took less than ``2 ** i`` microseconds
+    (and at least ``2 ** (i - 1)``).  The last bucket also counts anything
+    slower.
+
+    """
+
+    __slots__ = ('count', 'errors', 'total_time', 'max_time', 'buckets')
+
+    BUCKET_COUNT = 28  # the last bucket starts at ~67 seconds
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.buckets = [0] * self.BUCKET_COUNT
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_time': self.total_time,
+            'mean_time': self.total_time / self.count if self.count else 0.0,
+            'max_time': self.max_time,
+            'histogram': [(2 ** i * 1e-6, n)
+                          for i, n in enumerate(self.buckets) if n],
+        }
+
+
+class CallStatistics(object):
+    """Statistics for the calls made through one dependency edge"""
+
+    def __init__(self, component, dependency, target):
+        self.component = component
+        self.dependency = dependency
+        self.target = target
+        self.methods = {}
+        self._lock = threading.Lock()
+
+    def get_method(self, method):
+        """Get the :class:`MethodStatistics` for the named method"""
+        with self._lock:
+            stats = self.methods.get(method)
+            if stats is None:
+                stats = self.methods[method] = MethodStatistics()
+            return stats
+
+    def as_dict(self):
+        with self._lock:
+            methods = dict((name, stats.as_dict())
+                           for name, stats in six.iteritems(self.methods))
+        return {
+            'component': self.component,
+            'dependency': self.dependency,
+            'target': self.target,
+            'methods': methods,
+        }
+
+
+class InstrumentedProxy(DependencyProxy):
+    """Record the number and latency of calls to the wrapped dependency"""
+
+    def __init__(self, target, statistics):
+        DependencyProxy.__init__(self, target)
+        self._statistics = statistics
+
+    def _wrap_method(self, name, method):
+        # this is the hot path, so the recording is done inline
+        stats = self._statistics.get_method(name)
+        buckets = stats.buckets
+        last_bucket = len(buckets) - 1
+        acquire = self._statistics._lock.acquire
+        release = self._statistics._lock.release
+        measure = timer
+
+        def instrumented(*args, **kwargs):
+            failed = True
+            start = measure()
+            try:
+                result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = measure() - start
+                bucket = int(elapsed * 1e6).bit_length()
+                acquire()
+                stats.count += 1
+                if failed:
+                    stats.errors += 1
+                stats.total_time += elapsed
+                if elapsed > stats.max_time:
+                    stats.max_time = elapsed
+                buckets[bucket if bucket < last_bucket else last_bucket] += 1
+                release()
+        instrumented.__name__ = name
+        instrumented.__doc__ = getattr(method, '__doc__', None)
+        return instrumented
+
+
+class MemoizationCache(object):
+    """A thread safe LRU cache with an optional time to live
+
+    Entries are keyed by method name and arguments.  Values computed
+    concurrently for the same key by several threads may be computed more
+    than once; the cache lock is never held while calling the dependency.
+
+    """
+
+    def __init__(self, max_size=128, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get ``(True, value)`` for a cached key or ``(False, None)``"""
+        with self._lock:
+            try:
+                expires, value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return False, None
+            if expires is not None and expires < clock():
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+            # move to the end (most recently used)
+            del self._entries[key]
+            self._entries[key] = (expires, value)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value):
+        expires = clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, method=None):
+        """Drop all entries, or only those for the named method"""
+        with self._lock:
+            if method is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == method]:
+                    del self._entries[key]
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+class CachingProxy(DependencyProxy):
+    """Memoize calls to selected methods of the wrapped dependency
+
+    Only the methods named in ``methods`` are cached, and only for calls
+    whose arguments are hashable; other calls are passed straight through.
+
+    """
+
+    def __init__(self, target, cache, methods):
+        DependencyProxy.__init__(self, target)
+        self._cache = cache
+        self._methods = frozenset(methods)
+
+    def _wrap_method(self, name, method):
+        if name not in self._methods:
+            return method
+        cache = self._cache
+
+        def cached(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                found, value = cache.get(key)
+            except TypeError:  # unhashable arguments
+                return method(*args, **kwargs)
+            if not found:
+                value = method(*args, **kwargs)
+                cache.put(key, value)
+            return value
+        cached.__name__ = name
+        cached.__doc__ = getattr(method, '__doc__', None)
+        return cached
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open"""
+
+
+class CircuitBreaker(object):
+    """Track the failures of calls to a dependency, rejecting calls when open
+
+    The breaker is ``closed`` while calls succeed.  Once
+    ``failure_threshold`` calls in a row have failed it is ``open``, and
+    calls are rejected without being made.  After ``reset_timeout``
+    seconds it is ``half-open``: a single probe call is let through, which
+    closes the breaker if it succeeds or opens it again if it fails.
+
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, timeout=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timeout = timeout  # applied by the proxy; recorded for reports
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise :class:`CircuitOpenError` if a call may not be made now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if clock() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError("The circuit breaker is open")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError("The circuit breaker is half-open "
+                                           "and a probe call is in progress")
+                self._probing = True
+            self.calls += 1
+
+    def record_success(self):
+        with self._lock:
+            self._probing = False
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self, timed_out=False):
+        with self._lock:
+            self._probing = False
+            self.failures += 1
+            if timed_out:
+                self.timeouts += 1
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or \
+                    self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = clock()
+
+    def reset(self):
+        """Close the breaker, forgetting any recent failures"""
+        self.record_success()
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'timeout': self.timeout,
+                'calls': self.calls,
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'rejected': self.rejected,
+            }
+
+
+_NO_FALLBACK = object()
+
+
+class GuardedProxy(DependencyProxy):
+    """Guard calls to the wrapped dependency with a circuit breaker
+
+    If ``executor`` is given, calls are made through it so that callers can
+    stop waiting after the breaker's ``timeout`` (raising
+    :class:`concurrent.futures.TimeoutError`).  A call which times out while
+    still queued in the executor is cancelled; one which has started
+    carries on in the executor.  Calls which raise or time out count as
+    failures.  If a
+    ``fallback`` is given it is returned instead of raising when a call is
+    rejected, fails or times out.
+
+    """
+
+    def __init__(self, target, breaker, executor=None, fallback=_NO_FALLBACK):
+        DependencyProxy.__init__(self, target)
+        self._breaker = breaker
+        self._executor = executor
+        self._fallback = fallback
+
+    def _wrap_method(self, name, method):
+        breaker = self._breaker
+        executor = self._executor
+        timeout = breaker.timeout
+        fallback = self._fallback
+        if executor is not None:
+            from concurrent.futures import TimeoutError
+        else:
+            TimeoutError = None
+
+        def guarded(*args, **kwargs):
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                if fallback is _NO_FALLBACK:
+                    raise
+                return fallback
+            try:
+                if executor is None:
+                    result = method(*args, **kwargs)
+                else:
+                    future = executor.submit(method, *args, **kwargs)
+                    try:
+                        result = future.result(timeout)
+                    except TimeoutError:
+                        # the caller has given up, so it must not run later
+                        future.cancel()
+                        raise
+            except Exception as e:
+                breaker.record_failure(TimeoutError is not None and
+                                       isinstance(e, TimeoutError))
+                if fallback is _NO_FALLBACK:
+                    raise
+                return fallback
+            breaker.record_success()
+            return result
+        guarded.__name__ = name
+        guarded.__doc__ = getattr(method, '__doc__', None)
+        return guarded
+
+
+class _Generation(object):
+    # one instance behind a SwappableHandle.  Each call in progress on it
+    # has an entry in ``calls``; appending to and popping from a list are
+    # atomic, so no lock is taken on the call path.
+
+    __slots__ = ('target', 'calls')
+
+    def __init__(self, target):
+        self.target = target
+        self.calls = []
+
+
+class SwappableHandle(DependencyProxy):
+    """Forward to a component which may be replaced while in use
+
+    Every dependent of a component configured with ``swappable: true``
+    receives the same handle, so replacing the component (see
+    :meth:`~epoxy.core.ComponentManager.swap`) takes effect for all of them
+    at once.  The handle tracks the calls in progress on each instance so
+    that a replaced instance can be stopped once they have finished.
+    Method lookups are cached on the handle, but each call is dispatched
+    to whichever instance is current when it is made.
+
+    """
+
+    DRAIN_INTERVAL = 0.005
+
+    def __init__(self, target):
+        self._generation = _Generation(target)
+
+    @property
+    def _target(self):
+        return self._generation.target
+
+    def __getattr__(self, name):
+        attr = getattr(self._generation.target, name)
+        if callable(attr) and not name.startswith('_'):
+            attr = self._wrap_method(name, attr)
+            self.__dict__[name] = attr
+        return attr
+
+    def _wrap_method(self, name, method):
+        handle = self
+
+        def forward(*args, **kwargs):
+            generation = handle._generation
+            calls = generation.calls
+            calls.append(None)
+            # if the instance was swapped before the call was counted, the
+            # old one may already be considered drained; use the new one
+            while handle._generation is not generation:
+                calls.pop()
+                generation = handle._generation
+                calls = generation.calls
+                calls.append(None)
+            try:
+                return getattr(generation.target, name)(*args, **kwargs)
+            finally:
+                calls.pop()
+        forward.__name__ = name
+        forward.__doc__ = getattr(method, '__doc__', None)
+        return forward
+
+    def swap(self, target, timeout=None):
+        """Forward to ``target`` from now on
+
+        Waits up to ``timeout`` seconds (or indefinitely) for calls in
+        progress on the old instance to finish.  Returns ``(old,
+        drained)`` where ``drained`` is False if some were still running.
+
+        """
+        old, self._generation = self._generation, _Generation(target)
+        deadline = clock() + timeout if timeout is not None else None
+        while old.calls:
+            if deadline is not None and clock() >= deadline:
+                return old.target, False
+            time.sleep(self.DRAIN_INTERVAL)
+        return old.target, True
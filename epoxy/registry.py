@@ -0,0 +1,222 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Components registered under short names by installed packages
+
+Packages may make their components available under a short name by
+declaring an entry point in the ``epoxy.components`` group::
+
+    setup(
+        ...
+        entry_points={
+            'epoxy.components': [
+                'modem = acme_drivers.modem:ModemDriver',
+            ],
+        },
+    )
+
+Configuration may then use the short name in place of the class path::
+
+    components:
+      device:
+        class: modem
+
+Finding entry points means reading the metadata of every installed
+distribution, so the index of short names is cached in a file (given by
+the ``EPOXY_REGISTRY_CACHE`` environment variable, or else kept in the
+user's cache directory).  The directory holding it must be owned by, and
+only writable by, the current user (see
+:func:`epoxy.snapshots.check_directory`), as otherwise another user could
+point short names at other classes; if it is not, no cache is used.  The
+cache is only used while the directories on ``sys.path`` are unchanged;
+installing, upgrading or removing a package changes the modification time
+of the directory it is installed in, which causes the index to be
+rebuilt.  Indexing does not import the packages.
+
+Names may also be registered directly with :meth:`ComponentRegistry.register`.
+
+"""
+from epoxy.snapshots import check_directory
+from epoxy.utils import replace_file
+import errno
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+
+ENTRY_POINT_GROUP = 'epoxy.components'
+
+_CACHE_VERSION = 1
+
+DEFAULT_CACHE_PATH = os.environ.get('EPOXY_REGISTRY_CACHE') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or
+    os.path.join(os.path.expanduser('~'), '.cache'),
+    'epoxy', 'registry-%s.json'
+    % hashlib.sha1(sys.executable.encode('utf-8')).hexdigest()[:12])
+
+
+def _path_fingerprint(paths):
+    # the modification time of each directory on the path; adding or
+    # removing a distribution's metadata changes that of its directory
+    fingerprint = []
+    for path in paths:
+        try:
+            mtime = os.stat(path or '.').st_mtime
+        except OSError:
+            mtime = None
+        fingerprint.append([path, mtime])
+    return fingerprint
+
+
+def scan_entry_points(group=ENTRY_POINT_GROUP):
+    """Get ``{name: class path}`` for the entry points in ``group``
+
+    When several distributions use the same name, the first found wins.
+
+    """
+    found = {}
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        import pkg_resources
+        for entry_point in pkg_resources.iter_entry_points(group):
+            found.setdefault(entry_point.name, '%s:%s' % (
+                entry_point.module_name, '.'.join(entry_point.attrs)))
+        return found
+    selected = entry_points()
+    if hasattr(selected, 'select'):
+        selected = selected.select(group=group)
+    else:  # Python < 3.10
+        selected = selected.get(group, [])
+    for entry_point in selected:
+        found.setdefault(entry_point.name, entry_point.value)
+    return found
+
+
+class ComponentRegistry(object):
+    """Resolve short component names to class paths
+
+    The index of entry points is read (from the cache, or by scanning the
+    installed distributions) the first time a name is resolved.  Pass
+    ``cache_path=False`` to never use a cache file.
+
+    """
+
+    def __init__(self, cache_path=None, group=ENTRY_POINT_GROUP):
+        self.cache_path = DEFAULT_CACHE_PATH if cache_path is None \
+            else cache_path
+        self.group = group
+        self._registered = {}
+        self._index = None
+        self._lock = threading.Lock()
+
+    def register(self, name, class_path):
+        """Make ``class_path`` available as ``name``
+
+        Registered names take precedence over those from entry points.
+
+        """
+        if ':' in name:
+            raise ValueError("Component names may not contain ':' (%r)"
+                             % name)
+        with self._lock:
+            self._registered[name] = class_path
+
+    def resolve(self, name):
+        """Get the class path registered as ``name``
+
+        Raises KeyError if there is no such name.
+
+        """
+        registered = self._registered.get(name)
+        if registered is not None:
+            return registered
+        return self._get_index()[name]
+
+    def names(self):
+        """Get a dictionary of all names and the class paths they resolve to"""
+        names = dict(self._get_index())
+        names.update(self._registered)
+        return names
+
+    def refresh(self):
+        """Scan the installed distributions again, updating the cache"""
+        with self._lock:
+            self._index = self._scan(_path_fingerprint(sys.path))
+
+    def _get_index(self):
+        index = self._index
+        if index is None:
+            with self._lock:
+                index = self._index
+                if index is None:
+                    index = self._index = self._load()
+        return index
+
+    def _load(self):
+        fingerprint = _path_fingerprint(sys.path)
+        if self.cache_path:
+            try:
+                check_directory(os.path.dirname(self.cache_path) or '.')
+                with open(self.cache_path) as f:
+                    cached = json.load(f)
+                if cached.get('version') == _CACHE_VERSION and \
+                        cached.get('group') == self.group and \
+                        cached.get('fingerprint') == fingerprint:
+                    return cached['components']
+            except (IOError, OSError, ValueError):
+                pass
+        return self._scan(fingerprint)
+
+    def _scan(self, fingerprint):
+        index = scan_entry_points(self.group)
+        if self.cache_path:
+            data = {'version': _CACHE_VERSION, 'group': self.group,
+                    'fingerprint': fingerprint, 'components': index}
+            directory = os.path.dirname(self.cache_path) or '.'
+            try:
+                try:
+                    os.makedirs(directory, 0o700)
+                except OSError as e:
+                    if e.errno != errno.EEXIST:
+                        raise
+                check_directory(directory)
+                fd, temporary = tempfile.mkstemp(dir=directory,
+                                                 prefix='.tmp-')
+                try:
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump(data, f, sort_keys=True)
+                    replace_file(temporary, self.cache_path)
+                except:
+                    os.remove(temporary)
+                    raise
+            except (IOError, OSError, ValueError):
+                pass  # the cache is only an optimization
+        return index
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Get the registry used to resolve short names in configuration"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ComponentRegistry()
+    return _registry
+
+
+def resolve_class_path(class_path):
+    """Get the full ``module:Class`` path for a class path or short name"""
+    if ':' in class_path:
+        return class_path
+    return get_registry().resolve(class_path)
@@ -0,0 +1,306 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Components running in a child process
+
+A component configured with the ``remote`` option is run in its own child
+process, along with the components it depends on.  Components depending on
+it receive a :class:`RemoteComponent` instead, which forwards method calls
+to the child::
+
+    components:
+      scorer:
+        class: my.ml:Scorer
+        dependencies:
+          model: model_store
+        remote:
+          timeout: 5.0
+          connections: 4
+
+The child process is started (and the component and its dependencies are
+built and started in it) when the :class:`RemoteComponent` is started, and
+is stopped with it.  The options are the settings of
+:class:`RemoteComponent`; ``remote: true`` uses the defaults.
+
+Only the public methods of the component can be used through the proxy.
+Arguments, results and exceptions are pickled, so they must be picklable
+(exceptions that are not are replaced by a :class:`RemoteError`).  Calls
+are sent over a pool of ``connections`` to the child and are pipelined:
+many calls may be outstanding on a connection at once, and the child runs
+up to ``workers`` of them concurrently.  A call which takes longer than
+``timeout`` seconds raises :class:`concurrent.futures.TimeoutError`;
+``call_async`` returns a future instead of waiting.
+
+"""
+from epoxy.component import Component
+from epoxy.settings import DictionarySetting, FloatSetting, \
+    IntegerSetting, StringSetting
+import itertools
+import os
+import threading
+import traceback
+
+
+class RemoteError(Exception):
+    """An error which could not be passed back from a remote component"""
+
+
+class _Connection(object):
+    # One connection to the child.  Requests are tagged with an id so that
+    # several may be outstanding at once; a reader thread resolves the
+    # future for each response as it arrives.
+
+    def __init__(self, address, authkey):
+        from multiprocessing.connection import Client
+        self._connection = Client(address, authkey=authkey)
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read,
+                                        name="RemoteComponent reader")
+        self._reader.daemon = True
+        self._reader.start()
+
+    def submit(self, method, args, kwargs):
+        from concurrent.futures import Future
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RemoteError("The connection to the remote component "
+                                  "is closed")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self._connection.send((request_id, method, args, kwargs))
+        except:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise
+        return future
+
+    def _read(self):
+        while True:
+            try:
+                request_id, ok, value = self._connection.recv()
+            except (EOFError, IOError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.set_exception(RemoteError("The connection to the remote "
+                                             "component was lost"))
+
+    def close(self, timeout=None):
+        # Ask the child to close its end, which ends the reader (a blocked
+        # read is not interrupted by closing the connection locally).
+        with self._lock:
+            self._closed = True
+        try:
+            with self._send_lock:
+                self._connection.send(None)
+        except (IOError, OSError):
+            pass
+        self._reader.join(timeout)
+        self._connection.close()
+
+
+def _serve(configuration, name, control, authkey, workers):
+    # The body of the child process: build and start the component, then
+    # serve calls to it until told to stop by the parent (or the parent
+    # goes away).
+    from concurrent.futures import ThreadPoolExecutor
+    from epoxy.core import ComponentManager
+    from multiprocessing.connection import Listener
+
+    try:
+        manager = ComponentManager()
+        manager._load_graph(configuration)
+        component = manager.launch_component(name)
+        listener = Listener(authkey=authkey)
+        methods = [attr for attr in dir(component)
+                   if not attr.startswith('_') and
+                   callable(getattr(component, attr, None))]
+        control.send(('ready', listener.address, methods))
+    except Exception:
+        control.send(('error', traceback.format_exc()))
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    def handle(connection):
+        send_lock = threading.Lock()
+
+        def run(request_id, method, args, kwargs):
+            try:
+                if method.startswith('_') or method not in methods:
+                    raise AttributeError("'%s' has no method '%s'"
+                                         % (name, method))
+                response = (request_id, True,
+                            getattr(component, method)(*args, **kwargs))
+            except Exception as e:
+                response = (request_id, False, e)
+            with send_lock:
+                try:
+                    connection.send(response)
+                except (IOError, OSError):
+                    pass
+                except Exception:  # the response could not be pickled
+                    connection.send((request_id, False,
+                                     RemoteError(traceback.format_exc())))
+
+        while True:
+            try:
+                request = connection.recv()
+            except (EOFError, IOError, OSError):
+                break
+            if request is None:  # the parent is closing the connection
+                break
+            executor.submit(run, *request)
+        connection.close()
+
+    def accept():
+        while True:
+            try:
+                connection = listener.accept()
+            except (IOError, OSError):
+                break
+            thread = threading.Thread(target=handle, args=(connection,))
+            thread.daemon = True
+            thread.start()
+
+    acceptor = threading.Thread(target=accept)
+    acceptor.daemon = True
+    acceptor.start()
+    try:
+        control.recv()  # 'stop', or EOFError if the parent has gone
+    except (EOFError, IOError, OSError):
+        pass
+    listener.close()
+    executor.shutdown(wait=True)
+    manager.shutdown()
+
+
+class RemoteComponent(Component):
+    """Proxy for a component running in a child process"""
+
+    component = StringSetting(required=True,
+                              help="Name of the component to run remotely")
+    configuration = DictionarySetting(required=True,
+                                      help="Configuration from which the "
+                                           "component is built")
+    timeout = FloatSetting(default=30.0,
+                           help="Seconds to wait for the result of a call")
+    start_timeout = FloatSetting(default=60.0,
+                                 help="Seconds to wait for the component to "
+                                      "start in the child process")
+    connections = IntegerSetting(default=2,
+                                 help="Number of connections to the child")
+    workers = IntegerSetting(default=8,
+                             help="Number of calls the child runs at once")
+    start_method = StringSetting(help="multiprocessing start method for the "
+                                      "child (fork, spawn or forkserver)")
+
+    def __init__(self):
+        self._process = None
+        self._control = None
+        self._connections = []
+        self._methods = frozenset()
+        self._next_connection = itertools.count()
+
+    def __getattr__(self, name):
+        # only called for attributes not found on the proxy itself
+        if name.startswith('_') or name not in self.__dict__.get('_methods',
+                                                                 ()):
+            raise AttributeError("Remote component '%s' has no method '%s'"
+                                 % (self.__dict__.get('component'), name))
+
+        def call(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+        call.__name__ = name
+        self.__dict__[name] = call
+        return call
+
+    def call_async(self, method, *args, **kwargs):
+        """Call ``method`` of the remote component, returning a future"""
+        connections = self._connections
+        if not connections:
+            raise RemoteError("Remote component '%s' is not running"
+                              % self.component)
+        connection = connections[next(self._next_connection)
+                                 % len(connections)]
+        return connection.submit(method, args, kwargs)
+
+    def call(self, method, *args, **kwargs):
+        """Call ``method`` of the remote component, returning its result"""
+        return self.call_async(method, *args, **kwargs).result(self.timeout)
+
+    @property
+    def pid(self):
+        """The process id of the child, or None if it is not running"""
+        return self._process.pid if self._process is not None else None
+
+    def start(self):
+        import multiprocessing
+        if self.start_method:
+            context = multiprocessing.get_context(self.start_method)
+        else:
+            context = multiprocessing
+        self._control, child_control = context.Pipe()
+        authkey = os.urandom(16)
+        self._process = context.Process(
+            target=_serve, name="epoxy remote %s" % self.component,
+            args=(self.configuration, self.component, child_control,
+                  authkey, self.workers))
+        self._process.daemon = True
+        self._process.start()
+        child_control.close()
+        if not self._control.poll(self.start_timeout):
+            self._terminate()
+            raise RemoteError("Remote component '%s' did not start within "
+                              "%s seconds" % (self.component,
+                                              self.start_timeout))
+        message = self._control.recv()
+        if message[0] != 'ready':
+            self._terminate()
+            raise RemoteError("Remote component '%s' failed to start:\n%s"
+                              % (self.component, message[1]))
+        _, address, methods = message
+        self._methods = frozenset(methods)
+        self._connections = [_Connection(address, authkey)
+                             for _ in range(max(1, self.connections))]
+
+    def stop(self):
+        connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close(self.timeout)
+        if self._process is not None:
+            try:
+                self._control.send('stop')
+            except (IOError, OSError):
+                pass
+            self._process.join(self.timeout)
+            self._terminate()
+            self._process = None
+
+    def _terminate(self):
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._control.close()
@@ -0,0 +1,296 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Launching components in parallel, longest remaining path first
+
+With the ``workers`` key of the configuration, the manager launches
+components on a pool of that many threads; each component is instantiated
+and started as soon as everything it depends on has been started::
+
+    workers: 4
+    history: /var/lib/myapp/launch-history.json
+    components:
+      ...
+
+When several components are ready at once, the one with the longest
+remaining path (its own duration plus the longest chain of components
+waiting on it) is launched first.  Durations come from the ``history``
+file, in which the manager records how long the import, instantiation
+and start of each component took, averaged over recent launches.
+Components with no history are assumed to take the median of the known
+durations.
+
+The boot time for different numbers of workers can be predicted from the
+history without launching anything::
+
+    python -m epoxy.scheduling myapp.yml --history launch-history.json \\
+        --workers 1 2 4 8
+
+"""
+from __future__ import print_function
+from epoxy.utils import replace_file
+import heapq
+import json
+import os
+import threading
+
+PHASES = ('import', 'instantiate', 'start')
+
+_HISTORY_VERSION = 1
+
+
+class LaunchHistory(object):
+    """Durations of the phases of launching each component, across runs
+
+    This is a hook (see :mod:`epoxy.events`) recording the duration of
+    each phase.  Durations are smoothed over launches: each new
+    observation moves the stored duration ``weight`` of the way towards
+    it.
+
+    """
+
+    # the kinds of lifecycle event to receive
+    KINDS = PHASES
+
+    def __init__(self, path=None, weight=0.5):
+        self.path = path
+        self.weight = weight
+        self.components = {}  # name -> {phase: seconds}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            try:
+                self.load(path)
+            except (IOError, OSError, ValueError) as e:
+                # the history is only used for estimates, so launching goes
+                # ahead without it (and it is replaced when next saved)
+                from epoxy import core
+                core.log("Error: Ignoring launch history: %s", e)
+
+    def __call__(self, event):
+        if event.after and event.error is None and event.kind in PHASES:
+            self.record(event.component, event.kind, event.duration)
+
+    def record(self, name, phase, duration):
+        with self._lock:
+            phases = self.components.setdefault(name, {})
+            previous = phases.get(phase)
+            if previous is None:
+                phases[phase] = duration
+            else:
+                phases[phase] = previous + (duration - previous) * self.weight
+
+    def load(self, path):
+        """Replace the history with that saved at ``path``
+
+        Raises ValueError if the file is not a history this version of
+        epoxy can read.
+
+        """
+        with open(path) as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or \
+                data.get('version') != _HISTORY_VERSION or \
+                not isinstance(data.get('components'), dict):
+            raise ValueError("'%s' is not a version %d epoxy launch history"
+                             % (path, _HISTORY_VERSION))
+        with self._lock:
+            self.components = data['components']
+
+    def save(self, path=None):
+        """Write the history to ``path`` (by default, where it was read)"""
+        path = path or self.path
+        with self._lock:
+            data = {'version': _HISTORY_VERSION,
+                    'components': self.components}
+            temporary = '%s.%d.tmp' % (path, os.getpid())
+            with open(temporary, 'w') as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+        replace_file(temporary, path)
+
+    def durations(self):
+        """Get the total launch duration of each component with history"""
+        with self._lock:
+            return dict((name, sum(phases.values()))
+                        for name, phases in self.components.items())
+
+
+def _estimates(references, durations):
+    # the duration of each reference, using the median of the known
+    # durations for those without history
+    known = sorted(durations.values())
+    default = known[len(known) // 2] if known else 0.0
+    return dict((reference.index, durations.get(reference.name, default))
+                for reference in references)
+
+
+def _subgraph(graph, references):
+    # the dependencies and dependers of each of ``references`` within them
+    included = set(reference.index for reference in references)
+    dependencies = dict(
+        (reference.index, [x for x in graph._dependency_indices(
+            reference.index) if x in included])
+        for reference in references)
+    dependers = dict((index, []) for index in included)
+    for index, targets in dependencies.items():
+        for target in targets:
+            dependers[target].append(index)
+    return dependencies, dependers
+
+
+def critical_path_lengths(graph, references, durations):
+    """Get the longest remaining path from each of ``references``
+
+    ``references`` must be in dependency order and ``durations`` maps
+    component names to seconds.  The result maps the index of each
+    reference to its duration plus the longest chain of durations through
+    the references which depend on it.
+
+    """
+    estimates = _estimates(references, durations)
+    _, dependers = _subgraph(graph, references)
+    lengths = {}
+    for reference in reversed(references):
+        index = reference.index
+        lengths[index] = estimates[index] + max(
+            [lengths[x] for x in dependers[index]] or [0.0])
+    return lengths
+
+
+class _ReadyQueue(object):
+    # components whose dependencies are all launched, longest path first
+
+    def __init__(self, graph, references, durations):
+        self.lengths = critical_path_lengths(graph, references, durations)
+        self.dependencies, self.dependers = _subgraph(graph, references)
+        self.position = dict((reference.index, position)
+                             for position, reference in enumerate(references))
+        self.waiting = dict((index, len(targets))
+                            for index, targets in self.dependencies.items())
+        self.heap = []
+        for index, count in self.waiting.items():
+            if not count:
+                self._push(index)
+
+    def _push(self, index):
+        heapq.heappush(self.heap, (-self.lengths[index], self.position[index],
+                                   index))
+
+    def __len__(self):
+        return len(self.heap)
+
+    def pop(self):
+        return heapq.heappop(self.heap)[2]
+
+    def done(self, index):
+        for depender in self.dependers[index]:
+            self.waiting[depender] -= 1
+            if not self.waiting[depender]:
+                self._push(depender)
+
+
+def launch_scheduled(graph, references, launch, workers, durations):
+    """Call ``launch(reference)`` for each reference on ``workers`` threads
+
+    Each reference is launched once those it depends on have been, taking
+    the ready reference with the longest remaining path first.  If a
+    launch fails, the launches in progress are waited for and the first
+    error is raised.
+
+    """
+    from concurrent import futures
+    queue = _ReadyQueue(graph, references, durations)
+    by_index = dict((reference.index, reference) for reference in references)
+    executor = futures.ThreadPoolExecutor(max_workers=workers)
+    running = {}
+    error = None
+    try:
+        while True:
+            while error is None and queue and len(running) < workers:
+                index = queue.pop()
+                running[executor.submit(launch, by_index[index])] = index
+            if not running:
+                break
+            finished, _ = futures.wait(list(running),
+                                       return_when=futures.FIRST_COMPLETED)
+            for future in finished:
+                index = running.pop(future)
+                if future.exception() is not None:
+                    if error is None:
+                        error = future.exception()
+                else:
+                    queue.done(index)
+    finally:
+        executor.shutdown()
+    if error is not None:
+        raise error
+
+
+def simulate(graph, references, durations, workers):
+    """Predict launching ``references`` on ``workers`` threads
+
+    Returns the predicted total time and a list of ``(name, start,
+    finish)`` for each component, in the order they would be launched.
+
+    """
+    workers = max(1, workers)
+    estimates = _estimates(references, durations)
+    queue = _ReadyQueue(graph, references, durations)
+    by_index = dict((reference.index, reference) for reference in references)
+    now = 0.0
+    running = []  # heap of (finish time, index)
+    timeline = []
+    while queue or running:
+        while queue and len(running) < workers:
+            index = queue.pop()
+            finish = now + estimates[index]
+            heapq.heappush(running, (finish, index))
+            timeline.append((by_index[index].name, now, finish))
+        now, index = heapq.heappop(running)
+        queue.done(index)
+        # complete everything else finishing at the same moment
+        while running and running[0][0] <= now:
+            queue.done(heapq.heappop(running)[1])
+    return now, timeline
+
+
+def main(argv=None):
+    """Predict boot times: ``python -m epoxy.scheduling``"""
+    import argparse
+    from epoxy.core import ComponentGraph
+    from epoxy.configuration import load_configuration_file
+    parser = argparse.ArgumentParser(
+        description="Predict how long launching a configuration takes with "
+                    "different numbers of workers, from its launch history")
+    parser.add_argument("configuration", help="configuration file")
+    parser.add_argument("--history", required=True,
+                        help="launch history file")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1],
+                        help="numbers of workers to predict for")
+    parser.add_argument("--timeline", action="store_true",
+                        help="show when each component would be launched")
+    args = parser.parse_args(argv)
+
+    data = load_configuration_file(args.configuration)
+    components = dict(data.get('components', {}))
+    components['component_manager'] = {'class': 'epoxy.core:ComponentManager'}
+    graph = ComponentGraph.from_component_data(components)
+    deferred = graph.get_deferred()
+    references = [x for x in graph.get_ordering() if x.name not in deferred]
+    durations = LaunchHistory(args.history).durations()
+    for workers in args.workers:
+        total, timeline = simulate(graph, references, durations, workers)
+        print("%3d workers: %8.1f ms" % (workers, total * 1000))
+        if args.timeline:
+            for name, start, finish in timeline:
+                print("    %-40s %8.1f %8.1f" % (name, start * 1000,
+                                                 finish * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -6,7 +6,12 @@
 # Etherios, Inc. is a Division of Digi International.
 
 """Abstract and Concrete settings classes that may be used in applications"""
+import json
 import os
+import six
+import sys
+import threading
+import weakref
 
 NO_VALUE = object()
 
@@ -146,3 +151,159 @@ class EnvironmentSetting(BaseSetting):
 
     def decode(self, value):
         return str(value)
+
+
+class FileValue(object):
+    """The contents of a file, read when first accessed
+
+    Instances are obtained with :func:`get_file_value`, which returns the
+    same instance for every reference to the same file (and format), so
+    the contents are only ever loaded once and are shared; they must be
+    treated as read-only.  The contents are returned by :meth:`get`; for
+    convenience, indexing, iteration, ``len`` and ``in`` are passed on to
+    the contents as well.
+
+    The supported formats are:
+
+    ``json``, ``yaml``
+      The parsed document.
+    ``text``, ``bytes``
+      The contents as a string.
+    ``mmap``
+      A read-only :class:`mmap.mmap` of the file.
+    ``array``
+      A read-only :class:`memoryview` of the memory mapped file, cast to
+      the items given by ``typecode`` (as for :mod:`array`).  On Python 2,
+      an :class:`array.array` is read instead.
+
+    When no format is given it is guessed from the extension (``.json``,
+    ``.yml``/``.yaml``) or else is ``bytes``.
+
+    """
+
+    FORMATS = ('json', 'yaml', 'text', 'bytes', 'mmap', 'array')
+
+    def __init__(self, path, format=None, typecode='B'):  # @ReservedAssignment
+        if format is None:
+            extension = os.path.splitext(path)[1].lower()
+            format = {'.json': 'json', '.yml': 'yaml',
+                      '.yaml': 'yaml'}.get(extension, 'bytes')
+        if format not in self.FORMATS:
+            raise ValueError("Unknown file format '%s' for '%s' (should be "
+                             "one of %s)" % (format, path,
+                                             ", ".join(self.FORMATS)))
+        self.path = path
+        self.format = format
+        self.typecode = typecode
+        self._value = NO_VALUE
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._value is not NO_VALUE
+
+    def get(self):
+        """Get the contents of the file, loading them if necessary"""
+        value = self._value
+        if value is NO_VALUE:
+            with self._lock:
+                value = self._value
+                if value is NO_VALUE:
+                    value = self._value = self._load()
+        return value
+
+    def _load(self):
+        if self.format == 'json':
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        elif self.format == 'yaml':
+            import yaml
+            with open(self.path, 'rb') as f:
+                return yaml.safe_load(f)
+        elif self.format == 'text':
+            with open(self.path, 'r') as f:
+                return f.read()
+        elif self.format == 'bytes':
+            with open(self.path, 'rb') as f:
+                return f.read()
+        elif self.format == 'array' and sys.version_info[0] < 3:
+            import array
+            value = array.array(self.typecode)
+            with open(self.path, 'rb') as f:
+                value.fromfile(f, os.fstat(f.fileno()).st_size
+                               // value.itemsize)
+            return value
+        import mmap
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.format == 'array':
+            return memoryview(mapped).cast(self.typecode)
+        return mapped
+
+    def __getitem__(self, key):
+        return self.get()[key]
+
+    def __len__(self):
+        return len(self.get())
+
+    def __iter__(self):
+        return iter(self.get())
+
+    def __contains__(self, item):
+        return item in self.get()
+
+    def __repr__(self):
+        return "<FileValue %s (%s%s)>" % (
+            self.path, self.format, "" if self.loaded else ", not loaded")
+
+
+_file_values = weakref.WeakValueDictionary()
+_file_values_lock = threading.Lock()
+
+
+def get_file_value(path, format=None, typecode='B'):  # @ReservedAssignment
+    """Get the shared :class:`FileValue` for a file"""
+    value = FileValue(os.path.realpath(path), format, typecode)
+    key = (value.path, value.format, value.typecode)
+    with _file_values_lock:
+        existing = _file_values.get(key)
+        if existing is not None:
+            return existing
+        _file_values[key] = value
+        return value
+
+
+class FileSetting(BaseSetting):
+    """Encapsulate a setting whose value is loaded from a file
+
+    The setting is configured with either the path of the file or a
+    dictionary like ``{file: <path>, format: <format>, typecode: <code>}``
+    (which is what the ``!file`` tag produces in yaml configuration).  The
+    value is a :class:`FileValue`, which loads the file the first time it
+    is used and is shared with any other setting referring to the same
+    file.  ``format`` (and ``typecode``) given to the setting are used
+    when the configuration does not specify them.
+
+    """
+
+    def __init__(self, required=False, default=None, help="",
+                 format=None, typecode='B'):  # @ReservedAssignment
+        BaseSetting.__init__(self, required, default, help)
+        self.format = format
+        self.typecode = typecode
+
+    def encode(self, value):
+        return value.path
+
+    def decode(self, value):
+        if isinstance(value, FileValue):
+            return value
+        if isinstance(value, six.string_types):
+            value = {'file': value}
+        try:
+            path = value['file']
+        except (KeyError, TypeError):
+            raise ValueError("'%s' should be a path or a dictionary with a "
+                             "'file' key, not %r" % (self.name, value))
+        return get_file_value(path, value.get('format', self.format),
+                              value.get('typecode', self.typecode))
@@ -0,0 +1,190 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+"""Warm-start snapshots of component state
+
+A component which spends a long time in ``start()`` building state from
+data that rarely changes can have that state saved after it is first
+started and restored on later launches instead.  The component implements
+two methods::
+
+    class RouteIndex(Component):
+
+        def start(self):
+            self.index = build_index(self.routes_file)
+
+        def __epoxy_snapshot__(self):
+            return self.index
+
+        def __epoxy_restore__(self, state):
+            self.index = state
+
+and is configured with the ``snapshot`` option::
+
+    components:
+      route_index:
+        class: my.module:RouteIndex
+        settings:
+          routes_file: /etc/myapp/routes.csv
+        snapshot:
+          inputs: [/etc/myapp/routes.csv]
+
+When a matching snapshot exists, ``__epoxy_restore__`` is called *in place
+of* ``start()``.  Otherwise the component is started and the value returned
+by ``__epoxy_snapshot__`` is pickled to the snapshot directory.  Snapshots
+are keyed by the class path, the settings, the modification times (and
+sizes) of the files listed in ``inputs`` and an optional ``version``, so a
+change to any of them causes the state to be rebuilt.
+
+The snapshot directory is given by the ``directory`` option, or else by the
+``snapshot_directory`` of the :class:`~epoxy.core.ComponentManager`, or
+else by ``$EPOXY_SNAPSHOT_DIR`` (by default, ``epoxy/snapshots`` in the
+user's cache directory).  It is created readable only by its owner, and
+snapshots are neither loaded from nor saved to a directory which belongs
+to another user or which other users can write to.
+``snapshot: true`` may be used when no options are needed.
+
+"""
+from epoxy.utils import replace_file
+from six.moves import cPickle as pickle
+import errno
+import hashlib
+import json
+import os
+import re
+import stat
+import sys
+import tempfile
+
+DEFAULT_DIRECTORY = os.environ.get('EPOXY_SNAPSHOT_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or
+    os.path.join(os.path.expanduser('~'), '.cache'),
+    'epoxy', 'snapshots')
+
+
+def check_directory(directory):
+    """Raise ValueError unless only the current user can write to directory
+
+    Snapshots are unpickled, so anyone able to write one could run code in
+    the process loading it.  The registry's cache is checked the same way.
+
+    """
+    if not hasattr(os, 'getuid'):  # not a unix; rely on the default ACLs
+        return
+    info = os.stat(directory)
+    if info.st_uid != os.getuid():
+        raise ValueError("Refusing to use directory '%s' as it is not "
+                         "owned by the current user" % directory)
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise ValueError("Refusing to use directory '%s' as it is "
+                         "writable by other users" % directory)
+
+
+def supports_snapshots(component):
+    """Return True if ``component`` implements the snapshot protocol"""
+    return (hasattr(component, '__epoxy_snapshot__') and
+            hasattr(component, '__epoxy_restore__'))
+
+
+def snapshot_key(class_path, settings, inputs=(), version=None):
+    """Get the key identifying a snapshot of a component's state"""
+    files = []
+    for path in inputs:
+        try:
+            stat = os.stat(path)
+            files.append((path, stat.st_mtime, stat.st_size))
+        except OSError:
+            files.append((path, None, None))
+    data = json.dumps([class_path, settings, files, version,
+                       sys.version_info[:2]],
+                      sort_keys=True, default=repr)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class SnapshotStore(object):
+    """Snapshots stored as pickle files in a directory
+
+    Each component has at most one snapshot at a time; saving a snapshot
+    removes any older snapshots of the same component.
+
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or DEFAULT_DIRECTORY
+
+    def _prefix(self, name):
+        return re.sub(r'[^\w.-]', '_', name) + '-'
+
+    def path(self, name, key):
+        """Get the path of the snapshot of component ``name`` for ``key``"""
+        return os.path.join(self.directory,
+                            '%s%s.pickle' % (self._prefix(name), key))
+
+    def load(self, name, key):
+        """Get ``(True, state)`` for a saved snapshot or ``(False, None)``
+
+        Snapshots which cannot be read are treated as missing.  Raises
+        ValueError if the directory could have been written to by another
+        user (see :func:`check_directory`).
+
+        """
+        if not os.path.isdir(self.directory):
+            return False, None
+        check_directory(self.directory)
+        try:
+            with open(self.path(name, key), 'rb') as f:
+                return True, pickle.load(f)
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return False, None
+        except Exception:
+            return False, None
+
+    def save(self, name, key, state):
+        """Save ``state`` as the snapshot of component ``name``"""
+        try:
+            os.makedirs(self.directory, 0o700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        check_directory(self.directory)
+        path = self.path(name, key)
+        # written to a temporary file first so that a concurrent load
+        # never sees a partial snapshot
+        fd, temp_path = tempfile.mkstemp(dir=self.directory,
+                                         prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            replace_file(temp_path, path)
+        except:
+            os.remove(temp_path)
+            raise
+        for old_path in self._find(name):
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+        return path
+
+    def _find(self, name=None):
+        # paths of the snapshots of the named component (or of all)
+        if not os.path.isdir(self.directory):
+            return []
+        pattern = re.compile(
+            (re.escape(self._prefix(name)) if name is not None else '.*-') +
+            r'[0-9a-f]{40}\.pickle$')
+        return [os.path.join(self.directory, filename)
+                for filename in os.listdir(self.directory)
+                if pattern.match(filename)]
+
+    def clear(self, name=None):
+        """Remove all snapshots, or only those of the named component"""
+        for path in self._find(name):
+            os.remove(path)
@@ -0,0 +1,174 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentManager
+from six.moves.urllib.error import HTTPError
+from six.moves.urllib.request import Request, urlopen
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__), "test_admin.yml")
+
+
+class Store(Component):
+
+    def get(self, key):
+        return key
+
+
+class Service(Component):
+
+    store = Dependency()
+
+    def start(self):
+        self.store.get('x')
+
+
+class Broken(Component):
+
+    def start(self):
+        raise RuntimeError("no device")
+
+
+def make_config():
+    return YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+
+
+class TestAdminServer(unittest.TestCase):
+
+    def setUp(self):
+        self.mgr = ComponentManager()
+        self.addCleanup(self.mgr.shutdown)
+
+    def _get(self, path, method='GET'):
+        host, port = self.mgr.admin.address
+        request = Request('http://%s:%d%s' % (host, port, path),
+                          data=b'' if method == 'POST' else None)
+        response = urlopen(request, timeout=10)
+        try:
+            return json.loads(response.read().decode('utf-8'))
+        finally:
+            response.close()
+
+    def test_components(self):
+        self.mgr.start_admin()
+        self.mgr.launch_configuration(make_config())
+        components = dict((x['component'], x)
+                          for x in self._get('/components'))
+        service = components['service']
+        self.assertEqual(service['class'], 'epoxy.test.test_admin:Service')
+        self.assertEqual(service['state'], 'started')
+        self.assertEqual(sorted(service['timings']),
+                         ['import', 'instantiate', 'start'])
+        self.assertIsNone(service['size'])
+        self.assertEqual(components['component_manager']['state'],
+                         'started')
+
+        edges = self._get('/edges')
+        self.assertIn({'component': 'service', 'dependency': 'store',
+                       'target': 'store'}, edges)
+
+        calls = self._get('/statistics')['calls']
+        self.assertEqual(calls[0]['methods']['get']['count'], 1)
+
+    def test_failed_and_stopped(self):
+        config = make_config()
+        config['components']['broken'] = {
+            'class': 'epoxy.test.test_admin:Broken', 'priority': 20}
+        self.mgr.start_admin()
+        self.assertRaises(RuntimeError, self.mgr.launch_configuration, config)
+        components = dict((x['component'], x)
+                          for x in self._get('/components'))
+        self.assertEqual(components['broken']['state'], 'failed')
+        self.assertIn('no device', components['broken']['error'])
+
+        admin = self.mgr.admin
+        self.mgr.shutdown()
+        self.assertIsNone(self.mgr.admin)
+        self.assertEqual(admin._states['service'], ('stopped', None))
+
+    def test_configured(self):
+        config = make_config()
+        config['admin'] = True
+        self.mgr.launch_configuration(config)
+        self.assertIsNotNone(self.mgr.admin)
+        self.assertIn('GET /components', self._get('/'))
+        with self.assertRaises(HTTPError) as cm:
+            self._get('/missing')
+        self.assertEqual(cm.exception.code, 404)
+        cm.exception.close()
+        with self.assertRaises(HTTPError) as cm:
+            self._get('/profile')
+        self.assertEqual(cm.exception.code, 404)
+        cm.exception.close()
+
+    @unittest.skipIf(sys.version_info < (3, 4), "requires tracemalloc")
+    def test_snapshot(self):
+        self.mgr.start_admin()
+        first = self._get('/profile/snapshot?limit=3', method='POST')
+        self.assertIsNone(first['changes'])
+        second = self._get('/profile/snapshot?limit=3', method='POST')
+        self.assertLessEqual(len(second['top']), 3)
+        self.assertIsNotNone(second['changes'])
+        self.assertEqual(self._get('/profile/stop', method='POST'),
+                         {'tracing': False})
+        import tracemalloc
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @unittest.skipIf(sys.platform == 'win32', "requires unix sockets")
+    def test_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'admin.sock')
+        self.mgr.start_admin(path=path)
+        self.mgr.launch_configuration(make_config())
+        client = socket.socket(socket.AF_UNIX)
+        client.connect(path)
+        client.sendall(b'GET /components HTTP/1.0\r\n\r\n')
+        response = b''
+        while True:
+            data = client.recv(4096)
+            if not data:
+                break
+            response += data
+        client.close()
+        headers, body = response.split(b'\r\n\r\n', 1)
+        self.assertTrue(headers.startswith(b'HTTP/1.0 200'))
+        self.assertEqual(len(json.loads(body.decode('utf-8'))), 3)
+        self.mgr.shutdown()
+        self.assertFalse(os.path.exists(path))
+
+    @unittest.skipIf(sys.platform == 'win32', "requires unix sockets")
+    def test_unix_socket_path_in_use(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'admin.sock')
+        with open(path, 'w') as f:
+            f.write("precious")
+        self.assertRaises(ValueError, self.mgr.start_admin, path=path)
+        with open(path) as f:
+            self.assertEqual(f.read(), "precious")
+
+        # a socket left behind by a previous server is replaced
+        os.unlink(path)
+        stale = socket.socket(socket.AF_UNIX)
+        stale.bind(path)
+        stale.close()
+        self.mgr.start_admin(path=path)
+        self.mgr.shutdown()
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
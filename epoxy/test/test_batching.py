@@ -0,0 +1,140 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.batching import CallBatcher
+from epoxy.component import Component, Dependency
+from epoxy.core import ComponentManager
+import threading
+import unittest
+
+
+class TestSMSDriver(Component):
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+        self.result = None
+
+    def send(self, message):
+        return self.send_many([message])[0]
+
+    def send_many(self, messages):
+        if self.fail:
+            raise IOError("modem unavailable")
+        self.batches.append(list(messages))
+        if self.result is not None:
+            return self.result(messages)
+        return ["sent %s" % m for m in messages]
+
+    def status(self):
+        return "ok"
+
+
+class TestSMSService(Component):
+
+    sms_driver = Dependency()
+
+
+def make_config(batch):
+    return {
+        'components': {
+            'driver': {
+                'class': 'epoxy.test.test_batching:TestSMSDriver',
+            },
+            'service': {
+                'class': 'epoxy.test.test_batching:TestSMSService',
+                'dependencies': {
+                    'sms_driver': {
+                        'component': 'driver',
+                        'batch': batch,
+                    },
+                },
+            },
+        },
+    }
+
+
+class TestCallBatcher(unittest.TestCase):
+
+    def _launch(self, **batch):
+        batch.setdefault('method', 'send')
+        batch.setdefault('batch_method', 'send_many')
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(batch))
+        self.addCleanup(mgr.shutdown)
+        return (mgr, mgr.components['service'].sms_driver,
+                mgr.components['driver'])
+
+    def test_batching_from_many_callers(self):
+        mgr, batcher, driver = self._launch(max_batch_size=10, max_delay=1)
+        self.assertIsInstance(batcher, CallBatcher)
+        futures = {}
+
+        def send(i):
+            futures[i] = batcher.send(i)
+
+        threads = [threading.Thread(target=send, args=(i,))
+                   for i in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for i in range(30):
+            self.assertEqual(futures[i].result(timeout=5), "sent %d" % i)
+        self.assertEqual(len(driver.batches), 3)
+        self.assertEqual(sorted(sum(driver.batches, [])), list(range(30)))
+
+    def test_max_delay(self):
+        # a partial batch waits for more calls, but is sent without them
+        mgr, batcher, driver = self._launch(max_batch_size=100,
+                                            max_delay=0.5)
+        first = batcher.send("a")
+        second = batcher.send("b")
+        self.assertEqual(first.result(timeout=5), "sent a")
+        self.assertEqual(second.result(timeout=5), "sent b")
+        self.assertEqual(driver.batches, [["a", "b"]])
+
+    def test_flush_on_shutdown(self):
+        mgr, batcher, driver = self._launch(max_batch_size=100,
+                                            max_delay=60)
+        futures = [batcher.send(i) for i in range(5)]
+        mgr.shutdown()
+        self.assertEqual([f.result(timeout=0) for f in futures],
+                         ["sent %d" % i for i in range(5)])
+        with self.assertRaises(RuntimeError):
+            batcher.send("late")
+
+    def test_batch_failure(self):
+        mgr, batcher, driver = self._launch(max_delay=0)
+        driver.fail = True
+        with self.assertRaises(IOError):
+            batcher.send("a").result(timeout=5)
+
+    def test_bad_batch_results(self):
+        mgr, batcher, driver = self._launch(max_delay=0)
+        for result in (len, lambda messages: messages[1:]):
+            driver.result = result
+            with self.assertRaises(TypeError):
+                batcher.send("a").result(timeout=5)
+        # the batcher is still running
+        driver.result = None
+        self.assertEqual(batcher.send("b").result(timeout=5), "sent b")
+
+    def test_passthrough(self):
+        mgr, batcher, driver = self._launch()
+        self.assertEqual(batcher.status(), "ok")
+
+    def test_missing_target(self):
+        config = make_config({'method': 'send', 'batch_method': 'send_many'})
+        config['components']['service']['dependencies']['sms_driver'][
+            'component'] = 'missing'
+        with self.assertRaises(ValueError):
+            ComponentManager().launch_configuration(config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,9 @@
 # Etherios, Inc. is a Division of Digi International.
 
 from epoxy.component import Component, Dependency
+from epoxy.core import ComponentManager
 from epoxy.settings import StringSetting
+import pickle
 import unittest
 
 
@@ -64,5 +66,22 @@ class TestComponent(unittest.TestCase):
             TestRequiredSettingComponent.from_dependencies()
 
 
+    def test_pickle(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration({'components': {
+            'a': {'class': 'epoxy.test.test_component:'
+                           'TestRequiredSettingComponent',
+                  'settings': {'setting': 'value'}},
+            'b': {'class': 'epoxy.test.test_component:'
+                           'TestDependencyComponent',
+                  'dependencies': {'next': 'a'}},
+        }})
+        b = pickle.loads(pickle.dumps(mgr.components['b']))
+        self.assertTrue(b.is_started)
+        self.assertEqual(b.next.setting, 'value')
+        # the copy has its own launch lock, and is already launched
+        self.assertIsNot(b._launch_lock, mgr.components['b']._launch_lock)
+        b.launch()
+
 if __name__ == '__main__':
     unittest.main()
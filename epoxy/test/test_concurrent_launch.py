@@ -0,0 +1,137 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentManager
+from epoxy.settings import StringSetting
+import os
+import threading
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__),
+                           "test_concurrent_launch.yml")
+
+
+class Meeting(object):
+    """Check that the named components start at the same time"""
+
+    def __init__(self, names, timeout=5.0):
+        self.arrivals = dict((name, threading.Event()) for name in names)
+        self.timeout = timeout
+        self.met = {}
+
+    def arrive(self, name):
+        self.arrivals[name].set()
+        self.met[name] = all(x.wait(self.timeout)
+                             for x in self.arrivals.values())
+
+
+class CountingComponent(Component):
+
+    instantiations = {}
+    starts = {}
+    lock = threading.Lock()
+    meeting = None
+
+    previous = Dependency(required=False)
+    other = Dependency(required=False)
+
+    name = StringSetting(required=True)
+
+    def __init__(self):
+        self.started = False
+        with self.lock:
+            self.instantiations[self.name] = \
+                self.instantiations.get(self.name, 0) + 1
+
+    def start(self):
+        for dep in (self.previous, self.other):
+            if dep is not None:
+                assert dep.started, "%s started before %s" % (self.name,
+                                                             dep.name)
+        meeting = self.meeting
+        if meeting is not None and self.name in meeting.arrivals:
+            meeting.arrive(self.name)
+        with self.lock:
+            self.starts[self.name] = self.starts.get(self.name, 0) + 1
+        self.started = True
+
+    def main(self):
+        return self.name
+
+
+def make_config():
+    return YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+
+
+class TestConcurrentLaunch(unittest.TestCase):
+
+    def setUp(self):
+        CountingComponent.instantiations.clear()
+        CountingComponent.starts.clear()
+        self.addCleanup(setattr, CountingComponent, 'meeting', None)
+
+    def _launch_in_threads(self, mgr, config, entry_points):
+        barrier = threading.Event()
+        results = {}
+        errors = []
+
+        def run(entry_point):
+            barrier.wait()
+            try:
+                results[entry_point] = mgr.launch_subgraph(config, entry_point)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(ep,))
+                   for ep in entry_points]
+        for thread in threads:
+            thread.start()
+        barrier.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_overlapping_subgraphs_once_only(self):
+        for _ in range(20):
+            CountingComponent.instantiations.clear()
+            CountingComponent.starts.clear()
+            mgr = ComponentManager()
+            config = make_config()
+            entry_points = ['x9:main', 'y9:main', 'join:main', 'x5:main'] * 4
+            results = self._launch_in_threads(mgr, config, entry_points)
+            self.assertEqual(results['join:main'], 'join')
+            self.assertEqual(set(CountingComponent.instantiations.values()),
+                             set([1]))
+            self.assertEqual(CountingComponent.instantiations,
+                             CountingComponent.starts)
+            self.assertEqual(len(CountingComponent.starts), 22)
+
+    def test_settings_isolated_between_instances(self):
+        mgr = ComponentManager()
+        self._launch_in_threads(mgr, make_config(),
+                                ['x9:main', 'y9:main'])
+        for name, component in mgr.components.items():
+            if name != 'component_manager':
+                self.assertEqual(component.name, name)
+
+    def test_disjoint_subgraphs_run_in_parallel(self):
+        # a component of each chain waits for one of the other to start,
+        # which never happens if the chains are launched one at a time
+        mgr = ComponentManager()
+        config = make_config()
+        mgr.launch_subgraph(config, 'root:main')
+        CountingComponent.meeting = Meeting(['x5', 'y5'])
+        self._launch_in_threads(mgr, config, ['x9:main', 'y9:main'])
+        self.assertEqual(CountingComponent.meeting.met,
+                         {'x5': True, 'y5': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,9 +6,14 @@
 # Etherios, Inc. is a Division of Digi International.
 
 from epoxy.component import Component, Dependency
-from epoxy.configuration import YamlConfigurationLoader
+from epoxy.configuration import YamlConfigurationLoader, \
+    JsonConfigurationLoader, MarshalConfigurationLoader, \
+    compile_configuration, load_configuration_file
 from epoxy.core import ComponentManager
+from epoxy.settings import FileSetting
 import os
+import shutil
+import tempfile
 import unittest
 
 
@@ -16,6 +21,10 @@ class TestDependencyComponent(Component):
     next = Dependency(required=False)
 
 
+class TestFileComponent(Component):
+    table = FileSetting()
+
+
 class TestConfiguration(unittest.TestCase):
 
     def test_configuration_extension(self):
@@ -29,5 +38,133 @@ class TestConfiguration(unittest.TestCase):
 
         self.assertEqual(b.next, a)
 
+    def test_json_configuration_extension(self):
+        json_loader = JsonConfigurationLoader(
+            os.path.join(os.path.dirname(__file__),
+                         "test_configuration_child.json"))
+        yaml_loader = YamlConfigurationLoader(
+            os.path.join(os.path.dirname(__file__),
+                         "test_configuration_child.yml"))
+        self.assertEqual(json_loader.load_configuration()['components'],
+                         yaml_loader.load_configuration()['components'])
+
+    def test_compiled_configuration(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        compiled = os.path.join(tmpdir, "config.epoxyc")
+        yaml_loader = YamlConfigurationLoader(
+            os.path.join(os.path.dirname(__file__),
+                         "test_configuration_child.yml"))
+        compile_configuration(yaml_loader, compiled)
+
+        data = MarshalConfigurationLoader(compiled).load_configuration()
+        self.assertNotIn('extends', data)
+        self.assertEqual(data['components'],
+                         yaml_loader.load_configuration()['components'])
+
+        mgr = ComponentManager()
+        mgr.launch_configuration(data)
+        self.assertEqual(mgr.components["b"].next, mgr.components["a"])
+
+    def test_load_configuration_file(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        yaml_path = os.path.join(os.path.dirname(__file__),
+                                 "test_configuration_child.yml")
+        json_path = os.path.join(os.path.dirname(__file__),
+                                 "test_configuration_child.json")
+        compiled = os.path.join(tmpdir, "config.epoxyc")
+        expected = YamlConfigurationLoader(yaml_path).load_configuration()
+        compile_configuration(YamlConfigurationLoader(yaml_path), compiled)
+        for path in (yaml_path, json_path, compiled):
+            self.assertEqual(load_configuration_file(path)['components'],
+                             expected['components'])
+
+    def _check_include(self, loader):
+        mgr = ComponentManager()
+        mgr.launch_configuration(loader.load_configuration())
+        a, b, c, d = [mgr.components[x] for x in "abcd"]
+        self.assertEqual(a.next, None)
+        self.assertEqual(b.next, a)
+        self.assertEqual(c.next, b)
+        self.assertEqual(d.next, c)
+
+    def test_include(self):
+        self._check_include(YamlConfigurationLoader(
+            os.path.join(os.path.dirname(__file__),
+                         "test_configuration_include.yml")))
+
+    def test_include_processes(self):
+        self._check_include(YamlConfigurationLoader(
+            os.path.join(os.path.dirname(__file__),
+                         "test_configuration_include.yml"),
+            include_executor="process", include_workers=2))
+
+    def test_compiled_include(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        compiled = os.path.join(tmpdir, "config.epoxyc")
+        compile_configuration(YamlConfigurationLoader(
+            os.path.join(os.path.dirname(__file__),
+                         "test_configuration_include.yml")), compiled)
+        loader = MarshalConfigurationLoader(compiled)
+        self.assertNotIn('include', loader.load_configuration())
+        self._check_include(loader)
+
+    def test_include_duplicate_component(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        for name in ("one", "two"):
+            with open(os.path.join(tmpdir, "frag-%s.json" % name), "w") as f:
+                f.write('{"components": {"a": {"class": "x:Y"}}}')
+        with open(os.path.join(tmpdir, "main.json"), "w") as f:
+            f.write('{"include": ["frag-*.json"]}')
+        loader = JsonConfigurationLoader(os.path.join(tmpdir, "main.json"))
+        with self.assertRaises(ValueError) as cm:
+            loader.load_configuration()
+        self.assertIn("'a'", str(cm.exception))
+        self.assertIn("one.json", str(cm.exception))
+        self.assertIn("two.json", str(cm.exception))
+
+    def test_compiled_configuration_bad_header(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        compiled = os.path.join(tmpdir, "config.epoxyc")
+        with open(compiled, "wb") as f:
+            f.write(b"EPOXY00\n")
+        with self.assertRaises(ValueError):
+            MarshalConfigurationLoader(compiled).load_configuration()
+
+    def test_file_tag(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        os.mkdir(os.path.join(tmpdir, "tables"))
+        with open(os.path.join(tmpdir, "tables", "routes.json"), "w") as f:
+            f.write('{"a": "b"}')
+        with open(os.path.join(tmpdir, "main.yml"), "w") as f:
+            f.write("components:\n"
+                    "  one:\n"
+                    "    class: epoxy.test.test_configuration:"
+                    "TestFileComponent\n"
+                    "    settings:\n"
+                    "      table: !file tables/routes.json\n"
+                    "  two:\n"
+                    "    class: epoxy.test.test_configuration:"
+                    "TestFileComponent\n"
+                    "    settings:\n"
+                    "      table: !file {file: tables/routes.json, "
+                    "format: json}\n")
+        config = YamlConfigurationLoader(
+            os.path.join(tmpdir, "main.yml")).load_configuration()
+        self.assertEqual(
+            config['components']['one']['settings']['table'],
+            {'file': os.path.join(tmpdir, "tables/routes.json")})
+        mgr = ComponentManager()
+        mgr.launch_configuration(config)
+        one = mgr.components["one"]
+        self.assertIs(one.table, mgr.components["two"].table)
+        self.assertEqual(one.table["a"], "b")
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -167,6 +167,37 @@ class TestDependencyGraphResolution(unittest.TestCase):
         self.assertEqual(c.name, 'charles')
         self.assertEqual(d.name, 'daniel')
 
+    def test_graph_edges(self):
+        graph = self.mgr.build_component_graph(self.loader.load_configuration())
+        edges = set((a.name, b.name) for a, b in graph.edges)
+        self.assertEqual(edges, set([("b", "a"), ("c", "a"), ("d", "c")]))
+
+    def test_graph_priority_ordering(self):
+        configuration = self.loader.load_configuration()
+        configuration['components']['c']['priority'] = 1
+        graph = self.mgr.build_component_graph(configuration)
+        o = [x.name for x in graph.get_ordering()]
+        self.assertEqual(o[:2], ["a", "c"])
+
+    def test_reference_slots(self):
+        graph = self.mgr.build_component_graph(self.loader.load_configuration())
+        self.assertFalse(hasattr(graph.nodes["a"], "__dict__"))
+
+    def test_compact(self):
+        configuration = self.loader.load_configuration()
+        self.mgr.launch_subgraph(configuration, 'c:main')
+        a = self.mgr.components["a"]
+        c = self.mgr.components["c"]
+        self.assertTrue(self.mgr.compact())
+        self.assertIsNone(self.mgr.graph)
+        self.assertIs(self.mgr.components["a"], a)
+
+        # launching again rebuilds the graph but reuses what exists
+        self.mgr.launch_subgraph(configuration, 'd:main')
+        d = self.mgr.components["d"]
+        self.assertIs(d.previous, c)
+        self.assertIs(self.mgr.components["a"], a)
+
 
 if __name__ == '__main__':
     unittest.main()
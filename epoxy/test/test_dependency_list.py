@@ -5,10 +5,16 @@
 # Copyright (c) 2014 Etherios, Inc. All rights reserved.
 # Etherios, Inc. is a Division of Digi International.
 
-from epoxy.component import Component, Dependency, ComponentList
+from epoxy.component import Component, Dependency, ComponentList, \
+    LazyComponentList
 from epoxy.configuration import YamlConfigurationLoader
 from epoxy.core import ComponentManager
+from epoxy.proxies import InstrumentedProxy
+from concurrent import futures
 import os
+import sys
+import threading
+import time
 import unittest
 
 
@@ -20,6 +26,38 @@ class TestDependencyListComponent(Component):
         return True
 
 
+class TestPlugin(Component):
+
+    helper = Dependency(required=False)
+
+    def __init__(self):
+        self.started = False
+
+    def start(self):
+        if self.helper is not None:
+            assert self.helper.started
+        self.started = True
+
+    def whoami(self):
+        return self
+
+
+class TestListUser(TestPlugin):
+    """A member of a lazy list which uses another member while starting"""
+
+    host = Dependency()
+
+    def start(self):
+        self.neighbour = self.host.others[1]
+        TestPlugin.start(self)
+
+
+def make_lazy_config():
+    return YamlConfigurationLoader(os.path.join(
+        os.path.dirname(__file__),
+        "test_dependency_list_lazy.yml")).load_configuration()
+
+
 class TestDependencyList(unittest.TestCase):
 
     def test_dependency_list(self):
@@ -77,6 +115,201 @@ class TestDependencyList(unittest.TestCase):
         with self.assertRaises(ValueError):
             ComponentList.from_dependencies(dependency_list=['a'],
                                             a=1, b=2)
+    def test_lazy_dependency_list(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_lazy_config())
+        others = mgr.components["host"].others
+        self.assertIsInstance(others, LazyComponentList)
+        self.assertEqual(len(others), 3)
+
+        # only components needed by something other than the lazy list
+        # have been built
+        self.assertEqual(sorted(x for x in mgr.components
+                                if not x.startswith('__')),
+                         ['component_manager', 'host', 'other'])
+
+        p1 = others[1]
+        self.assertTrue(p1.started)
+        self.assertTrue(p1.helper.started)
+        self.assertIs(mgr.components["p1"], p1)
+        self.assertFalse(others.is_materialized(0))
+        self.assertNotIn("p0", mgr.components)
+
+        p2 = others[-1]
+        self.assertTrue(p2.helper.started)
+        self.assertIs(others[0], p2.helper)
+
+        self.assertEqual(list(others), [others[0], p1, p2])
+        self.assertEqual(list(reversed(others)), [p2, p1, others[0]])
+        self.assertEqual(others.index(p2), 2)
+        self.assertEqual(others.count(p1), 1)
+        self.assertEqual(others[1:], [p1, p2])
+        with self.assertRaises(IndexError):
+            others[3]
+
+    def test_lazy_dependency_list_compact(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_lazy_config())
+        self.assertFalse(mgr.compact())
+        self.assertIsNotNone(mgr.graph)
+        self.assertIs(mgr.components["host"].others[1],
+                      mgr.components["p1"])
+
+    def test_lazy_list_member_options(self):
+        config = make_lazy_config()
+        config['components']['p0'].update({'instrument': True,
+                                           'swappable': True})
+        mgr = ComponentManager()
+        mgr.launch_configuration(config)
+        self.addCleanup(mgr.shutdown)
+        others = mgr.components["host"].others
+        self.assertIsInstance(others[0], InstrumentedProxy)
+        self.assertIs(others[0].whoami(), mgr.components["p0"])
+        statistics, = mgr.get_call_statistics()
+        self.assertEqual(statistics['dependency'], 'p0')
+        self.assertEqual(statistics['methods']['whoami']['count'], 1)
+
+        # the list holds the handle, so sees the replacement
+        new = mgr.swap("p0")
+        self.assertIs(others[0].whoami(), new)
+
+    def test_lazy_list_used_by_member(self):
+        config = make_lazy_config()
+        config['components']['p0'] = {
+            'class': 'epoxy.test.test_dependency_list:TestListUser',
+            'dependencies': {'host': 'host'},
+        }
+        mgr = ComponentManager()
+        mgr.launch_configuration(config)
+        self.addCleanup(mgr.shutdown)
+        # host is only needed by its (lazy) member so is launched on demand
+        others = mgr.launch_component("host").others
+        thread = threading.Thread(target=others.__getitem__, args=(0,))
+        thread.daemon = True
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertIs(others[0].neighbour, others[1])
+
+    def test_lazy_list_member_needed_eagerly(self):
+        config = make_lazy_config()
+        config['components']['other']['dependencies'] = {'helper': 'p2'}
+        mgr = ComponentManager()
+        mgr.launch_configuration(config)
+        self.assertIn("p2", mgr.components)
+        self.assertIn("p0", mgr.components)
+        self.assertNotIn("p1", mgr.components)
+        self.assertIs(mgr.components["host"].others[2], mgr.components["p2"])
+
+
+class Shard(object):
+
+    def __init__(self, name, delay=0.0, error=None, release=None,
+                 arrivals=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.release = release  # an event to wait for
+        self.arrivals = arrivals  # {name: event} of shards to wait for
+        self.met_others = None
+        self.finished = False
+
+    def query(self, suffix, upper=False):
+        time.sleep(self.delay)
+        if self.release is not None:
+            self.release.wait(5)
+        if self.arrivals is not None:
+            self.arrivals[self.name].set()
+            self.met_others = all(x.wait(5) for x in self.arrivals.values())
+        self.finished = True
+        if self.error is not None:
+            raise self.error
+        result = self.name + suffix
+        return result.upper() if upper else result
+
+
+class TestBroadcast(unittest.TestCase):
+
+    def test_results_in_member_order(self):
+        shards = ComponentList([Shard('a', 0.05), Shard('b'), Shard('c', 0.02)])
+        self.assertEqual(shards.broadcast('query', '!', upper=True),
+                         ['A!', 'B!', 'C!'])
+        self.assertEqual(ComponentList([]).broadcast('query', '!'), [])
+
+    def test_calls_are_concurrent(self):
+        # each shard waits for all the others to be called
+        arrivals = dict((str(i), threading.Event()) for i in range(5))
+        shards = ComponentList([Shard(name, arrivals=arrivals)
+                                for name in sorted(arrivals)])
+        shards.broadcast('query', '')
+        self.assertEqual([shard.met_others for shard in shards], [True] * 5)
+
+    def test_first_error(self):
+        error = ValueError("shard down")
+        release = threading.Event()
+        self.addCleanup(release.set)
+        shards = ComponentList([Shard('a', release=release),
+                                Shard('b', error=error)])
+        with self.assertRaises(ValueError):
+            shards.broadcast('query', '')
+        # raised without waiting for the other call to finish
+        self.assertFalse(shards[0].finished)
+
+    def test_collect_all(self):
+        error = ValueError("shard down")
+        shards = ComponentList([Shard('a'), Shard('b', error=error)])
+        self.assertEqual(shards.broadcast('query', '', return_exceptions=True),
+                         ['a', error])
+
+    def test_timeout(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        shards = ComponentList([Shard('a'), Shard('b', release=release)])
+        with self.assertRaises(futures.TimeoutError):
+            shards.broadcast('query', '', timeout=0.05)
+        results = shards.broadcast('query', '', timeout=0.05,
+                                   return_exceptions=True)
+        self.assertEqual(results[0], 'a')
+        self.assertIsInstance(results[1], futures.TimeoutError)
+
+    def test_executor(self):
+        shards = ComponentList([Shard('a'), Shard('b')])
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(
+                shards.broadcast('query', '?', executor=executor),
+                ['a?', 'b?'])
+
+    @unittest.skipIf(sys.version_info < (3, 5), "requires async def")
+    def test_broadcast_async(self):
+        import asyncio
+        namespace = {}
+        exec("class AsyncShard(object):\n"
+             "    async def query(self, suffix):\n"
+             "        return 'async' + suffix\n", namespace)
+
+        error = ValueError("shard down")
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            shards = ComponentList([Shard('a', 0.02), Shard('b'),
+                                    namespace['AsyncShard']()])
+            self.assertEqual(
+                loop.run_until_complete(shards.broadcast_async('query', '!')),
+                ['a!', 'b!', 'async!'])
+            shards = ComponentList([Shard('a'), Shard('b', error=error)])
+            self.assertEqual(
+                loop.run_until_complete(shards.broadcast_async(
+                    'query', '', return_exceptions=True)),
+                ['a', error])
+            with self.assertRaises(ValueError):
+                loop.run_until_complete(shards.broadcast_async('query', ''))
+            shards = ComponentList([Shard('a', 0.3)])
+            with self.assertRaises(asyncio.TimeoutError):
+                loop.run_until_complete(
+                    shards.broadcast_async('query', '', timeout=0.05))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
 
 if __name__ == '__main__':
     unittest.main()
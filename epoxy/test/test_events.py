@@ -0,0 +1,131 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentManager
+import os
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__), "test_events.yml")
+
+
+class EventComponent(Component):
+
+    other = Dependency(required=False)
+
+    def __init__(self):
+        self.calls = []
+
+    def start(self):
+        self.calls.append('start')
+
+    def stop(self):
+        self.calls.append('stop')
+
+
+class ReloadableComponent(EventComponent):
+
+    def reload(self):
+        self.calls.append('reload')
+
+
+class FailingComponent(Component):
+
+    def start(self):
+        raise RuntimeError("no")
+
+
+def make_config():
+    return YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+
+
+class TestLifecycleEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.mgr = ComponentManager()
+
+    def record(self, event):
+        self.events.append(event)
+
+    def _summary(self):
+        return [("after" if e.after else "before", e.kind, e.component)
+                for e in self.events]
+
+    def test_launch_and_shutdown(self):
+        self.mgr.add_hook(self.record)
+        self.mgr.launch_configuration(make_config())
+        self.mgr.shutdown()
+        summary = self._summary()
+        self.assertEqual(summary[:2], [("before", "graph", None),
+                                       ("after", "graph", None)])
+        self.assertEqual(summary[2:], [
+            ("before", "import", "a"), ("after", "import", "a"),
+            ("before", "instantiate", "a"), ("after", "instantiate", "a"),
+            ("before", "import", "b"), ("after", "import", "b"),
+            ("before", "instantiate", "b"), ("after", "instantiate", "b"),
+            ("before", "start", "a"), ("after", "start", "a"),
+            ("before", "start", "b"), ("after", "start", "b"),
+            ("before", "stop", "b"), ("after", "stop", "b"),
+            ("before", "stop", "a"), ("after", "stop", "a"),
+        ])
+        for event in self.events:
+            if event.after:
+                self.assertGreaterEqual(event.duration, 0)
+                self.assertIsNone(event.error)
+            else:
+                self.assertIsNone(event.duration)
+
+    def test_kinds_and_remove(self):
+        self.mgr.add_hook(self.record, kinds=['start'])
+        self.mgr.launch_configuration(make_config())
+        self.assertEqual(set(e.kind for e in self.events), set(['start']))
+        self.mgr.remove_hook(self.record)
+        self.mgr.shutdown()
+        self.assertEqual(len(self.events), 4)
+
+    def test_error(self):
+        self.mgr.add_hook(self.record, kinds=['start'])
+        self.assertRaises(RuntimeError, self.mgr.launch_configuration, {
+            'components': {
+                'f': {'class': 'epoxy.test.test_events:FailingComponent'},
+            }})
+        self.assertIsInstance(self.events[-1].error, RuntimeError)
+        self.assertEqual(self.events[-1].component, 'f')
+
+    def test_failing_hook_ignored(self):
+        def bad_hook(event):
+            raise ValueError("oops")
+        self.mgr.add_hook(bad_hook)
+        self.mgr.add_hook(self.record)
+        self.mgr.launch_configuration(make_config())
+        self.assertEqual(len(self.mgr.components), 3)
+        self.assertTrue(self.events)
+
+    def test_reload(self):
+        self.mgr.launch_configuration(make_config())
+        self.mgr.add_hook(self.record)
+        a = self.mgr.components['a']
+        b = self.mgr.components['b']
+        self.mgr.reload_component('a')
+        self.mgr.reload_component('b')
+        self.assertEqual(a.calls, ['start', 'stop', 'start'])
+        self.assertEqual(b.calls, ['start', 'reload'])
+        self.assertIs(b.other, a)
+        self.assertEqual(self._summary(), [
+            ("before", "reload", "a"), ("after", "reload", "a"),
+            ("before", "reload", "b"), ("after", "reload", "b"),
+        ])
+
+    def test_no_hooks(self):
+        self.mgr.launch_configuration(make_config())
+        self.assertEqual(self.mgr.components['b'].calls, ['start'])
+
+
+if __name__ == '__main__':
+    unittest.main()
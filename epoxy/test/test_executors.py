@@ -0,0 +1,154 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.core import ComponentManager
+from epoxy.executors import OffloadAdapter, ProcessPoolComponent, \
+    ThreadPoolComponent
+from concurrent.futures import Future
+import os
+import threading
+import unittest
+
+
+def square(x):
+    return x * x
+
+
+class TestStorage(Component):
+
+    def read(self, key):
+        return (key, threading.current_thread().name)
+
+    def size(self):
+        return 10
+
+    def pid(self):
+        return os.getpid()
+
+
+class TestUser(Component):
+
+    executor = Dependency(required=False)
+    storage = Dependency(required=False)
+
+
+class TestExecutorComponents(unittest.TestCase):
+
+    def test_thread_pool_lifecycle(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration({
+            'components': {
+                'pool': {
+                    'class': 'epoxy.executors:ThreadPoolComponent',
+                    'settings': {'max_workers': 2,
+                                 'thread_name_prefix': 'testpool'},
+                },
+                'user': {
+                    'class': 'epoxy.test.test_executors:TestUser',
+                    'dependencies': {'executor': 'pool'},
+                },
+            },
+        })
+        pool = mgr.components['user'].executor
+        self.assertIsInstance(pool, ThreadPoolComponent)
+        self.assertEqual(pool.submit(square, 3).result(timeout=5), 9)
+        self.assertEqual(list(pool.map(square, [1, 2, 3])), [1, 4, 9])
+        mgr.shutdown()
+        with self.assertRaises(RuntimeError):
+            pool.submit(square, 3)
+
+    def test_process_pool(self):
+        pool = ProcessPoolComponent.from_dependencies(max_workers=1)
+        pool.start()
+        try:
+            self.assertEqual(pool.submit(square, 4).result(timeout=30), 16)
+        finally:
+            pool.stop()
+
+    def test_offload(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration({
+            'components': {
+                'pool': {
+                    'class': 'epoxy.executors:ThreadPoolComponent',
+                    'settings': {'thread_name_prefix': 'offload'},
+                },
+                'storage': {
+                    'class': 'epoxy.test.test_executors:TestStorage',
+                },
+                'user': {
+                    'class': 'epoxy.test.test_executors:TestUser',
+                    'dependencies': {
+                        'storage': {
+                            'component': 'storage',
+                            'offload': {
+                                'executor': 'pool',
+                                'methods': ['read'],
+                            },
+                        },
+                    },
+                },
+            },
+        })
+        self.addCleanup(mgr.shutdown)
+        storage = mgr.components['user'].storage
+        self.assertIsInstance(storage, OffloadAdapter)
+        future = storage.read("key")
+        self.assertIsInstance(future, Future)
+        key, thread_name = future.result(timeout=5)
+        self.assertEqual(key, "key")
+        self.assertTrue(thread_name.startswith("offload"))
+        self.assertEqual(storage.size(), 10)
+
+    def test_offload_to_process_pool(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration({
+            'components': {
+                'pool': {
+                    'class': 'epoxy.executors:ProcessPoolComponent',
+                    'settings': {'max_workers': 1},
+                },
+                'storage': {
+                    'class': 'epoxy.test.test_executors:TestStorage',
+                },
+                'user': {
+                    'class': 'epoxy.test.test_executors:TestUser',
+                    'dependencies': {
+                        'storage': {
+                            'component': 'storage',
+                            'offload': {'executor': 'pool'},
+                        },
+                    },
+                },
+            },
+        })
+        self.addCleanup(mgr.shutdown)
+        storage = mgr.components['user'].storage
+        self.assertEqual(storage.size().result(timeout=30), 10)
+        self.assertNotEqual(storage.pid().result(timeout=30), os.getpid())
+
+    def test_offload_requires_executor(self):
+        with self.assertRaises(ValueError):
+            ComponentManager().launch_configuration({
+                'components': {
+                    'storage': {
+                        'class': 'epoxy.test.test_executors:TestStorage',
+                    },
+                    'user': {
+                        'class': 'epoxy.test.test_executors:TestUser',
+                        'dependencies': {
+                            'storage': {'component': 'storage',
+                                        'offload': {'methods': ['read']}},
+                        },
+                    },
+                },
+            })
+
+
+if __name__ == '__main__':
+    unittest.main()
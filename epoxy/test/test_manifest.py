@@ -0,0 +1,139 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.manifest import build_manifest, load_manifest, main, \
+    save_manifest, validate_configuration
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+MODULE_SOURCE = '''
+from epoxy.component import Component, Dependency
+from epoxy.settings import IntegerSetting, ListSetting, StringSetting
+
+
+class Store(Component):
+    path = StringSetting(required=True)
+    size = IntegerSetting(default=10)
+
+
+class Service(Component):
+    store = Dependency()
+    cache = Dependency(required=False)
+    names = ListSetting(default=[])
+'''
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory,
+                               'manifest_components.py'), 'w') as f:
+            f.write(MODULE_SOURCE)
+        sys.path.insert(0, self.directory)
+
+    def tearDown(self):
+        sys.path.remove(self.directory)
+        sys.modules.pop('manifest_components', None)
+        shutil.rmtree(self.directory)
+
+    def _config(self):
+        return {'components': {
+            'store': {'class': 'manifest_components:Store',
+                      'settings': {'path': '/tmp/x', 'size': '20'}},
+            'service': {'class': 'manifest_components:Service',
+                        'dependencies': {'store': 'store'}},
+            'pool': {'class': 'manifest_components:Service', 'replicas': 2,
+                     'dependencies': {'store': {'component': 'store',
+                                                'instrument': True}}},
+        }}
+
+    def _manifest(self):
+        manifest = build_manifest(['manifest_components:Service',
+                                   'manifest_components:Store'])
+        sys.modules.pop('manifest_components')
+        return manifest
+
+    def test_valid(self):
+        manifest = self._manifest()
+        self.assertEqual(validate_configuration(self._config(), manifest), [])
+        self.assertNotIn('manifest_components', sys.modules)
+        store = manifest['classes']['manifest_components:Store']
+        self.assertEqual(store['settings']['size'],
+                         {'type': 'epoxy.settings:IntegerSetting',
+                          'required': False, 'default': 10, 'help': ''})
+
+    def test_errors(self):
+        config = self._config()
+        components = config['components']
+        del components['store']['settings']['path']
+        components['store']['settings']['size'] = 'big'
+        components['store']['settings']['colour'] = 'red'
+        components['service']['dependencies'] = {'cache': 'missing',
+                                                 'other': 'store'}
+        components['extra'] = {'class': 'elsewhere:Thing'}
+        errors = validate_configuration(config, self._manifest())
+        self.assertNotIn('manifest_components', sys.modules)
+        self.assertEqual(errors[:6], [
+            "extra: class 'elsewhere:Thing' is not in the manifest",
+            "service: 'other' is not a dependency of "
+            "'manifest_components:Service'",
+            "service: required dependency 'store' is missing",
+            "store: 'colour' is not a setting of 'manifest_components:Store'",
+            "store: setting 'size' has an invalid value 'big' (invalid "
+            "literal for int() with base 10: 'big')",
+            "store: required setting 'path' is missing",
+        ])
+        self.assertEqual(len(errors), 7)
+        self.assertIn("'missing'", errors[6])
+
+    def test_update_reuses_fresh_entries(self):
+        manifest = self._manifest()
+        manifest['classes']['manifest_components:Store']['help'] = 'cached'
+        updated = build_manifest(['manifest_components:Store'],
+                                 previous=manifest)
+        self.assertNotIn('manifest_components', sys.modules)
+        self.assertEqual(
+            updated['classes']['manifest_components:Store']['help'], 'cached')
+        os.utime(os.path.join(self.directory, 'manifest_components.py'),
+                 (1000000000, 1000000000))
+        updated = build_manifest(['manifest_components:Store'],
+                                 previous=manifest)
+        self.assertNotIn(
+            'help', updated['classes']['manifest_components:Store'])
+
+    def test_command_line(self):
+        config_path = os.path.join(self.directory, 'app.json')
+        manifest_path = os.path.join(self.directory, 'manifest.json')
+        with open(config_path, 'w') as f:
+            json.dump(self._config(), f)
+        self.assertEqual(main(['build', config_path, '-o', manifest_path]), 0)
+        self.assertEqual(sorted(load_manifest(manifest_path)['classes']),
+                         ['manifest_components:Service',
+                          'manifest_components:Store'])
+        sys.modules.pop('manifest_components')
+        self.assertEqual(main(['check', config_path, '-m', manifest_path]), 0)
+        self.assertNotIn('manifest_components', sys.modules)
+
+        config = self._config()
+        del config['components']['store']['settings']['path']
+        with open(config_path, 'w') as f:
+            json.dump(config, f)
+        self.assertEqual(main(['check', config_path, '-m', manifest_path]), 1)
+
+    def test_version(self):
+        path = os.path.join(self.directory, 'manifest.json')
+        save_manifest({'version': 0, 'classes': {}}, path)
+        self.assertRaises(ValueError, load_manifest, path)
+
+
+if __name__ == '__main__':
+    unittest.main()
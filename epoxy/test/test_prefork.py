@@ -0,0 +1,206 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentManager
+import epoxy.core as epoxy_core
+from epoxy.settings import StringSetting
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__), "test_prefork.yml")
+
+
+class TestLookupTable(Component):
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.table = dict((i, str(i)) for i in range(1000))
+
+
+class TestSharedService(Component):
+
+    table = Dependency()
+
+    def __init__(self):
+        self.pid = os.getpid()
+
+
+class TestWorker(Component):
+
+    service = Dependency()
+    directory = StringSetting(required=True)
+
+    def __init__(self):
+        self.pid = os.getpid()
+
+    def _write(self, suffix, text):
+        path = os.path.join(self.directory, "%d.%s" % (os.getpid(), suffix))
+        with open(path, "w") as f:
+            f.write(text)
+
+    def start(self):
+        self._write("start", "")
+
+    def main(self):
+        self._write("main", "%d %d %d" % (self.pid, self.service.pid,
+                                          self.service.table.pid))
+
+    def stop(self):
+        self._write("stop", "")
+
+
+class TestFailingWorker(TestWorker):
+
+    def start(self):
+        TestWorker.start(self)
+        raise RuntimeError("failed to start")
+
+
+def make_config(directory, entry_point=True):
+    config = YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+    config['components']['worker']['settings'] = {'directory': directory}
+    if not entry_point:
+        del config['entry-point']
+    return config
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "os.fork() is required")
+class TestLaunchForked(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def _files(self, suffix):
+        return sorted(f for f in os.listdir(self.directory)
+                      if f.endswith(suffix))
+
+    def _wait_for_files(self, suffix, count):
+        for _ in range(1000):
+            if len(self._files(suffix)) >= count:
+                return
+            time.sleep(0.01)
+
+    def test_launch_forked(self):
+        mgr = ComponentManager()
+        statuses = mgr.launch_forked(make_config(self.directory), workers=3)
+        self.assertEqual(len(statuses), 3)
+        self.assertEqual(set(statuses.values()), set([0]))
+
+        # shared components were built once, in this process
+        self.assertEqual(mgr.components['table'].pid, os.getpid())
+        self.assertEqual(mgr.components['service'].pid, os.getpid())
+        self.assertNotIn('worker', mgr.components)
+
+        main_files = self._files(".main")
+        self.assertEqual(len(main_files), 3)
+        for filename in main_files:
+            with open(os.path.join(self.directory, filename)) as f:
+                worker_pid, service_pid, table_pid = map(int, f.read().split())
+            self.assertEqual(filename, "%d.main" % worker_pid)
+            self.assertIn(worker_pid, statuses)
+            self.assertEqual(service_pid, os.getpid())
+            self.assertEqual(table_pid, os.getpid())
+        self.assertEqual(len(self._files(".stop")), 3)
+
+    def test_terminate_workers(self):
+        mgr = ComponentManager()
+        config = make_config(self.directory, entry_point=False)
+
+        def terminate():
+            self._wait_for_files(".start", 2)
+            mgr.terminate_workers(timeout=5)
+
+        thread = threading.Thread(target=terminate)
+        thread.start()
+        statuses = mgr.launch_forked(config, workers=2)
+        thread.join()
+        self.assertEqual(len(statuses), 2)
+        self.assertEqual(set(statuses.values()), set([0]))
+        # each worker stopped its own components
+        self.assertEqual(len(self._files(".stop")), 2)
+        self.assertEqual(mgr._workers, [])
+
+    def test_terminate_on_signal(self):
+        mgr = ComponentManager()
+        config = make_config(self.directory, entry_point=False)
+
+        def signal_parent():
+            self._wait_for_files(".start", 2)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        handler = signal.getsignal(signal.SIGTERM)
+        thread = threading.Thread(target=signal_parent)
+        thread.start()
+        statuses = mgr.launch_forked(config, workers=2)
+        thread.join()
+        self.assertEqual(set(statuses.values()), set([0]))
+        self.assertEqual(len(self._files(".stop")), 2)
+        self.assertEqual(signal.getsignal(signal.SIGTERM), handler)
+
+    def test_respawn_backoff(self):
+        messages = []
+        original_log = epoxy_core.log
+        epoxy_core.log = lambda text, *args: messages.append(text % args)
+        self.addCleanup(setattr, epoxy_core, 'log', original_log)
+        mgr = ComponentManager()
+        config = make_config(self.directory, entry_point=False)
+        config['components']['worker']['class'] = \
+            'epoxy.test.test_prefork:TestFailingWorker'
+
+        def terminate():
+            self._wait_for_files(".start", 3)
+            mgr.terminate_workers(timeout=5)
+
+        thread = threading.Thread(target=terminate)
+        thread.start()
+        statuses = mgr.launch_forked(config, workers=1, respawn=True,
+                                     debug=1)
+        thread.join()
+        # the last may have been terminated before failing
+        self.assertGreaterEqual(list(statuses.values()).count(1 << 8), 2)
+        # each replacement for a worker failing to start waits longer
+        delays = [float(x.split()[3]) for x in messages
+                  if x.startswith("Respawning worker in")]
+        self.assertEqual(delays[:2], [0.1, 0.2])
+
+    @unittest.skipIf(not hasattr(socket, 'AF_UNIX'), "requires unix sockets")
+    def test_admin_not_inherited(self):
+        mgr = ComponentManager()
+        path = os.path.join(self.directory, 'admin.sock')
+        mgr.start_admin(path=path)
+        reachable = []
+
+        def check_admin(event):
+            # the shared components are stopped after the worker has exited
+            if event.before and event.component == 'service':
+                client = socket.socket(socket.AF_UNIX)
+                try:
+                    client.connect(path)
+                    reachable.append(True)
+                except socket.error:
+                    reachable.append(False)
+                finally:
+                    client.close()
+        mgr.add_hook(check_admin, kinds=['stop'])
+        statuses = mgr.launch_forked(make_config(self.directory), workers=1)
+        # the worker exited normally and left the parent's server alone
+        self.assertEqual(list(statuses.values()), [0])
+        self.assertEqual(reachable, [True])
+        self.assertIsNone(mgr.admin)
+
+
+if __name__ == '__main__':
+    unittest.main()
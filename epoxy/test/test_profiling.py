@@ -0,0 +1,98 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentManager
+from epoxy.profiling import LaunchProfile
+from epoxy.settings import IntegerSetting
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__), "test_profiling.yml")
+
+
+class AllocatingComponent(Component):
+
+    other = Dependency(required=False)
+
+    construct_size = IntegerSetting(default=0)
+    start_size = IntegerSetting(default=0)
+
+    def __init__(self):
+        self.constructed = b'x' * self.construct_size
+
+    def start(self):
+        self.started = b'x' * self.start_size
+
+
+def make_config():
+    return YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+
+
+class TestLaunchProfile(unittest.TestCase):
+
+    def _launch(self, profile):
+        mgr = ComponentManager()
+        mgr.launch_profile = profile
+        self.addCleanup(profile.stop)
+        mgr.launch_configuration(make_config())
+        return mgr
+
+    @unittest.skipIf(sys.version_info < (3, 4), "requires tracemalloc")
+    def test_tracemalloc(self):
+        profile = LaunchProfile(memory='tracemalloc', top_sites=3)
+        self._launch(profile)
+        report = profile.report()
+        self.assertEqual(report[0]['component'], 'big')
+        self.assertEqual(set(report[0]['phases']),
+                         set(['import', 'instantiate', 'start']))
+        big = report[0]['phases']
+        self.assertGreater(big['instantiate']['size'], 4 << 20)
+        self.assertGreater(big['start']['size'], 8 << 20)
+        self.assertLess(big['start']['size'], 9 << 20)
+        self.assertEqual(big['start']['sites'][0]['site'].split(':')[0],
+                         __file__.replace('.pyc', '.py'))
+        self.assertEqual([x['component'] for x in report[1:3]],
+                         ['pool[0]', 'pool[1]'])
+        self.assertNotIn('component_manager',
+                         [x['component'] for x in report])
+        self.assertIn('big', profile.format_report())
+
+    def test_rss(self):
+        profile = LaunchProfile(memory='rss')
+        self._launch(profile)
+        report = profile.report()
+        self.assertEqual(report[0]['component'], 'big')
+        self.assertGreater(report[0]['size'], 8 << 20)
+        self.assertNotIn('sites', report[0]['phases']['start'])
+
+    def test_timing_only_and_save(self):
+        profile = LaunchProfile(memory=None)
+        self._launch(profile)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'profile.json')
+        profile.save(path)
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(data['memory'], None)
+        self.assertEqual(len(data['components']), 5)
+        for entry in data['components']:
+            self.assertNotIn('size', entry)
+            self.assertGreaterEqual(entry['time'], 0)
+
+    def test_bad_mode(self):
+        self.assertRaises(ValueError, LaunchProfile, memory='heap')
+
+
+if __name__ == '__main__':
+    unittest.main()
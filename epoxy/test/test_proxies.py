@@ -0,0 +1,287 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentManager
+from concurrent import futures
+from epoxy.proxies import CachingProxy, CircuitBreaker, CircuitOpenError, \
+    GuardedProxy, InstrumentedProxy, MemoizationCache
+import os
+import threading
+import time
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__), "test_proxies.yml")
+
+
+class TestDriver(Component):
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+        return len(self.sent)
+
+    def fail(self):
+        raise RuntimeError("failed")
+
+    def wait(self, event):
+        return event.wait(5)
+
+    def lookup(self, key, suffix=""):
+        self.sent.append(key)
+        return "%s%s" % (key, suffix)
+
+
+class TestService(Component):
+
+    driver = Dependency()
+    others = Dependency(required=False)
+
+
+def make_config(driver_config, edge=None):
+    config = YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+    components = config['components']
+    components['driver'].update(driver_config)
+    if edge is not None:
+        components['service']['dependencies']['driver'] = edge
+    return config
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_not_instrumented(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config({}))
+        service = mgr.components['service']
+        self.assertIs(service.driver, mgr.components['driver'])
+        self.assertEqual(mgr.get_call_statistics(), [])
+
+    def test_instrumented_edge(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(
+            {}, {'component': 'driver', 'instrument': True}))
+        service = mgr.components['service']
+        self.assertIsInstance(service.driver, InstrumentedProxy)
+        self.assertEqual(service.driver.send("a"), 1)
+        self.assertEqual(service.driver.send("b"), 2)
+        with self.assertRaises(RuntimeError):
+            service.driver.fail()
+        self.assertEqual(mgr.components['driver'].sent, ["a", "b"])
+
+        statistics, = mgr.get_call_statistics()
+        self.assertEqual(statistics['component'], 'service')
+        self.assertEqual(statistics['dependency'], 'driver')
+        self.assertEqual(statistics['target'], 'driver')
+        send = statistics['methods']['send']
+        self.assertEqual(send['count'], 2)
+        self.assertEqual(send['errors'], 0)
+        self.assertEqual(sum(n for _, n in send['histogram']), 2)
+        self.assertEqual(statistics['methods']['fail']['errors'], 1)
+
+    def test_instrumented_component(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config({'instrument': True}))
+        mgr.components['service'].driver.send("a")
+        statistics, = mgr.get_call_statistics()
+        self.assertEqual(statistics['methods']['send']['count'], 1)
+
+    def test_edge_overrides_component(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(
+            {'instrument': True}, {'component': 'driver', 'instrument': False}))
+        self.assertIs(mgr.components['service'].driver,
+                      mgr.components['driver'])
+
+    def test_instrumented_list(self):
+        config = make_config({})
+        config['components']['service']['dependencies']['others'] = {
+            'component': ['driver'],
+            'instrument': True,
+        }
+        mgr = ComponentManager()
+        mgr.launch_configuration(config)
+        others = mgr.components['service'].others
+        self.assertEqual(len(others), 1)
+        self.assertEqual(list(others), [mgr.components['driver']])
+        self.assertIs(others[0], mgr.components['driver'])
+
+    def test_missing_component(self):
+        with self.assertRaises(ValueError):
+            ComponentManager().launch_configuration(
+                make_config({}, {'instrument': True}))
+
+
+class TestCaching(unittest.TestCase):
+
+    def _launch(self, cache):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(
+            {}, {'component': 'driver', 'cache': cache}))
+        return mgr, mgr.components['service'].driver, mgr.components['driver']
+
+    def test_cached_calls(self):
+        mgr, proxy, driver = self._launch({'methods': ['lookup']})
+        self.assertIsInstance(proxy, CachingProxy)
+        self.assertEqual(proxy.lookup("a"), "a")
+        self.assertEqual(proxy.lookup("a"), "a")
+        self.assertEqual(proxy.lookup("a", suffix="!"), "a!")
+        self.assertEqual(proxy.lookup(key="a", suffix="!"), "a!")
+        self.assertEqual(driver.sent, ["a", "a", "a"])
+
+        # methods not listed are not cached
+        proxy.send("x")
+        proxy.send("x")
+        self.assertEqual(driver.sent, ["a", "a", "a", "x", "x"])
+
+        # unhashable arguments are passed through
+        self.assertEqual(proxy.lookup(["b"]), "['b']")
+
+        statistics, = mgr.get_cache_statistics()
+        self.assertEqual(statistics['component'], 'service')
+        self.assertEqual(statistics['target'], 'driver')
+        self.assertEqual(statistics['hits'], 1)
+        self.assertEqual(statistics['misses'], 3)
+        self.assertEqual(statistics['size'], 3)
+
+    def test_invalidate(self):
+        mgr, proxy, driver = self._launch({'methods': ['lookup']})
+        proxy.lookup("a")
+        mgr.invalidate_cache('other_component')
+        proxy.lookup("a")
+        self.assertEqual(driver.sent, ["a"])
+        mgr.invalidate_cache('driver', 'lookup')
+        proxy.lookup("a")
+        self.assertEqual(driver.sent, ["a", "a"])
+        mgr.invalidate_cache()
+        proxy.lookup("a")
+        self.assertEqual(driver.sent, ["a", "a", "a"])
+
+    def test_methods_required(self):
+        with self.assertRaises(ValueError):
+            self._launch({'max_size': 10})
+        with self.assertRaises(ValueError) as cm:
+            self._launch(True)
+        self.assertIn("must list the methods to cache", str(cm.exception))
+
+    def test_lru_eviction(self):
+        cache = MemoizationCache(max_size=2)
+        cache.put(1, "one")
+        cache.put(2, "two")
+        self.assertEqual(cache.get(1), (True, "one"))
+        cache.put(3, "three")
+        self.assertEqual(cache.get(2), (False, None))
+        self.assertEqual(cache.get(1), (True, "one"))
+        self.assertEqual(cache.get(3), (True, "three"))
+
+    def test_ttl(self):
+        cache = MemoizationCache(ttl=0.05)
+        cache.put(1, "one")
+        self.assertEqual(cache.get(1), (True, "one"))
+        time.sleep(0.1)
+        self.assertEqual(cache.get(1), (False, None))
+
+    def test_concurrent_access(self):
+        cache = MemoizationCache(max_size=50)
+
+        def run():
+            for i in range(2000):
+                found, value = cache.get(i % 100)
+                if found:
+                    assert value == i % 100
+                else:
+                    cache.put(i % 100, i % 100)
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        statistics = cache.as_dict()
+        self.assertEqual(statistics['hits'] + statistics['misses'], 16000)
+        self.assertEqual(statistics['size'], 50)
+
+
+class TestGuard(unittest.TestCase):
+
+    def _launch(self, guard):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(
+            {}, {'component': 'driver', 'guard': guard}))
+        self.addCleanup(mgr.shutdown)
+        return mgr, mgr.components['service'].driver
+
+    def test_breaker_opens(self):
+        mgr, proxy = self._launch({'failure_threshold': 2,
+                                   'reset_timeout': 60})
+        self.assertIsInstance(proxy, GuardedProxy)
+        self.assertEqual(proxy.send("a"), 1)
+        self.assertRaises(RuntimeError, proxy.fail)
+        self.assertRaises(RuntimeError, proxy.fail)
+        # open: calls fail fast without reaching the driver
+        self.assertRaises(CircuitOpenError, proxy.send, "b")
+        self.assertEqual(mgr.components['driver'].sent, ["a"])
+        state, = mgr.get_breaker_states()
+        self.assertEqual(state['state'], 'open')
+        self.assertEqual((state['calls'], state['failures'],
+                          state['rejected']), (3, 2, 1))
+        self.assertEqual((state['component'], state['dependency'],
+                          state['target']), ('service', 'driver', 'driver'))
+        mgr.reset_breakers('driver')
+        self.assertEqual(proxy.send("c"), 2)
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertRaises(CircuitOpenError, breaker.before_call)
+        time.sleep(0.1)
+        breaker.before_call()  # the probe
+        self.assertEqual(breaker.state, 'half-open')
+        self.assertRaises(CircuitOpenError, breaker.before_call)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        time.sleep(0.1)
+        breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+        breaker.before_call()
+
+    def test_timeout(self):
+        mgr, proxy = self._launch({'timeout': 0.05, 'failure_threshold': 1})
+        release = threading.Event()
+        self.addCleanup(release.set)
+        # the call is still blocked when the caller gives up on it
+        self.assertRaises(futures.TimeoutError, proxy.wait, release)
+        self.assertRaises(CircuitOpenError, proxy.wait, release)
+        self.assertEqual(mgr.get_breaker_states()[0]['timeouts'], 1)
+
+    def test_timeout_while_queued(self):
+        mgr, proxy = self._launch({'timeout': 0.05, 'workers': 1,
+                                   'failure_threshold': 10,
+                                   'fallback': 'offline'})
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.assertEqual(proxy.wait(release), 'offline')
+        # queued behind the blocked call, so this times out before starting
+        self.assertEqual(proxy.send("a"), 'offline')
+        release.set()
+        proxy._executor.shutdown(wait=True)
+        self.assertEqual(mgr.components['driver'].sent, [])
+
+    def test_fallback(self):
+        mgr, proxy = self._launch({'failure_threshold': 1,
+                                   'fallback': 'offline'})
+        self.assertEqual(proxy.fail(), 'offline')
+        self.assertEqual(proxy.send("a"), 'offline')
+        self.assertEqual(mgr.components['driver'].sent, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentManager
+from epoxy.profiling import LaunchProfile
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__), "test_pruning.yml")
+
+
+class Node(Component):
+
+    other = Dependency(required=False)
+    others = Dependency(required=False)
+
+    def run(self):
+        return 'ran'
+
+
+def make_config(**extra):
+    config = YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+    config.update(extra)
+    return config
+
+
+class TestPruning(unittest.TestCase):
+
+    def test_prune(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config())
+        self.assertEqual(sorted(mgr.components),
+                         ['app', 'component_manager', 'db', 'metrics',
+                          'metrics_sink'])
+        self.assertEqual(mgr.prune_report, {
+            'components': ['admin', 'batch', 'batch[0]', 'batch[1]'],
+            'time': None, 'size': None})
+
+    def test_not_pruned_by_default(self):
+        config = make_config()
+        del config['prune']
+        mgr = ComponentManager()
+        mgr.launch_configuration(config)
+        self.assertEqual(len(mgr.components), 9)
+        self.assertIsNone(mgr.prune_report)
+
+    def test_lazy_members_kept(self):
+        config = make_config()
+        config['components']['app']['dependencies']['others'] = {
+            'component': ['admin'], 'lazy': True}
+        mgr = ComponentManager()
+        mgr.launch_configuration(config)
+        self.assertNotIn('admin', mgr.components)
+        self.assertEqual(mgr.prune_report['components'],
+                         ['batch', 'batch[0]', 'batch[1]'])
+        self.assertIs(mgr.components['app'].others[0].other,
+                      mgr.components['db'])
+
+    def test_estimates(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'profile.json')
+        with open(path, 'w') as f:
+            json.dump({'memory': 'rss', 'components': [
+                {'component': 'admin', 'time': 0.5, 'size': 1024,
+                 'phases': {'start': {'time': 0.5, 'size': 1024}}},
+                {'component': 'batch[0]', 'time': 0.25, 'size': 2048,
+                 'phases': {'start': {'time': 0.25, 'size': 2048}}},
+                {'component': 'app', 'time': 1.0, 'size': 4096,
+                 'phases': {'start': {'time': 1.0, 'size': 4096}}},
+            ]}, f)
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(prune={'profile': path}))
+        self.assertEqual(mgr.prune_report['time'], 0.75)
+        self.assertEqual(mgr.prune_report['size'], 3072)
+
+    def test_profile_round_trip(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'profile.json')
+        profile = LaunchProfile(memory=None)
+        mgr = ComponentManager()
+        mgr.launch_profile = profile
+        mgr.launch_configuration(make_config())
+        profile.save(path)
+        self.assertEqual(LaunchProfile.load(path).report(), profile.report())
+
+    def test_requires_roots(self):
+        config = make_config()
+        del config['entry-point']
+        del config['components']['metrics']['root']
+        self.assertRaises(ValueError, ComponentManager().launch_configuration,
+                          config)
+        config['entry-point'] = 'missing:run'
+        self.assertRaises(ValueError, ComponentManager().launch_configuration,
+                          config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.core import ComponentManager
+from epoxy.manifest import build_manifest, validate_configuration
+import epoxy.registry
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+
+class Plugin(Component):
+    pass
+
+
+class User(Component):
+
+    plugin = Dependency()
+
+
+def add_distribution(directory, name, entry_points):
+    info = os.path.join(directory, '%s-1.0.dist-info' % name)
+    os.mkdir(info)
+    with open(os.path.join(info, 'METADATA'), 'w') as f:
+        f.write("Metadata-Version: 2.1\nName: %s\nVersion: 1.0\n" % name)
+    with open(os.path.join(info, 'entry_points.txt'), 'w') as f:
+        f.write("[epoxy.components]\n")
+        for short_name, class_path in entry_points.items():
+            f.write("%s = %s\n" % (short_name, class_path))
+
+
+@unittest.skipIf(sys.version_info < (3, 8), "requires importlib.metadata")
+class TestComponentRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.site = os.path.join(self.directory, 'site')
+        os.mkdir(self.site)
+        add_distribution(self.site, 'epoxy_test_plugin', {
+            'test-plugin': 'epoxy.test.test_registry:Plugin'})
+        sys.path.append(self.site)
+        self.cache_path = os.path.join(self.directory, 'registry.json')
+        self.registry = epoxy.registry.ComponentRegistry(self.cache_path)
+        self.previous, epoxy.registry._registry = \
+            epoxy.registry._registry, self.registry
+
+    def tearDown(self):
+        epoxy.registry._registry = self.previous
+        sys.path.remove(self.site)
+        shutil.rmtree(self.directory)
+
+    def test_resolve(self):
+        self.assertEqual(self.registry.resolve('test-plugin'),
+                         'epoxy.test.test_registry:Plugin')
+        self.assertRaises(KeyError, self.registry.resolve, 'missing')
+        self.registry.register('user', 'epoxy.test.test_registry:User')
+        self.assertEqual(self.registry.names()['user'],
+                         'epoxy.test.test_registry:User')
+        self.assertRaises(ValueError, self.registry.register, 'a:b', 'x:y')
+
+    def test_cached_until_path_changes(self):
+        self.registry.resolve('test-plugin')
+        with open(self.cache_path) as f:
+            self.assertIn('test-plugin', json.load(f)['components'])
+
+        # a new registry reads the cache rather than scanning
+        def fail(group):
+            raise AssertionError("scanned")
+        scan = epoxy.registry.scan_entry_points
+        epoxy.registry.scan_entry_points = fail
+        try:
+            registry = epoxy.registry.ComponentRegistry(self.cache_path)
+            self.assertEqual(registry.resolve('test-plugin'),
+                             'epoxy.test.test_registry:Plugin')
+        finally:
+            epoxy.registry.scan_entry_points = scan
+
+        # installing another package invalidates the cache
+        add_distribution(self.site, 'epoxy_test_other', {
+            'test-other': 'epoxy.test.test_registry:User'})
+        os.utime(self.site, (1000000000, 1000000000))
+        registry = epoxy.registry.ComponentRegistry(self.cache_path)
+        self.assertEqual(registry.resolve('test-other'),
+                         'epoxy.test.test_registry:User')
+
+    @unittest.skipIf(not hasattr(os, 'getuid'), "requires unix permissions")
+    def test_cache_directory_checked(self):
+        # a new cache directory is private to the user
+        cache_path = os.path.join(self.directory, 'cache', 'registry.json')
+        registry = epoxy.registry.ComponentRegistry(cache_path)
+        registry.resolve('test-plugin')
+        self.assertTrue(os.path.exists(cache_path))
+        mode = os.stat(os.path.dirname(cache_path)).st_mode & 0o777
+        self.assertEqual(mode & 0o077, 0)
+        self.assertEqual(os.listdir(os.path.dirname(cache_path)),
+                         ['registry.json'])
+
+        # a cache others can write to is neither read nor written
+        shared = os.path.join(self.directory, 'shared')
+        os.mkdir(shared)
+        os.chmod(shared, 0o777)
+        cache_path = os.path.join(shared, 'registry.json')
+        with open(cache_path, 'w') as f:
+            json.dump({'version': epoxy.registry._CACHE_VERSION,
+                       'group': epoxy.registry.ENTRY_POINT_GROUP,
+                       'fingerprint': epoxy.registry._path_fingerprint(
+                           sys.path),
+                       'components': {'test-plugin': 'evil:Class'}}, f)
+        registry = epoxy.registry.ComponentRegistry(cache_path)
+        self.assertEqual(registry.resolve('test-plugin'),
+                         'epoxy.test.test_registry:Plugin')
+        with open(cache_path) as f:
+            self.assertEqual(json.load(f)['components']['test-plugin'],
+                             'evil:Class')
+
+    def test_launch(self):
+        mgr = ComponentManager()
+        config = {'components': {
+            'plugin': {'class': 'test-plugin'},
+            'user': {'class': 'epoxy.test.test_registry:User',
+                     'dependencies': {'plugin': 'plugin'}},
+        }}
+        mgr.launch_configuration(config)
+        self.assertIsInstance(mgr.components['user'].plugin, Plugin)
+
+        manifest = build_manifest(['epoxy.test.test_registry:Plugin',
+                                   'epoxy.test.test_registry:User'])
+        self.assertEqual(validate_configuration(config, manifest), [])
+
+        config['components']['plugin']['class'] = 'missing'
+        with self.assertRaises(ValueError) as cm:
+            ComponentManager().launch_configuration(config)
+        self.assertIn("No component is registered as 'missing'",
+                      str(cm.exception))
+        self.assertEqual(validate_configuration(config, manifest)[0],
+                         "plugin: no component is registered as 'missing'")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from concurrent import futures
+from epoxy.component import Component, Dependency
+from epoxy.core import ComponentManager
+from epoxy.remote import RemoteComponent, RemoteError
+from epoxy.settings import IntegerSetting
+import os
+import sys
+import threading
+import time
+import unittest
+
+
+class Helper(Component):
+
+    def __init__(self):
+        self.pid = os.getpid()
+
+
+class Scorer(Component):
+
+    helper = Dependency()
+
+    factor = IntegerSetting(default=2)
+
+    def __init__(self):
+        self.meeting = threading.Condition()
+        self.arrived = 0
+
+    def start(self):
+        self.started_in = os.getpid()
+
+    def score(self, value):
+        return value * self.factor
+
+    def pids(self):
+        return self.started_in, self.helper.pid
+
+    def slow(self, delay):
+        time.sleep(delay)
+        return delay
+
+    def meet(self, count):
+        # whether ``count`` calls were in progress at once
+        with self.meeting:
+            self.arrived += 1
+            self.meeting.notify_all()
+            for _ in range(50):
+                if self.arrived >= count:
+                    break
+                self.meeting.wait(0.1)
+            return self.arrived >= count
+
+    def fail(self):
+        raise KeyError("missing")
+
+    def unpicklable(self):
+        return threading.Lock()
+
+
+class Client(Component):
+
+    scorer = Dependency()
+    helper = Dependency(required=False)
+
+
+def make_config(**remote):
+    path = 'epoxy.test.test_remote:'
+    return {'components': {
+        'helper': {'class': path + 'Helper'},
+        'scorer': {
+            'class': path + 'Scorer',
+            'dependencies': {'helper': 'helper'},
+            'settings': {'factor': 3},
+            'remote': remote or True,
+        },
+        'client': {'class': path + 'Client',
+                   'dependencies': {'scorer': 'scorer'}},
+    }}
+
+
+@unittest.skipIf(sys.platform == 'win32', "requires unix sockets")
+class TestRemoteComponent(unittest.TestCase):
+
+    def _launch(self, **remote):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(**remote))
+        self.addCleanup(mgr.shutdown)
+        return mgr
+
+    def test_calls_forwarded(self):
+        mgr = self._launch()
+        scorer = mgr.components['client'].scorer
+        self.assertIsInstance(scorer, RemoteComponent)
+        self.assertEqual(scorer.score(5), 15)
+        started_in, helper_pid = scorer.pids()
+        self.assertNotEqual(started_in, os.getpid())
+        self.assertEqual(started_in, scorer.pid)
+        self.assertEqual(helper_pid, scorer.pid)
+        self.assertEqual(scorer.call_async('score', 2).result(), 6)
+        self.assertRaises(AttributeError, getattr, scorer, 'missing')
+
+    def test_dependencies_not_built_locally(self):
+        mgr = self._launch()
+        self.assertNotIn('helper', mgr.components)
+        self.assertIn('scorer', mgr.components)
+
+        # unless something local needs them too
+        config = make_config()
+        config['components']['client']['dependencies']['helper'] = 'helper'
+        mgr = ComponentManager()
+        mgr.launch_configuration(config)
+        self.addCleanup(mgr.shutdown)
+        self.assertEqual(mgr.components['helper'].pid, os.getpid())
+
+    def test_errors(self):
+        mgr = self._launch()
+        scorer = mgr.components['scorer']
+        self.assertRaises(KeyError, scorer.fail)
+        self.assertRaises(RemoteError, scorer.unpicklable)
+        self.assertEqual(scorer.score(1), 3)
+
+    def test_pipelined(self):
+        mgr = self._launch(connections=2, workers=8)
+        scorer = mgr.components['scorer']
+        calls = [scorer.call_async('meet', 8) for _ in range(8)]
+        self.assertEqual([x.result() for x in calls], [True] * 8)
+
+    def test_timeout(self):
+        mgr = self._launch(timeout=0.1)
+        scorer = mgr.components['scorer']
+        self.assertRaises(futures.TimeoutError, scorer.slow, 0.5)
+        self.assertEqual(scorer.score(2), 6)
+
+    def test_stop(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config())
+        scorer = mgr.components['scorer']
+        process = scorer._process
+        mgr.shutdown()
+        self.assertFalse(process.is_alive())
+        self.assertEqual(process.exitcode, 0)
+        self.assertRaises(RemoteError, scorer.score, 1)
+
+    def test_start_failure(self):
+        config = make_config()
+        config['components']['scorer']['settings']['factor'] = 'x'
+        mgr = ComponentManager()
+        with self.assertRaises(RemoteError) as cm:
+            mgr.launch_configuration(config)
+        self.assertIn('ValueError', str(cm.exception))
+
+    def test_replicas_not_allowed(self):
+        config = make_config()
+        config['components']['scorer']['replicas'] = 2
+        self.assertRaises(ValueError, ComponentManager().launch_configuration,
+                          config)
+
+
+if __name__ == '__main__':
+    unittest.main()
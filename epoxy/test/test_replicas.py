@@ -0,0 +1,95 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, ComponentList, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentManager
+from epoxy.settings import StringSetting, DictionarySetting
+import os
+import threading
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__), "test_replicas.yml")
+
+
+class TestSource(Component):
+    pass
+
+
+class TestWorker(Component):
+
+    source = Dependency()
+
+    name = StringSetting(required=True)
+    options = DictionarySetting(default={})
+
+    # when set, {name: Event} of replicas which wait for each other to start
+    arrivals = None
+
+    def __init__(self):
+        self.started = False
+        self.thread = None
+        self.met_others = None
+
+    def start(self):
+        self.thread = threading.current_thread()
+        if self.arrivals is not None:
+            self.arrivals[self.name].set()
+            self.met_others = all(x.wait(5) for x in self.arrivals.values())
+        self.started = True
+
+
+class TestConsumer(Component):
+
+    workers = Dependency()
+
+    def start(self):
+        assert all(worker.started for worker in self.workers)
+
+
+def make_config(replicas):
+    config = YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+    config['components']['worker']['replicas'] = replicas
+    return config
+
+
+class TestReplicas(unittest.TestCase):
+
+    def test_replicas(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(3))
+        source = mgr.components['source']
+        workers = mgr.components['consumer'].workers
+        self.assertIsInstance(workers, ComponentList)
+        self.assertEqual(len(workers), 3)
+        for index, worker in enumerate(workers):
+            self.assertIs(worker, mgr.components['worker[%d]' % index])
+            self.assertIs(worker.source, source)
+            self.assertEqual(worker.name, 'worker-%d' % index)
+            self.assertEqual(worker.options,
+                             {'queue': 'queue-%d' % index, 'size': 10})
+        self.assertIsNot(workers[0].options, workers[1].options)
+
+    def test_replicas_started_concurrently(self):
+        # each replica waits for all the others to start
+        TestWorker.arrivals = dict(('worker-%d' % index, threading.Event())
+                                   for index in range(4))
+        self.addCleanup(setattr, TestWorker, 'arrivals', None)
+        mgr = ComponentManager()
+        mgr.launch_subgraph(make_config(4), 'consumer:start')
+        workers = mgr.components['worker']
+        self.assertEqual([worker.met_others for worker in workers],
+                         [True] * 4)
+        self.assertEqual(len(set(worker.thread for worker in workers)), 4)
+
+    def test_invalid_replicas(self):
+        with self.assertRaises(ValueError):
+            ComponentManager().launch_configuration(make_config(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentGraph, ComponentManager
+from epoxy.scheduling import LaunchHistory, critical_path_lengths, main, \
+    simulate
+from epoxy.settings import FloatSetting
+import epoxy.core as epoxy_core
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__), "test_scheduling.yml")
+
+started = []
+started_lock = threading.Lock()
+
+
+class Slow(Component):
+
+    other = Dependency(required=False)
+
+    delay = FloatSetting(default=0.0)
+
+    def start(self):
+        if self.other is not None:
+            assert self.other.done
+        if self.delay < 0:
+            raise RuntimeError("failed to start")
+        time.sleep(self.delay)
+        with started_lock:
+            started.append(self)
+        self.done = True
+
+
+def make_config(**extra):
+    config = YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+    config.update(extra)
+    return config
+
+
+def make_graph():
+    components = dict(make_config()['components'])
+    graph = ComponentGraph.from_component_data(components)
+    return graph, graph.get_ordering()
+
+
+DURATIONS = {'a': 1.0, 'b': 5.0, 'c': 3.0, 'd': 3.0}
+
+
+class TestScheduling(unittest.TestCase):
+
+    def setUp(self):
+        del started[:]
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.history = os.path.join(self.directory, 'history.json')
+
+    def test_critical_path(self):
+        graph, references = make_graph()
+        lengths = dict((graph.references[index].name, length)
+                       for index, length in critical_path_lengths(
+                           graph, references, DURATIONS).items())
+        self.assertEqual(lengths, {'a': 6.0, 'b': 5.0, 'c': 3.0, 'd': 3.0})
+
+    def test_simulate(self):
+        graph, references = make_graph()
+        total, timeline = simulate(graph, references, DURATIONS, 2)
+        # a (and so b) is started first even though c and d come first
+        self.assertEqual(total, 6.0)
+        self.assertEqual(timeline, [('a', 0.0, 1.0), ('c', 0.0, 3.0),
+                                    ('b', 1.0, 6.0), ('d', 3.0, 6.0)])
+        self.assertEqual(simulate(graph, references, DURATIONS, 1)[0], 12.0)
+        # without history, every component is assumed to take the same time
+        self.assertEqual(simulate(graph, references, {}, 2)[0], 0.0)
+
+    def test_parallel_launch(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(workers=2,
+                                             history=self.history))
+        self.assertEqual(sorted(x for x in mgr.components),
+                         ['a', 'b', 'c', 'component_manager', 'd'])
+        self.assertEqual(len(started), 4)
+        names = [name for name, _ in mgr._started_components]
+        self.assertLess(names.index('a'), names.index('b'))
+        # with no history, components are taken in the usual order
+        self.assertLess(names.index('c'), names.index('a'))
+
+        with open(self.history) as f:
+            history = json.load(f)['components']
+        self.assertEqual(sorted(history['b']),
+                         ['import', 'instantiate', 'start'])
+
+        # the second launch uses the history to start a first
+        del started[:]
+        mgr.shutdown()
+        history = LaunchHistory()
+        for name, duration in DURATIONS.items():
+            history.record(name, 'start', duration)
+        history.save(self.history)
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(workers=2,
+                                             history=self.history))
+        names = [name for name, _ in mgr._started_components]
+        self.assertLess(names.index('a'), names.index('c'))
+        self.assertLess(names.index('a'), names.index('d'))
+        mgr.shutdown()
+
+    def test_history_smoothing(self):
+        history = LaunchHistory(weight=0.5)
+        history.record('a', 'start', 1.0)
+        history.record('a', 'start', 3.0)
+        history.record('a', 'import', 1.0)
+        self.assertEqual(history.durations(), {'a': 3.0})
+        history.save(self.history)
+        self.assertEqual(LaunchHistory(self.history).components,
+                         {'a': {'start': 2.0, 'import': 1.0}})
+
+    def test_bad_history(self):
+        messages = []
+        self.addCleanup(setattr, epoxy_core, 'log', epoxy_core.log)
+        epoxy_core.log = lambda text, *args: messages.append(text % args)
+        for content in ['{"version": 1, "compo',
+                        '{"version": 0, "components": {}}']:
+            with open(self.history, 'w') as f:
+                f.write(content)
+            del messages[:]
+            mgr = ComponentManager()
+            mgr.launch_configuration(make_config(workers=2,
+                                                 history=self.history))
+            self.assertEqual(len(started), 4)
+            self.assertEqual(len(messages), 1)
+            self.assertIn("Ignoring launch history", messages[0])
+            mgr.shutdown()
+            del started[:]
+            # replaced by a good history once launched
+            self.assertIn('a', LaunchHistory(self.history).components)
+
+    def test_failure(self):
+        config = make_config(workers=3)
+        config['components']['c']['settings']['delay'] = -1
+        mgr = ComponentManager()
+        self.assertRaises(RuntimeError, mgr.launch_configuration, config)
+        mgr.shutdown()
+
+    def test_command_line(self):
+        history = LaunchHistory(self.history)
+        for name, duration in DURATIONS.items():
+            history.record(name, 'start', duration)
+        history.save()
+        self.assertEqual(main([CONFIG_YAML, '--history', self.history,
+                               '--workers', '1', '2', '--timeline']), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
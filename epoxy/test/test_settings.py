@@ -7,7 +7,13 @@
 
 from epoxy.component import Component
 from epoxy.settings import IntegerSetting, StringSetting, BooleanSetting, \
-    FloatSetting, ListSetting, DictionarySetting, BaseSetting, EnvironmentSetting
+    FloatSetting, ListSetting, DictionarySetting, BaseSetting, EnvironmentSetting, \
+    FileSetting, FileValue
+import array
+import json
+import shutil
+import sys
+import tempfile
 import unittest
 import os
 import mock
@@ -171,6 +177,67 @@ class TestSettings(unittest.TestCase):
             self.assertEqual('test string', svc.env_setting)
 
 
+class FileComponent(Component):
+
+    table = FileSetting()
+    data = FileSetting(required=False, format='array', typecode='d')
+
+
+class TestFileSetting(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.json_path = os.path.join(self.directory, 'table.json')
+        with open(self.json_path, 'w') as f:
+            json.dump({'a': 1, 'b': [1, 2]}, f)
+        self.array_path = os.path.join(self.directory, 'data.bin')
+        with open(self.array_path, 'wb') as f:
+            array.array('d', [1.5, 2.5, 3.5]).tofile(f)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_loaded_lazily(self):
+        svc = FileComponent.from_dependencies(table=self.json_path)
+        self.assertIsInstance(svc.table, FileValue)
+        self.assertFalse(svc.table.loaded)
+        self.assertEqual(svc.table['a'], 1)
+        self.assertTrue(svc.table.loaded)
+        self.assertEqual(svc.table.get(), {'a': 1, 'b': [1, 2]})
+        self.assertIn('b', svc.table)
+        self.assertEqual(len(svc.table), 2)
+
+    def test_shared_between_components(self):
+        svc1 = FileComponent.from_dependencies(table=self.json_path)
+        svc2 = FileComponent.from_dependencies(
+            table={'file': os.path.join(self.directory, '.', 'table.json')})
+        self.assertIs(svc1.table, svc2.table)
+        self.assertIs(svc1.table.get(), svc2.table.get())
+        svc3 = FileComponent.from_dependencies(
+            table={'file': self.json_path, 'format': 'text'})
+        self.assertIsNot(svc1.table, svc3.table)
+        self.assertEqual(json.loads(svc3.table.get()), svc1.table.get())
+
+    def test_array(self):
+        svc = FileComponent.from_dependencies(table=self.json_path,
+                                              data=self.array_path)
+        self.assertEqual(list(svc.data), [1.5, 2.5, 3.5])
+        self.assertEqual(svc.data[1], 2.5)
+        if sys.version_info[0] >= 3:
+            with self.assertRaises(TypeError):
+                svc.data.get()[0] = 0.0
+
+    def test_mmap(self):
+        svc = FileComponent.from_dependencies(
+            table={'file': self.array_path, 'format': 'mmap'})
+        self.assertEqual(svc.table[:8], array.array('d', [1.5]).tobytes())
+
+    def test_bad_values(self):
+        self.assertRaises(ValueError, FileComponent.from_dependencies,
+                          table={'path': self.json_path})
+        self.assertRaises(ValueError, FileComponent.from_dependencies,
+                          table={'file': self.json_path, 'format': 'xml'})
+
 
 if __name__ == '__main__':
     unittest.main()
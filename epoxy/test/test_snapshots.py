@@ -0,0 +1,168 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component
+from epoxy.core import ComponentManager
+from epoxy.settings import StringSetting
+from epoxy.snapshots import SnapshotStore, snapshot_key
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class IndexComponent(Component):
+
+    builds = 0
+
+    source = StringSetting(required=True)
+
+    def __init__(self):
+        self.index = None
+        self.restored = False
+
+    def start(self):
+        IndexComponent.builds += 1
+        with open(self.source) as f:
+            self.index = dict((line.strip(), i)
+                              for i, line in enumerate(f))
+
+    def __epoxy_snapshot__(self):
+        return self.index
+
+    def __epoxy_restore__(self, state):
+        self.index = state
+        self.restored = True
+
+
+class PlainComponent(Component):
+    pass
+
+
+class TestSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, 'routes.txt')
+        self._write_source('a\nb\n')
+        IndexComponent.builds = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write_source(self, text, mtime=None):
+        with open(self.source, 'w') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(self.source, (mtime, mtime))
+
+    def _launch(self, snapshot=None):
+        if snapshot is None:
+            snapshot = {'inputs': [self.source]}
+        mgr = ComponentManager(
+            snapshot_directory=os.path.join(self.directory, 'snapshots'))
+        mgr.launch_configuration({'components': {
+            'index': {
+                'class': 'epoxy.test.test_snapshots:IndexComponent',
+                'settings': {'source': self.source},
+                'snapshot': snapshot,
+            },
+        }})
+        return mgr.components['index']
+
+    def test_restored_on_second_launch(self):
+        first = self._launch()
+        self.assertFalse(first.restored)
+        self.assertEqual(first.index, {'a': 0, 'b': 1})
+        second = self._launch()
+        self.assertTrue(second.restored)
+        self.assertEqual(second.index, {'a': 0, 'b': 1})
+        self.assertEqual(IndexComponent.builds, 1)
+
+    def test_rebuilt_when_input_changes(self):
+        self._launch()
+        self._write_source('a\nb\nc\n', mtime=1000000000)
+        component = self._launch()
+        self.assertFalse(component.restored)
+        self.assertEqual(component.index, {'a': 0, 'b': 1, 'c': 2})
+        self.assertTrue(self._launch().restored)
+        self.assertEqual(IndexComponent.builds, 2)
+        # only the latest snapshot is kept
+        store = SnapshotStore(os.path.join(self.directory, 'snapshots'))
+        self.assertEqual(len(store._find('index')), 1)
+
+    def test_version_and_directory(self):
+        directory = os.path.join(self.directory, 'other')
+        self._launch({'directory': directory, 'version': 1})
+        self.assertTrue(
+            self._launch({'directory': directory, 'version': 1}).restored)
+        self.assertFalse(
+            self._launch({'directory': directory, 'version': 2}).restored)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_unreadable_snapshot(self):
+        self._launch(True)
+        store = SnapshotStore(os.path.join(self.directory, 'snapshots'))
+        for path in store._find():
+            with open(path, 'wb') as f:
+                f.write(b'garbage')
+        component = self._launch(True)
+        self.assertFalse(component.restored)
+        self.assertEqual(IndexComponent.builds, 2)
+        self.assertTrue(self._launch(True).restored)
+
+    @unittest.skipUnless(hasattr(os, 'getuid'), "requires unix permissions")
+    def test_untrusted_directory(self):
+        directory = os.path.join(self.directory, 'snapshots')
+        self._launch()
+        self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+        os.chmod(directory, 0o777)
+        store = SnapshotStore(directory)
+        self.assertRaises(ValueError, store.load, 'index', 'key')
+        component = self._launch()
+        self.assertFalse(component.restored)
+        self.assertEqual(IndexComponent.builds, 2)
+
+    def test_replicas(self):
+        def launch():
+            mgr = ComponentManager(
+                snapshot_directory=os.path.join(self.directory, 'snapshots'))
+            mgr.launch_configuration({'components': {
+                'index': {
+                    'class': 'epoxy.test.test_snapshots:IndexComponent',
+                    'replicas': 2,
+                    'settings': {'source': self.source},
+                    'snapshot': {'inputs': [self.source]},
+                },
+            }})
+            return mgr.components['index']
+        self.assertEqual([x.restored for x in launch()], [False, False])
+        self.assertEqual([x.restored for x in launch()], [True, True])
+        self.assertEqual(IndexComponent.builds, 2)
+
+    def test_requires_protocol(self):
+        mgr = ComponentManager(snapshot_directory=self.directory)
+        self.assertRaises(ValueError, mgr.launch_configuration, {
+            'components': {
+                'plain': {
+                    'class': 'epoxy.test.test_snapshots:PlainComponent',
+                    'snapshot': True,
+                },
+            }})
+
+    def test_key(self):
+        key = snapshot_key('a:B', {'x': 1}, [self.source])
+        self.assertEqual(key, snapshot_key('a:B', {'x': 1}, [self.source]))
+        self.assertNotEqual(key, snapshot_key('a:B', {'x': 2},
+                                              [self.source]))
+        self.assertNotEqual(key, snapshot_key('a:C', {'x': 1},
+                                              [self.source]))
+        self.assertNotEqual(key, snapshot_key('a:B', {'x': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.configuration import YamlConfigurationLoader
+from epoxy.core import ComponentManager
+from epoxy.proxies import SwappableHandle
+from epoxy.settings import StringSetting
+import os
+import threading
+import time
+import unittest
+
+CONFIG_YAML = os.path.join(os.path.dirname(__file__), "test_swap.yml")
+
+
+class Credentials(Component):
+
+    token = StringSetting(default="one")
+
+    def __init__(self):
+        self.started = False
+        self.stopped = False
+        self.starts = 0
+        self.waiting = threading.Event()
+
+    def start(self):
+        if self.token == "bad":
+            raise RuntimeError("bad token")
+        self.started = True
+        self.starts += 1
+
+    def stop(self):
+        self.stopped = True
+
+    def get_token(self):
+        return self.token
+
+    def wait(self, event):
+        self.waiting.set()
+        event.wait(5)
+        return self.token
+
+
+class Client(Component):
+
+    credentials = Dependency()
+
+    def run(self):
+        return self.credentials.get_token()
+
+
+def make_config(swappable=True):
+    config = YamlConfigurationLoader(CONFIG_YAML).load_configuration()
+    config['components']['credentials']['swappable'] = swappable
+    return config
+
+
+class TestSwap(unittest.TestCase):
+
+    def setUp(self):
+        self.mgr = ComponentManager()
+        self.mgr.launch_configuration(make_config())
+        self.addCleanup(self.mgr.shutdown)
+
+    def test_swap(self):
+        client = self.mgr.components['client']
+        other = self.mgr.components['other']
+        self.assertIsInstance(client.credentials, SwappableHandle)
+        old = self.mgr.components['credentials']
+        self.assertEqual(client.credentials.get_token(), "one")
+
+        new = self.mgr.swap('credentials', {'token': "two"})
+        self.assertIsNot(new, old)
+        self.assertTrue(new.started)
+        self.assertTrue(old.stopped)
+        self.assertEqual(client.credentials.get_token(), "two")
+        self.assertEqual(other.credentials.get_token(), "two")
+        self.assertEqual(client.credentials.token, "two")
+        self.assertIs(self.mgr.components['credentials'], new)
+
+        self.mgr.shutdown()
+        self.assertTrue(new.stopped)
+
+    def test_drain(self):
+        handle = self.mgr.components['client'].credentials
+        old = self.mgr.components['credentials']
+        release = threading.Event()
+        results = []
+        caller = threading.Thread(
+            target=lambda: results.append(handle.wait(release)))
+        caller.start()
+        self.assertTrue(old.waiting.wait(5))
+
+        swapper = threading.Thread(
+            target=self.mgr.swap, args=('credentials', {'token': "two"}))
+        swapper.start()
+        for _ in range(500):
+            if handle._target is not old:
+                break
+            time.sleep(0.01)
+        # new calls go to the replacement while the old one drains
+        self.assertEqual(handle.get_token(), "two")
+        self.assertFalse(old.stopped)
+        release.set()
+        caller.join()
+        swapper.join()
+        self.assertEqual(results, ["one"])
+        self.assertTrue(old.stopped)
+
+    def test_failed_swap(self):
+        old = self.mgr.components['credentials']
+        self.assertRaises(RuntimeError, self.mgr.swap, 'credentials',
+                          {'token': "bad"})
+        self.assertIs(self.mgr.components['credentials'], old)
+        self.assertFalse(old.stopped)
+        self.assertEqual(
+            self.mgr.components['client'].credentials.get_token(), "one")
+
+    def test_not_swappable(self):
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config(swappable=False))
+        old = mgr.components['credentials']
+        self.assertRaises(ValueError, mgr.swap, 'credentials',
+                          {'token': "two"})
+        self.assertIs(mgr.components['credentials'], old)
+        self.assertFalse(old.stopped)
+        mgr.shutdown()
+
+    def test_compact(self):
+        self.assertFalse(self.mgr.compact())
+        new = self.mgr.swap('credentials', {'token': "two"})
+        self.assertIs(self.mgr.components['credentials'], new)
+
+    def test_started_once(self):
+        new = self.mgr.swap('credentials', {'token': "two"})
+        self.assertEqual(new.starts, 1)
+        # launching a subgraph reaching it does not start it again
+        self.assertEqual(self.mgr.launch_subgraph(make_config(), 'client:run'),
+                         "two")
+        self.assertEqual(new.starts, 1)
+
+    def test_proxies_replaced(self):
+        config = make_config()
+        other = config['components']['other']
+        other['swappable'] = True
+        other['dependencies']['credentials'].update(
+            guard={'timeout': 1.0}, cache={'methods': ['get_token']})
+        mgr = ComponentManager()
+        mgr.launch_configuration(config)
+        self.addCleanup(mgr.shutdown)
+        _, _, _, _, executor = mgr._breakers[0]
+        for _ in range(3):
+            mgr.swap('other')
+        self.assertEqual(mgr.components['other'].run(), "one")
+        self.assertEqual(len(mgr.get_call_statistics()), 1)
+        self.assertEqual(len(mgr.get_cache_statistics()), 1)
+        self.assertEqual(len(mgr.get_breaker_states()), 1)
+        self.assertEqual(
+            mgr.get_call_statistics()[0]['methods']['get_token']['count'], 1)
+        # the replaced executor is shut down, its replacement is not
+        self.assertRaises(RuntimeError, executor.submit, time.time)
+        mgr._breakers[0][4].submit(time.time).result()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2014 Etherios, Inc. All rights reserved.
+# Etherios, Inc. is a Division of Digi International.
+
+from epoxy.component import Component, Dependency
+from epoxy.core import ComponentManager, GraphTemplate
+from epoxy.proxies import InstrumentedProxy
+from epoxy.settings import StringSetting
+import unittest
+
+
+class TenantComponent(Component):
+
+    instances = 0
+
+    other = Dependency(required=False)
+    others = Dependency(required=False)
+
+    schema = StringSetting(default="public")
+
+    def __init__(self):
+        TenantComponent.instances += 1
+        self.started = 0
+        self.stopped = 0
+
+    def start(self):
+        self.started += 1
+
+    def stop(self):
+        self.stopped += 1
+
+
+def make_config():
+    path = 'epoxy.test.test_templates:TenantComponent'
+    return {'components': {
+        'pool': {'class': path, 'share': 'singleton',
+                 'dependencies': {'other': 'pool_helper'}},
+        'pool_helper': {'class': path},
+        'db': {'class': path, 'dependencies': {'other': 'pool'},
+               'settings': {'schema': 'default'}},
+        'service': {
+            'class': path,
+            'dependencies': {
+                'other': {'component': 'db', 'instrument': True},
+                'others': 'workers',
+            },
+        },
+        'workers': {'class': path, 'replicas': 2},
+    }}
+
+
+class TestGraphTemplate(unittest.TestCase):
+
+    def setUp(self):
+        TenantComponent.instances = 0
+
+    def test_launch(self):
+        template = GraphTemplate.compile(make_config())
+        mgr = template.launch()
+        self.assertEqual(TenantComponent.instances, 6)
+        service = mgr.components['service']
+        self.assertIsInstance(service.other, InstrumentedProxy)
+        self.assertEqual(service.other.schema, 'default')
+        self.assertEqual([x.started for x in service.others], [1, 1])
+        self.assertIs(mgr.components['component_manager'], mgr)
+        self.assertEqual(len(mgr.get_call_statistics()), 1)
+        for name, component in mgr.components.items():
+            if isinstance(component, TenantComponent):
+                self.assertEqual(component.started, 1, name)
+        mgr.shutdown()
+        self.assertEqual(service.stopped, 1)
+
+    def test_tenants_isolated(self):
+        template = GraphTemplate.compile(make_config())
+        one = template.launch(settings={'db': {'schema': 'one'}})
+        two = template.launch(settings={'db': {'schema': 'two'}})
+        self.assertEqual(one.components['db'].schema, 'one')
+        self.assertEqual(two.components['db'].schema, 'two')
+        self.assertIsNot(one.components['pool'], two.components['pool'])
+        self.assertEqual(template.launch().components['db'].schema,
+                         'default')
+        self.assertRaises(ValueError, template.launch,
+                          settings={'missing': {}})
+
+    def test_singletons_from_parent(self):
+        template = GraphTemplate.compile(make_config())
+        shared = template.launch()
+        TenantComponent.instances = 0
+        tenant = template.launch(parent=shared)
+        pool = shared.components['pool']
+        self.assertIs(tenant.components['db'].other, pool)
+        # only needed by the singleton, so not built again
+        self.assertNotIn('pool_helper', tenant.components)
+        self.assertEqual(TenantComponent.instances, 4)
+        self.assertEqual(pool.started, 1)
+        tenant.shutdown()
+        self.assertEqual(pool.stopped, 0)
+        self.assertEqual(tenant.components['db'].stopped, 1)
+
+    def test_unstarted(self):
+        template = GraphTemplate.compile(make_config())
+        mgr = template.instantiate()
+        self.assertEqual(mgr.components['db'].started, 0)
+
+    def test_matches_launch_configuration(self):
+        template = GraphTemplate.compile(make_config())
+        mgr = ComponentManager()
+        mgr.launch_configuration(make_config())
+        self.assertEqual(sorted(template.launch().components),
+                         sorted(mgr.components))
+
+    def test_lazy_lists_rejected(self):
+        config = make_config()
+        config['components']['service']['dependencies']['others'] = {
+            'component': ['pool'], 'lazy': True}
+        self.assertRaises(ValueError, GraphTemplate.compile, config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,20 @@
 # Etherios, Inc. is a Division of Digi International.
 
 """Simple utilities used by other modules in this package."""
+import os
+import time
+
+# timer measures durations as precisely as possible; clock never goes
+# backwards, for timeouts and expiry
+try:
+    timer = time.perf_counter
+    clock = time.monotonic
+except AttributeError:  # Python 2
+    timer = clock = time.time
+
+# atomically replace one file with another (os.rename is only atomic, and
+# only replaces an existing file, on POSIX)
+replace_file = getattr(os, 'replace', os.rename)
 
 
 def load_module(path):